@@ -1,126 +1,718 @@
+import codecs
+import html as html_lib
 import json
+import os
 import re
 import io
+from array import array
+from bisect import bisect_left, bisect_right
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 
-from utilities import summarize_text
+import browser_pool
+import http_client
+import page_cache
+import scrape_scheduler
 
-# Optional: Playwright fallback for JS pages
+from parsed_pages import ParsedPage, get_page, put_page
+from passage_ranker import compress
+from session_context import get_session_id
+from utilities import summarize_texts
+
+# Optional: the fast parser backend needs lxml, and cssselect for CSS selectors
 try:
-    from playwright.sync_api import sync_playwright
-    _HAS_PLAYWRIGHT = True
-except Exception:
-    _HAS_PLAYWRIGHT = False
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+    _HAS_LXML = True
+except ImportError:
+    _HAS_LXML = False
 
 USER_AGENT = "Mozilla/5.0 (compatible; MyAgent/1.0; +https://example.org/bot)"
 
+# A static response with less visible text than this, but with scripts, is treated
+# as a JavaScript shell and rendered in the browser pool instead
+JS_SHELL_MAX_TEXT_CHARS = 200
+
+# Statuses a real browser often gets past (bot walls); other failures are returned as errors
+JS_RETRY_STATUSES = (403,)
+
+# Static downloads stop after this many bytes (override with SCRAPER_MAX_PAGE_MB); the
+# page is parsed from what was read
+MAX_PAGE_BYTES = int(float(os.getenv("SCRAPER_MAX_PAGE_MB", "8")) * 1024 * 1024)
+CHUNK_BYTES = 64 * 1024
+
+# Content types parsed as pages; anything else is refused before its body is read
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "application/xml", "text/xml", "text/plain")
+
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.I)
+_SCRIPT_RE = re.compile(r"<script\b", re.I)
+_INVISIBLE_RE = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.I | re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+_ENABLE_JS_RE = re.compile(r"(enable|turn on) javascript|requires javascript", re.I)
+_MARKUP_RE = re.compile(r"<(script|style|noscript|iframe|template)\b[^>]*>.*?</\1\s*>"
+                        r"|<!--.*?-->|<(?!!--)[a-zA-Z/!?][^>]*>", re.I | re.S)
+_HIDDEN_OPEN_RE = re.compile(r"<(script|style|noscript|iframe|template)\b", re.I)
+
+# Unfinished markup carried over to the next chunk is capped at this many characters
+MAX_MARKUP_CARRY = 64 * 1024
+
+
+def _looks_like_js_shell(html: str) -> bool:
+    """True for pages whose content is built by scripts (little text, or an "enable JavaScript" notice)."""
+    if not _SCRIPT_RE.search(html):
+        return False
+    visible = _TAG_RE.sub(" ", _INVISIBLE_RE.sub(" ", html))
+    if len(_clean_text(visible)) < JS_SHELL_MAX_TEXT_CHARS:
+        return True
+    noscript = re.search(r"<noscript\b.*?</noscript\s*>", html, re.I | re.S)
+    return bool(noscript and _ENABLE_JS_RE.search(noscript.group(0)))
+
+
+def _render(url: str, timeout: float) -> Dict[str, Any]:
+    """Render a page in the browser pool, within the host's politeness limits and the job's deadline."""
+    budget = scrape_scheduler.time_left(max(timeout, browser_pool.PAGE_DEADLINE_SECONDS))
+    try:
+        with scrape_scheduler.domain_slot(url, budget):
+            return browser_pool.render(url, timeout=scrape_scheduler.time_left(budget))
+    except TimeoutError as e:
+        return {"error": str(e)}
+
+
+def _body_encoding(response, head: bytes) -> str:
+    """Charset from the Content-Type header, else from a <meta> tag in the first bytes, else UTF-8."""
+    encoding = None
+    if "charset=" in response.headers.get("Content-Type", "").lower():
+        encoding = response.encoding
+    else:
+        match = _META_CHARSET_RE.search(head[:4096])
+        if match:
+            encoding = match.group(1).decode("ascii", errors="ignore")
+    try:
+        return codecs.lookup(encoding or "utf-8").name
+    except LookupError:
+        return "utf-8"
+
+
+class _VisibleTermCounter:
+    """
+    Counts search terms in the visible text of an HTML stream fed chunk by chunk.
+
+    Markup (tags, attributes, comments) and the content of the elements in
+    NON_CONTENT_TAGS are skipped, entities are decoded and whitespace collapsed, so counts follow the
+    text the page is searched in. Markup cut by a chunk boundary is carried to the
+    next chunk, and each term keeps its own tail (at most len(term) - 1 characters,
+    never reaching into a counted match) so a match spanning two chunks is counted
+    once and counts equal str.count over the whole text.
+    """
 
-def _fetch_html(url: str, js: bool = False, timeout: int = 15) -> Dict[str, Any]:
-    """Return dict with keys: html, final_url, error (optional)."""
-    headers = {"User-Agent": USER_AGENT}
-
-    if not js:
-        try:
-            r = requests.get(url, headers=headers, timeout=timeout)
-            r.raise_for_status()
-            return {"html": r.text, "final_url": r.url}
-        except Exception as e:
-            if _HAS_PLAYWRIGHT:
-                js = True
+    def __init__(self, terms: List[str]):
+        self.counts = dict.fromkeys(terms, 0)
+        self.tails = dict.fromkeys(terms, "")
+        self.carry = ""
+        self.skip_until = None  # closing-tag pattern while inside e.g. <script>
+        self.space = True
+
+    def feed(self, text: str) -> None:
+        data, self.carry = self.carry + text, ""
+        if self.skip_until is not None:
+            end = self.skip_until.search(data)
+            if end is None:
+                self.carry = data[-16:]
+                return
+            data, self.skip_until = data[end.end():], None
+
+        # Cut the chunk before markup that is not finished yet
+        cut = len(data)
+        opened = None
+        for opened in _HIDDEN_OPEN_RE.finditer(data):
+            pass
+        closing = re.compile(rf"</{opened.group(1)}\s*>", re.I) if opened is not None else None
+        if closing is not None and not closing.search(data, opened.end()):
+            cut = opened.start()
+            if data.find(">", opened.end()) != -1:
+                self.skip_until = closing
+                self.carry = data[-16:]
             else:
-                return {"error": str(e)}
+                self.carry = data[cut:]
+        comment = data.rfind("<!--", 0, cut)
+        if comment != -1 and data.find("-->", comment + 4, cut) == -1:
+            cut = comment
+        lt = data.rfind("<", 0, cut)
+        if lt != -1 and data.find(">", lt, cut) == -1 and re.match(r"<[a-zA-Z/!?]|<$", data[lt:lt + 2]):
+            cut = lt
+        if self.skip_until is None:
+            self.carry = data[cut:]
+        if len(self.carry) > MAX_MARKUP_CARRY:
+            self.carry = ""
+        visible = _MARKUP_RE.sub(" ", data[:cut])
+        amp = visible.rfind("&", len(visible) - 12)
+        if amp != -1 and ";" not in visible[amp:]:
+            # Keep a possibly split entity for the next chunk
+            visible, self.carry = visible[:amp], visible[amp:] + self.carry
+        self._count(visible)
+
+    def _count(self, text: str) -> None:
+        visible = re.sub(r"\s+", " ", html_lib.unescape(text)).lower()
+        if self.space and visible.startswith(" "):
+            visible = visible[1:]
+        if not visible:
+            return
+        for term in self.counts:
+            window = self.tails[term] + visible
+            last_end = 0
+            for match in re.finditer(re.escape(term), window):
+                self.counts[term] += 1
+                last_end = match.end()
+            # Text after the last match that could still start one
+            self.tails[term] = window[max(last_end, len(window) - len(term) + 1):]
+        self.space = visible.endswith(" ")
+
+    def satisfied(self, enough: int) -> bool:
+        return all(n >= enough for n in self.counts.values())
+
+
+def _read_body(response, budget: float, stop_terms: Optional[List[str]] = None,
+               enough_matches: int = 0) -> Dict[str, Any]:
+    """
+    Read and decode a streamed response chunk by chunk.
 
-    if js:
-        if not _HAS_PLAYWRIGHT:
-            return {"error": "Playwright not installed; cannot render JS."}
+    Reading stops at MAX_PAGE_BYTES, when the fetch's time budget runs out, or,
+    with stop_terms, one chunk after every term has been seen enough_matches
+    times in the page's visible text (so the last match keeps some context).
 
+    Returns:
+        Dict with html, and partial ("size cap", "deadline" or "enough matches") when
+        the body was not read to the end, or error for binary content
+    """
+    terms = [t.lower() for t in dict.fromkeys(stop_terms or []) if t and t.strip()]
+    counter = _VisibleTermCounter(terms) if terms and enough_matches > 0 else None
+    decoder, pieces = None, []
+    read, partial, stopping = 0, None, False
+    for chunk in response.iter_content(chunk_size=CHUNK_BYTES):
+        if decoder is None:
+            if b"\x00" in chunk[:1024]:
+                return {"error": "Response body is binary, not an HTML page"}
+            decoder = codecs.getincrementaldecoder(_body_encoding(response, chunk))(errors="replace")
+        chunk = chunk[:MAX_PAGE_BYTES - read]
+        read += len(chunk)
+        text = decoder.decode(chunk)
+        pieces.append(text)
+        if stopping:
+            partial = "enough matches"
+            break
+        if read >= MAX_PAGE_BYTES:
+            partial = "size cap"
+            break
+        if scrape_scheduler.time_left(budget) <= 0:
+            partial = "deadline"
+            break
+        if counter is not None:
+            counter.feed(text)
+            stopping = counter.satisfied(enough_matches)
+    if decoder is not None:
+        pieces.append(decoder.decode(b"", final=True))
+    if partial:
+        print(f"DEBUG: Stopped reading {response.url} after {read} bytes ({partial})")
+    return {"html": "".join(pieces), "partial": partial}
+
+
+def _fetch_html(url: str, js: bool = False, timeout: int = 15, cache: bool = True,
+                stop_terms: Optional[List[str]] = None, enough_matches: int = 0) -> Dict[str, Any]:
+    """
+    Return dict with keys: html, final_url, cached, partial, error (optional).
+
+    Static fetches go through the on-disk page cache: fresh pages are served
+    without a request and stale ones are revalidated with a conditional GET.
+    They fall back to the browser pool only when the page is a JavaScript shell
+    or the site refuses non-browser clients (403); network errors, timeouts and
+    other HTTP errors are returned as they are.
+
+    Requests wait for a slot under the host's rate limit (scrape_scheduler) and,
+    inside a scrape_many job, never run past the job's deadline.
+
+    The body is streamed: non-HTML content types are refused before it is read,
+    and reading stops at MAX_PAGE_BYTES or, with stop_terms, once every term has
+    appeared enough_matches times (see _read_body). Such partial pages are not
+    stored in the page cache.
+    """
+    headers = {"User-Agent": USER_AGENT}
+
+    if not js:
+        cached = page_cache.lookup(url) if cache else None
+        if cached is not None and cached["fresh"]:
+            return {"html": cached["html"], "final_url": cached["final_url"], "cached": True, "partial": None}
+        budget = scrape_scheduler.time_left(timeout)
+        if budget <= 0:
+            return {"error": f"Deadline passed before {url} was fetched"}
         try:
-            with sync_playwright() as p:
-                browser = p.firefox.launch(headless=True)
-                page = browser.new_page()
-                page.goto(url, timeout=30000)
-                page.wait_for_load_state("domcontentloaded", timeout=10000)
-                html = page.content()
-                final_url = page.url
-                browser.close()
-                return {"html": html, "final_url": final_url}
+            with scrape_scheduler.domain_slot(url, budget):
+                r = http_client.get(cached["final_url"] if cached else url,
+                                    headers={**headers, **page_cache.conditional_headers(cached)},
+                                    timeout=max(scrape_scheduler.time_left(budget), 1), stream=True)
         except Exception as e:
             return {"error": str(e)}
+        with r:
+            if r.status_code == 304 and cached is not None:
+                page_cache.revalidated(cached, r)
+                return {"html": cached["html"], "final_url": cached["final_url"], "cached": True, "partial": None}
+            if r.status_code in JS_RETRY_STATUSES and browser_pool.is_available():
+                print(f"DEBUG: {url} returned {r.status_code}; retrying in a browser")
+                r.close()
+                return _render(url, timeout)
+            try:
+                r.raise_for_status()
+            except Exception as e:
+                return {"error": str(e)}
+            content_type = r.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                return {"error": f"Not an HTML page (Content-Type: {content_type})"}
+            try:
+                body = _read_body(r, budget, stop_terms=stop_terms, enough_matches=enough_matches)
+            except Exception as e:
+                return {"error": str(e)}
+        if "error" in body:
+            return body
+        if browser_pool.is_available() and body["partial"] is None and _looks_like_js_shell(body["html"]):
+            print(f"DEBUG: {url} looks like a JavaScript shell; rendering in a browser")
+            rendered = _render(url, timeout)
+            if "error" not in rendered:
+                return rendered
+        if cache and body["partial"] is None:
+            page_cache.store(url, r, body=body["html"])
+        return {"html": body["html"], "final_url": r.url, "cached": False, "partial": body["partial"]}
 
-    return {"error": "Unknown fetch failure"}
+    return _render(url, timeout)
 
 
 def _clean_text(s: str) -> str:
     return re.sub(r"\s+", " ", s).strip()
 
 
-def _word_snippet(full_text: str, span: tuple, window_words: int = 20):
-    """Return snippet of window_words before and after the match."""
-    tokens = re.findall(r"\S+", full_text)
+def _summarize_entries(entries: List[Dict[str, Any]], query: Optional[str] = None) -> None:
+    """Replace the text of result entries with LLM summaries, all sent in one batched request."""
+    entries = [e for e in entries if "text" in e]
+    if not entries:
+        return
+    try:
+        summaries = summarize_texts([e["text"] for e in entries], query=query)
+    except Exception as e:
+        print(f"DEBUG: Summarization failed, using extractive compression: {e}")
+        summaries = [compress(e["text"], query=query, keywords=e.get("keywords")) for e in entries]
+    for entry, summary in zip(entries, summaries):
+        entry["text"] = summary
 
-    positions = []
-    pos = 0
-    for t in tokens:
-        start = full_text.find(t, pos)
-        positions.append((start, start + len(t)))
-        pos = start + len(t)
 
+def _token_window(starts, ends, span: tuple, window_words: int) -> tuple:
+    """Token range [s, e) of window_words tokens around a character span, found by bisection."""
     start_char, end_char = span
-    start_idx = next((i for i, (a, b) in enumerate(positions) if b > start_char), 0)
-    end_idx = next((i for i, (a, b) in enumerate(positions) if a >= end_char), len(tokens)-1)
+    start_idx = min(bisect_right(ends, start_char), max(len(starts) - 1, 0))
+    end_idx = min(bisect_left(starts, end_char), len(starts) - 1)
+    return max(0, start_idx - window_words), min(len(starts), end_idx + window_words + 1)
+
+
+def _word_snippet(full_text: str, span: tuple, window_words: int = 20, tokens: Optional[tuple] = None):
+    """
+    Return snippet of window_words before and after the match.
+
+    ``tokens`` are the (starts, ends) offset tables of the tokens of full_text;
+    pass them (e.g. ParsedPage.tokens) to avoid re-tokenizing the text per snippet.
+    """
+    if tokens is None:
+        tokens = (array("q"), array("q"))
+        for m in re.finditer(r"\S+", full_text):
+            tokens[0].append(m.start())
+            tokens[1].append(m.end())
+    starts, ends = tokens
+
+    s, e = _token_window(starts, ends, span, window_words)
+
+    return " ".join(full_text[starts[i]:ends[i]] for i in range(s, e)), s, e
+
+
+def _keyword_snippets(page, keywords: List[str], max_snippets: int = 5,
+                      window_words: int = 20) -> List[Dict[str, Any]]:
+    """
+    Snippets around the first max_snippets matches of each keyword, in page order.
+
+    Every window is located by bisection in the page's token tables, and since the
+    page text is whitespace-normalized a snippet is a single slice of it, so each
+    match costs the same however long the page is. Overlapping windows (nearby
+    matches, or several keywords in one passage) are merged into one snippet.
+
+    Returns:
+        List of dicts with text, keywords, and span (the first match, as character offsets)
+    """
+    starts, ends = page.tokens
+    if not starts:
+        return []
+    windows = []
+    for keyword in dict.fromkeys(k for k in keywords if k and k.strip()):
+        kw = keyword.lower()
+        position = 0
+        for _ in range(max_snippets):
+            idx = page.lower_text.find(kw, position)
+            if idx == -1:
+                break
+            span = (idx, idx + len(kw))
+            windows.append((*_token_window(starts, ends, span, window_words), span, keyword))
+            position = span[1]
+
+    snippets = []
+    for s, e, span, keyword in sorted(windows, key=lambda w: (w[0], w[2])):
+        if snippets and s <= snippets[-1]["end_token"]:
+            last = snippets[-1]
+            last["end_token"] = max(last["end_token"], e)
+            if keyword not in last["keywords"]:
+                last["keywords"].append(keyword)
+            continue
+        snippets.append({"start_token": s, "end_token": e, "span": span, "keywords": [keyword]})
+
+    for snippet in snippets:
+        snippet["text"] = page.text[starts[snippet.pop("start_token")]:ends[snippet.pop("end_token") - 1]]
+    return snippets
+
+
+# Elements removed before the text is extracted
+NON_CONTENT_TAGS = ("script", "style", "noscript", "iframe", "template")
+
+# Elements libxml2 reads as raw text (markup inside them stays a string) while
+# html.parser parses their content as elements
+RAW_TEXT_TAGS = ("textarea", "title")
+
+# libxml2 drops everything after </html> and reads CDATA sections as comments;
+# html.parser keeps both as text
+_DOCUMENT_END_TAGS = re.compile(r"</(?:body|html)\s*>", re.IGNORECASE)
+_CDATA_SECTIONS = re.compile(r"<!\[CDATA\[(.*?)\]\]>", re.DOTALL)
+
+
+class _SoupBackend:
+    """BeautifulSoup over the standard library parser: pure Python, no extra dependencies."""
+
+    name = "html.parser"
+    # A BeautifulSoup tree takes several times the size of the HTML it was built from
+    tree_overhead = 8
+
+    def parse(self, html: str):
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(list(NON_CONTENT_TAGS)):
+            tag.decompose()
+        return soup
+
+    def events(self, root):
+        """("start", element), ("text", string) and ("end", element) in document order, from the root."""
+        # The same text nodes get_text uses: no comments, doctypes or declarations
+        text_types = getattr(root, "interesting_string_types", {NavigableString, CData})
+        yield "start", root
+        stack = [(root, iter(root.contents))]
+        while stack:
+            tag, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                yield "end", tag
+            elif isinstance(child, Tag):
+                yield "start", child
+                stack.append((child, iter(child.contents)))
+            elif type(child) in text_types:
+                yield "text", child
+
+    def tag_name(self, element) -> str:
+        return element.name
+
+    def attribute(self, element, name: str) -> Optional[str]:
+        return element.get(name)
+
+    def select(self, root, css: str) -> List[Any]:
+        return root.select(css)
+
+    def outer_html(self, element) -> str:
+        return str(element)
+
+
+class _LxmlBackend:
+    """lxml's C parser with cssselect for CSS selectors: many times faster than BeautifulSoup.
+
+    Matches _SoupBackend's text except for NUL bytes, which libxml2 turns into U+FFFD.
+    """
+
+    name = "lxml"
+    tree_overhead = 3
+
+    def parse(self, html: str):
+        html = _DOCUMENT_END_TAGS.sub("", html)
+        html = _CDATA_SECTIONS.sub(lambda match: html_lib.escape(match.group(1)), html)
+        parser = lxml.html.HTMLParser(encoding="utf-8")
+        try:
+            root = lxml.html.document_fromstring(html.encode("utf-8", errors="replace"), parser=parser)
+        except etree.ParserError:
+            # Empty or whitespace-only documents
+            root = lxml.html.document_fromstring(b"<html></html>", parser=parser)
+        etree.strip_elements(root, *NON_CONTENT_TAGS, with_tail=False)
+        for element in root.iter(*RAW_TEXT_TAGS):
+            if element.text and "<" in element.text and not len(element):
+                # Parse the markup so the text matches _SoupBackend ("raw x", not "raw <b>x</b>")
+                fragment = lxml.html.fragment_fromstring(element.text, create_parent="div")
+                element.text = fragment.text
+                element.extend(list(fragment))
+        return root
+
+    def events(self, root):
+        """Same events as _SoupBackend.events; an element's tail text belongs to its parent."""
+        for event, element in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+            if event == "start":
+                yield "start", element
+                if element.text:
+                    yield "text", element.text
+                continue
+            if event == "end":
+                yield "end", element
+            # Comments and processing instructions only contribute the text after them
+            if element.tail and element is not root:
+                yield "text", element.tail
+
+    def tag_name(self, element) -> str:
+        return element.tag
+
+    def attribute(self, element, name: str) -> Optional[str]:
+        return element.get(name)
+
+    def select(self, root, css: str) -> List[Any]:
+        return _css_selector(css)(root)
+
+    def outer_html(self, element) -> str:
+        return lxml.html.tostring(element, encoding="unicode", with_tail=False)
+
+
+_selectors: Dict[str, Any] = {}
 
-    s = max(0, start_idx - window_words)
-    e = min(len(tokens), end_idx + window_words + 1)
 
-    return " ".join(tokens[s:e]), s, e
+def _css_selector(css: str):
+    """Compiled selector, reused across calls (compiling costs more than matching on small pages)."""
+    if css not in _selectors:
+        if len(_selectors) > 256:
+            _selectors.clear()
+        _selectors[css] = CSSSelector(css, translator="html")
+    return _selectors[css]
 
 
-def _find_nearby_urls(soup: BeautifulSoup, element) -> List[str]:
-    urls = set()
+# Parser backends by name, fastest first
+PARSER_BACKENDS = {"lxml": _LxmlBackend(), "html.parser": _SoupBackend()}
 
-    for a in element.select("a[href]"):
-        urls.add(a.get("href"))
+# Backend used when a call does not name one (override with SCRAPER_PARSER or set_parser).
+# html.parser gives exactly the text BeautifulSoup always gave; lxml is opt-in.
+_parser = os.getenv("SCRAPER_PARSER") or "html.parser"
 
-    parent = element.parent
-    if parent:
-        for a in parent.select("a[href]"):
-            urls.add(a.get("href"))
 
-        prev = element.find_previous_sibling()
-        if prev:
-            for a in prev.select("a[href]"):
-                urls.add(a.get("href"))
+def available_parsers() -> List[str]:
+    """Parser backends usable in this environment, fastest first."""
+    return [name for name in PARSER_BACKENDS if name != "lxml" or _HAS_LXML]
 
-        nxt = element.find_next_sibling()
-        if nxt:
-            for a in nxt.select("a[href]"):
-                urls.add(a.get("href"))
 
-    return [u for u in urls if u]
+def _resolve_parser(parser: Optional[str] = None):
+    name = parser or _parser
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{name}'. Available: {', '.join(available_parsers())}")
+    if name == "lxml" and not _HAS_LXML:
+        print("DEBUG: lxml/cssselect not installed; parsing with html.parser")
+        name = "html.parser"
+    return PARSER_BACKENDS[name]
 
 
-def _extract_table_structure(table) -> Dict[str, Any]:
-    """Extract table structure as rows and columns."""
-    rows = []
+def set_parser(parser: str) -> None:
+    """Select the parser backend used when a call does not name one."""
+    global _parser
+    _resolve_parser(parser)
+    _parser = parser
 
-    for tr in table.find_all("tr"):
-        cols = [td.get_text(strip=True) for td in tr.find_all(["td","th"])]
-        rows.append(cols)
-    return rows
+
+def _flatten(backend, root):
+    """
+    Flattened page text plus an index of it, built in one walk over the DOM.
+
+    The text equals _clean_text(soup.get_text(" ", strip=True)). The index (see
+    ParsedPage) numbers every element in document order and records its parent,
+    subtree and text range, the start and element of every text node, and every
+    link, so matches, elements, text and links are found without searching the DOM.
+    """
+    pieces = []
+    tags, tag_order, tag_names = [], {}, []
+    tag_parents, tag_ends, tag_text_starts, tag_text_ends = array("q"), array("q"), array("q"), array("q")
+    string_starts, string_tags = array("q"), array("q")
+    link_orders, link_hrefs = array("q"), []
+    open_tags = []
+    position = 0
+    for kind, node in backend.events(root):
+        if kind == "start":
+            n = len(tags)
+            name = backend.tag_name(node)
+            tags.append(node)
+            tag_order[id(node)] = n
+            tag_names.append(name)
+            tag_parents.append(open_tags[-1] if open_tags else -1)
+            tag_ends.append(n + 1)
+            tag_text_starts.append(position)
+            tag_text_ends.append(position)
+            open_tags.append(n)
+            if name == "a":
+                href = backend.attribute(node, "href")
+                if href:
+                    link_orders.append(n)
+                    link_hrefs.append(href)
+        elif kind == "end":
+            n = open_tags.pop()
+            tag_ends[n] = len(tags)
+            tag_text_ends[n] = max(position - 1, tag_text_starts[n])
+        else:
+            piece = _clean_text(node)
+            if not piece or not open_tags:
+                continue
+            string_starts.append(position)
+            string_tags.append(open_tags[-1])
+            pieces.append(piece)
+            position += len(piece) + 1
+    index = {
+        "tags": tags, "tag_order": tag_order, "tag_names": tag_names, "tag_parents": tag_parents,
+        "tag_ends": tag_ends, "tag_text_starts": tag_text_starts, "tag_text_ends": tag_text_ends,
+        "string_starts": string_starts, "string_tags": string_tags,
+        "link_orders": link_orders, "link_hrefs": link_hrefs,
+    }
+    return " ".join(pieces), index
+
+
+def _parse_html(html: str, parser: Optional[str] = None):
+    """
+    Parse a page and drop non-content tags; returns (root, flattened text, text index, backend).
+
+    ``parser`` picks the backend (see PARSER_BACKENDS); default: the global choice.
+    """
+    backend = _resolve_parser(parser)
+    root = backend.parse(html)
+    return (root, *_flatten(backend, root), backend)
+
+
+def _parse_page(url: str, final_url: str, html: str, parser: Optional[str] = None) -> ParsedPage:
+    root, text, index, backend = _parse_html(html, parser=parser)
+    return ParsedPage(url, final_url, html, root, text, index, backend)
+
+
+def _load_page(url: str, js: bool = False, parser: Optional[str] = None,
+               stop_terms: Optional[List[str]] = None, enough_matches: int = 0) -> Dict[str, Any]:
+    """
+    Return dict with keys: page (a ParsedPage), error (optional).
+
+    Pages parsed earlier in the session are reused (whichever backend parsed
+    them), so an explore -> keyword -> selector sequence on one URL fetches and
+    parses it only once.
+
+    With stop_terms the download may stop once every term has appeared
+    enough_matches times; such a page is reused only by calls it can satisfy
+    (the same or fewer terms and matches), others fetch the whole page, as do
+    calls after a page cut short by a scrape_many deadline. A stopped download
+    whose parsed text has fewer matches than counted is fetched again in full.
+    """
+    session_id = get_session_id()
+    page = get_page(session_id, url, js=js)
+    if page is not None:
+        if page.partial in (None, "size cap"):
+            return {"page": page}
+        read_terms, read_matches = page.read_for
+        if (page.partial == "enough matches" and stop_terms and set(stop_terms) <= read_terms
+                and 0 < enough_matches <= read_matches):
+            return {"page": page}
+
+    fetched = _fetch_html(url, js=js, stop_terms=stop_terms, enough_matches=enough_matches)
+    if "error" in fetched:
+        return {"error": fetched["error"]}
+
+    page = _parse_page(url, fetched.get("final_url", url), fetched["html"], parser=parser)
+    if fetched.get("partial") == "enough matches" and any(
+            page.lower_text.count(t.lower()) < enough_matches for t in stop_terms if t and t.strip()):
+        # The stream counted matches the parsed text does not have (markup the
+        # counter read differently from the parser); read the whole page rather
+        # than report too few
+        print(f"DEBUG: Partial page {url} has too few matches; fetching it in full")
+        return _load_page(url, js=js, parser=parser)
+    page.partial = fetched.get("partial")
+    page.read_for = (set(stop_terms or []), enough_matches)
+    put_page(session_id, url, page, js=js)
+    return {"page": page}
+
+
+# Rows of a table shown with its schema; more come from get_table_rows
+TABLE_PREVIEW_ROWS = 5
+
+
+def _json_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame rows as dicts, with missing values as None."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def _table_overview(page: ParsedPage, table) -> Dict[str, Any]:
+    """Schema and first rows of one of the page's tables (all tables are parsed together, once per page)."""
+    table_id = page.table_number(table)
+    df = page.frames[table_id]
+    return {
+        "table_id": table_id,
+        "columns": [{"name": str(col), "dtype": str(dtype)} for col, dtype in df.dtypes.items()],
+        "row_count": len(df),
+        "preview": _json_records(df.head(TABLE_PREVIEW_ROWS)),
+    }
+
+
+def _table_rows(df: pd.DataFrame, offset: int = 0, limit: int = 20, columns: Optional[List[str]] = None,
+                contains: Optional[str] = None, filter_column: Optional[str] = None,
+                filter_value: Optional[str] = None) -> Dict[str, Any]:
+    """
+    A page of a table's rows, optionally filtered and reduced to some columns.
+
+    Args:
+        df: The table
+        offset: First row to return (after filtering)
+        limit: Number of rows to return
+        columns: Columns to return (default: all)
+        contains: Keep rows where any cell contains this text (case-insensitive)
+        filter_column / filter_value: Keep rows whose filter_column cell contains filter_value (case-insensitive)
+
+    Returns:
+        Dict with status, columns, row_count (matching rows), offset, rows, has_more (or error)
+    """
+    missing = [c for c in (columns or []) + ([filter_column] if filter_column else []) if c not in df.columns]
+    if missing:
+        return {"status": "error", "error": f"Unknown column(s) {missing}. Columns: {[str(c) for c in df.columns]}"}
+    if contains:
+        cells = df.astype(str)
+        mask = cells.apply(lambda col: col.str.contains(contains, case=False, regex=False)).any(axis=1)
+        df = df[mask]
+    if filter_column and filter_value is not None:
+        df = df[df[filter_column].astype(str).str.contains(str(filter_value), case=False, regex=False)]
+    if columns:
+        df = df[columns]
+    offset = max(offset, 0)
+    page_rows = df.iloc[offset:offset + limit]
+    return {
+        "status": "ok",
+        "columns": [str(c) for c in df.columns],
+        "row_count": len(df),
+        "offset": offset,
+        "rows": _json_records(page_rows),
+        "has_more": offset + len(page_rows) < len(df),
+    }
 
 
 def scrape_data(url: str,
                 selector: Optional[str] = None,
                 keyword: Optional[str] = None,
+                keywords: Optional[List[str]] = None,
                 js: bool = False,
                 max_snippets: int = 5,
                 window_words: int = 20,
-                user_query: Optional[str] = None) -> Dict[str, Any]:
+                user_query: Optional[str] = None,
+                summarize: bool = False,
+                parser: Optional[str] = None) -> Dict[str, Any]:
     """
     Scrape a webpage and extract content based on different modes.
     
@@ -133,17 +725,24 @@ def scrape_data(url: str,
         url (str): The URL of the webpage to scrape.
         selector (Optional[str]): CSS selector to extract specific elements (e.g., "article", "table", ".class-name").
                                   If None and keyword is also None, returns page structure info.
+                                  Standard CSS3 selectors only (no :-soup-contains() or other
+                                  BeautifulSoup extensions).
         keyword (Optional[str]): Search for a specific keyword in the page text. Returns snippets with context.
+        keywords (Optional[List[str]]): Several keywords to search for in one call (e.g. a name and its synonyms);
+                                        nearby matches are merged into one snippet.
         js (bool): Whether to render JavaScript (requires Playwright). Default is False.
-        max_snippets (int): Maximum number of snippets to return. Default is 5.
+        max_snippets (int): Maximum number of matches used per keyword. Default is 5.
         window_words (int): Number of words before and after keyword match to include in snippet. Default is 20.
-        user_query (Optional[str]): The user's original query for query-aware compression. Used internally for summarization.
+        user_query (Optional[str]): The user's original query; the most relevant passages of long results are kept.
+        summarize (bool): Summarize results with the LLM instead of extracting passages locally (slower). Default is False.
+        parser (Optional[str]): HTML parser backend ("lxml" or "html.parser"). Default: the global choice (see set_parser).
     
     Returns:
         Dict[str, Any]: A dictionary with the following structure:
             - status: "ok", "error", "not_found"
-            - snippets: List of keyword-based text snippets with nearby URLs (if keyword search)
-            - selector_results: List of extracted content from CSS selectors (if selector used)
+            - snippets: List of keyword-based text snippets with the keywords they contain and nearby URLs (if keyword search)
+            - selector_results: List of extracted content from CSS selectors (if selector used);
+                                tables give their table_id, schema and first rows (see get_table_rows)
             - headings: List of page headings h1, h2, h3 (if initial exploration)
             - selectors_hint: List of available selectors found on page (if initial exploration)
             - meta: Dictionary with fetched_url and final_url
@@ -151,24 +750,21 @@ def scrape_data(url: str,
     
     Usage Notes (for the agent):
         - First call with only url to explore page structure (get headings and selector hints)
-        - Use keyword parameter to search for specific text content
+        - Use keyword parameter to search for specific text content (keywords for several at once)
         - Use selector parameter to extract structured content (tables, articles, lists, etc.)
         - Set js=True if the page requires JavaScript rendering
         - Combine with web_search() to find relevant URLs first, then scrape them
     """
 
-    fetched = _fetch_html(url, js=js)
-    if "error" in fetched:
-        return {"status": "error", "error": fetched["error"], "meta": {"fetched_url": url}}
+    # A keyword-only search may stop downloading once every term has enough matches
+    terms = ([keyword] if keyword else []) + list(keywords or [])
+    stop_terms = terms if terms and not selector else None
+    loaded = _load_page(url, js=js, parser=parser, stop_terms=stop_terms, enough_matches=max_snippets)
+    if "error" in loaded:
+        return {"status": "error", "error": loaded["error"], "meta": {"fetched_url": url}}
 
-    html = fetched["html"]
-    final_url = fetched.get("final_url", url)
-    soup = BeautifulSoup(html, "html.parser")
-
-    for tag in soup(["script", "style", "noscript", "iframe"]):
-        tag.decompose()
-
-    page_text = _clean_text(soup.get_text(" ", strip=True))
+    page = loaded["page"]
+    final_url = page.final_url
 
     result = {
         "status": "ok",
@@ -179,12 +775,12 @@ def scrape_data(url: str,
     }
 
     # CASE 1 ------------------ Initial call (no keyword + no selector)
-    if not selector and not keyword:
-        headings = [h.get_text(" ", strip=True) for h in soup.select("h1, h2, h3")][:40]
+    if not selector and not keyword and not keywords:
+        headings = [page.element_text(h) for h in page.find_all("h1", "h2", "h3")][:40]
         selectors_found = []
 
         for sel in ["table", "article", "main", "ul", "ol"]:
-            if soup.select_one(sel):
+            if page.has_tag(sel):
                 selectors_found.append(sel)
 
         result["headings"] = headings
@@ -192,83 +788,53 @@ def scrape_data(url: str,
         return result
 
     # CASE 2 ------------------ Keyword search
-    if keyword:
-        low = page_text.lower()
-        kw = keyword.lower()
-
-        matches = []
-        start = 0
-        while len(matches) < max_snippets:
-            idx = low.find(kw, start)
-            if idx == -1:
-                break
-            matches.append((idx, idx + len(kw)))
-            start = idx + len(kw)
+    if terms:
+        found = _keyword_snippets(page, terms, max_snippets=max_snippets, window_words=window_words)
 
+        if found:
+            for found_snippet in found:
+                snippet = found_snippet["text"]
 
-        if matches:
-            for i, span in enumerate(matches):
-               
-                snippet, _, _ = _word_snippet(page_text, span, window_words=window_words)
-          
+                # The most specific (innermost) element containing the (first) match
+                element = page.element_for_span(*found_snippet["span"])
 
-                # Find the most specific (smallest) element containing the keyword
-                element = None
-                elements_checked = 0
-                candidate_elements = []
-                
-                # Skip these large container elements
-                skip_tags = {'html', 'body', 'main', 'div', 'section', 'article'}
-                
-                for el in soup.find_all():
-                    elements_checked += 1
-                    try:
-                        el_text = el.get_text(" ", strip=True).lower()
-                        if kw in el_text:
-                            # Skip very large elements (likely page containers)
-                            if len(el_text) > 500:
-                                continue
-                            # Prefer smaller, more specific elements
-                            candidate_elements.append((el, len(el_text)))
-                    except:
-                        continue
-                
-                if candidate_elements:
-                    # Sort by text length (smallest first) and take the most specific
-                    candidate_elements.sort(key=lambda x: x[1])
-                    element = candidate_elements[-1][0]
-                   
-
-                urls = _find_nearby_urls(soup, element) if element else []
+                urls = page.links_near(element) if element is not None else []
                 
                 # Compress the snippet text to reduce token usage
-                try:
-                    compressed_snippet = summarize_text(snippet, query=user_query)
-                except Exception as e:
-                    # If summarization fails, use original snippet
-                    print(f"Summarization failed for snippet: {e}")
-                    compressed_snippet = snippet
+                compressed_snippet = snippet if summarize else compress(
+                    snippet, query=user_query, keywords=found_snippet["keywords"])
                 
                 snippet_entry = {
                     "text": compressed_snippet,
+                    "keywords": found_snippet["keywords"],
                     "urls": urls
                 }
 
                 result["snippets"].append(snippet_entry)
 
+            if summarize:
+                _summarize_entries(result["snippets"], query=user_query)
             return result
 
         else:
             if not selector:
                 return {
                     "status": "not_found",
-                    "note": f"Keyword '{keyword}' not found on page.",
+                    "note": f"Keyword(s) {', '.join(repr(t) for t in terms)} not found on page.",
                     "meta": result["meta"]
                 }
 
     # CASE 3 ------------------ CSS Selector extraction
     if selector:
-        elems = soup.select(selector)
+        try:
+            elems = page.select(selector)
+        except Exception as e:
+            # cssselect (lxml backend) does not know soupsieve extensions such as :-soup-contains()
+            return {
+                "status": "error",
+                "error": f"Invalid or unsupported CSS selector '{selector}': {e}",
+                "meta": result["meta"]
+            }
         if not elems:
             return {
                 "status": "not_found",
@@ -278,56 +844,21 @@ def scrape_data(url: str,
 
         for el in elems[:max_snippets]:
             # Check if this is a table element
-            if el.name == 'table':
-                urls = [a.get("href") for a in el.select("a[href]")]
-                table_text = _clean_text(el.get_text(" ", strip=True))
-
-                # Use pandas to extract a clean table representation
-                try:
-                    dfs = pd.read_html(io.StringIO(str(el)))
-                    if dfs:
-                        df = dfs[0]
-                        table_data = {
-                            "columns": [str(col) for col in df.columns],
-                            "rows": df.to_dict(orient="records"),
-                            "row_count": len(df)
-                        }
-                    else:
-                        table_data = {
-                            "columns": None,
-                            "rows": [],
-                            "row_count": 0
-                        }
-                except Exception as e:
-                    print(f"Pandas failed to parse table: {e}")
-                    table_data = _extract_table_structure(el)
-
-                # Compress table text while preserving structured data
-                try:
-                    compressed_text = summarize_text(dfs, query=user_query)
-                    print(compressed_text)
-
-                except Exception as e:
-                    print(f"Summarization failed for table: {e}")
-                    compressed_text = table_text
-
+            if page.name(el) == 'table':
+                # Schema and a preview only; rows come from get_table_rows with the table_id
                 result["selector_results"].append({
                     "selector": selector,
                     "type": "table",
-                    "text": compressed_text,
-                    "urls": urls[:5]
+                    "table_data": _table_overview(page, el),
+                    "urls": page.links_in(el)[:5]
                 })
             else:
                 # For non-table elements, use existing text extraction
-                text = _clean_text(el.get_text(" ", strip=True))
-                urls = [a.get("href") for a in el.select("a[href]")]
+                text = page.element_text(el)
+                urls = page.links_in(el)
                 
                 # Compress the extracted text
-                try:
-                    compressed_text = summarize_text(text, query=user_query)
-                except Exception as e:
-                    print(f"Summarization failed for text: {e}")
-                    compressed_text = text
+                compressed_text = text if summarize else compress(text, query=user_query, keywords=terms)
                 
                 result["selector_results"].append({
                     "selector": selector,
@@ -335,7 +866,9 @@ def scrape_data(url: str,
                     "text": compressed_text,  # Use compressed version
                     "urls": urls[:5]
                 })
-        
+
+        if summarize:
+            _summarize_entries(result["selector_results"], query=user_query)
         return result
 
     return {"status": "not_found", "note": "No matches found", "meta": result["meta"]}
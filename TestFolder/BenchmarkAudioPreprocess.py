@@ -0,0 +1,74 @@
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from audio_pipeline import _HAS_FFMPEG, transcribe_file
+
+# Simulated provider: upload over a fixed uplink, then a fixed processing cost per second of audio
+UPLINK_MBPS = 50
+PROCESSING_SECONDS_PER_AUDIO_MINUTE = 0.3
+
+
+def make_recording(path: Path, minutes: float, rate: int = 44_100) -> None:
+    """Stereo 16-bit WAV of 'speech' bursts (modulated tones) separated by pauses."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(minutes * 60 * rate)) / rate
+    voice = 0.3 * np.sin(2 * np.pi * 180 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    voice += 0.02 * rng.standard_normal(len(t))
+    # Pauses: 2-6 seconds of near-silence after every 10-20 seconds of talking
+    position = 0
+    while position < len(t):
+        position += int(rng.uniform(10, 20) * rate)
+        pause = int(rng.uniform(2, 6) * rate)
+        voice[position:position + pause] *= 0.001
+        position += pause
+    pcm = (np.stack([voice, voice], axis=1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as out:
+        out.setnchannels(2)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(pcm.tobytes())
+
+
+def simulated_transcribe(audio: bytes, filename: str) -> dict:
+    upload = len(audio) * 8 / (UPLINK_MBPS * 1e6)
+    time.sleep(upload + PROCESSING_SECONDS_PER_AUDIO_MINUTE)
+    return {"text": filename, "segments": []}
+
+
+def run(label: str, path: Path, transcribe_fn, **kwargs) -> None:
+    start = time.perf_counter()
+    result = transcribe_file(str(path), transcribe_fn, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {result['bytes_sent'] / 1e6:9.2f}MB {result['chunks']:4d} chunks {elapsed:8.2f}s")
+
+
+if __name__ == "__main__":
+    # Usage: python BenchmarkAudioPreprocess.py [audio file] [--groq]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if args:
+        path = Path(args[0])
+    else:
+        path = Path(tempfile.gettempdir()) / "bench_recording.wav"
+        if not path.exists():
+            make_recording(path, minutes=10)
+
+    transcribe_fn = simulated_transcribe
+    if "--groq" in sys.argv:
+        from tools import _whisper_transcribe
+        transcribe_fn = _whisper_transcribe
+
+    print(f"{path.name}: {path.stat().st_size / 1e6:.2f}MB on disk")
+    if not _HAS_FFMPEG:
+        print("ffmpeg not found: flac and opus fall back to wav")
+    print(f"{'path':<34} {'sent':>11} {'':>11} {'latency':>9}")
+    run("raw file, one request", path, transcribe_fn, preprocess=False)
+    run("16 kHz mono wav", path, transcribe_fn, codec="wav")
+    run("16 kHz mono flac", path, transcribe_fn, codec="flac")
+    run("16 kHz mono opus", path, transcribe_fn, codec="ogg")
+    run("16 kHz mono opus, silence trimmed", path, transcribe_fn, codec="ogg", trim_silence=True)
@@ -0,0 +1,118 @@
+import random
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from Scraper import _parse_page
+
+
+# Legacy baseline: links in, around and next to an element, found by searching the DOM
+def _find_nearby_urls(soup: BeautifulSoup, element):
+    urls = set()
+
+    for a in element.select("a[href]"):
+        urls.add(a.get("href"))
+
+    parent = element.parent
+    if parent:
+        for a in parent.select("a[href]"):
+            urls.add(a.get("href"))
+
+        prev = element.find_previous_sibling()
+        if prev:
+            for a in prev.select("a[href]"):
+                urls.add(a.get("href"))
+
+        nxt = element.find_next_sibling()
+        if nxt:
+            for a in nxt.select("a[href]"):
+                urls.add(a.get("href"))
+
+    return [u for u in urls if u]
+
+
+WORDS = ("revenue growth market share report annual quarter region product customer "
+         "service launch policy research energy climate policy health data model").split()
+
+
+def make_page(sections: int, seed: int = 0) -> str:
+    """A long article: nested sections of paragraphs with links, lists and small tables."""
+    rng = random.Random(seed)
+
+    def sentence(n: int = 12) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    parts = ["<html><head><title>Fixture</title><script>var tracking = 1;</script></head><body><main>"]
+    for i in range(sections):
+        parts.append(f"<section id='s{i}'><h2>Section {i}</h2><div class='body'>")
+        for j in range(4):
+            parts.append(f"<p>{sentence()} <a href='/ref/{i}/{j}'>{sentence(3)}</a> {sentence()}</p>")
+        parts.append("<ul>" + "".join(f"<li>{sentence(5)}</li>" for _ in range(3)) + "</ul>")
+        if i % 10 == 0:
+            parts.append("<table>" + "".join(
+                f"<tr><td>{sentence(2)}</td><td>{rng.randint(1, 999)}</td></tr>" for _ in range(5)) + "</table>")
+        parts.append("</div></section>")
+    parts.append("<footer>needle marker at the very end</footer></main></body></html>")
+    return "".join(parts)
+
+
+def legacy_lookup(soup: BeautifulSoup, kw: str):
+    """The previous per-match element search, kept here for comparison."""
+    candidate_elements = []
+    for el in soup.find_all():
+        el_text = el.get_text(" ", strip=True).lower()
+        if kw in el_text:
+            if len(el_text) > 500:
+                continue
+            candidate_elements.append((el, len(el_text)))
+    if candidate_elements:
+        candidate_elements.sort(key=lambda x: x[1])
+        return candidate_elements[-1][0]
+    return None
+
+
+def find_matches(text: str, kw: str, limit: int):
+    matches, start = [], 0
+    while len(matches) < limit:
+        idx = text.find(kw, start)
+        if idx == -1:
+            break
+        matches.append((idx, idx + len(kw)))
+        start = idx + len(kw)
+    return matches
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # Usage: python BenchmarkKeywordLookup.py [sections] [matches]
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    html = make_page(sections)
+    # The legacy search needs a BeautifulSoup tree, so the page is parsed with that backend
+    page, parse_time = timed(lambda: _parse_page("fixture", "fixture", html, parser="html.parser"))
+    soup = page.root
+    print(f"Fixture: {len(html) / 1e6:.1f}MB HTML, {len(page.tags)} elements, "
+          f"{len(page.string_starts)} text nodes, parse + index {parse_time:.2f}s")
+
+    for kw in ("market share", "needle marker"):
+        matches = find_matches(page.lower_text, kw, limit)
+
+        legacy_elements, legacy_time = timed(lambda: [legacy_lookup(soup, kw) for _ in matches])
+        indexed_elements, indexed_time = timed(lambda: [page.element_for_span(*span) for span in matches])
+        legacy_urls, legacy_urls_time = timed(lambda: [_find_nearby_urls(soup, el) for el in indexed_elements])
+        indexed_urls, indexed_urls_time = timed(lambda: [page.links_near(el) for el in indexed_elements])
+        assert all(kw in page.element_text(el).lower() for el in indexed_elements)
+        assert all(set(a) == set(b) for a, b in zip(legacy_urls, indexed_urls))
+        print(f"'{kw}': {len(matches)} match(es)")
+        print(f"  legacy scan    {legacy_time * 1000:10.1f}ms  {[el.name for el in legacy_elements]}")
+        print(f"  offset index   {indexed_time * 1000:10.3f}ms  {[el.name for el in indexed_elements]}")
+        print(f"  nearby urls    {legacy_urls_time * 1000:10.1f}ms by DOM search, "
+              f"{indexed_urls_time * 1000:.3f}ms by index ({sum(map(len, indexed_urls))} urls)")
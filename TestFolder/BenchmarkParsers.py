@@ -0,0 +1,61 @@
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from Scraper import _keyword_snippets, _parse_page, available_parsers
+from BenchmarkKeywordLookup import make_page
+
+KEYWORDS = ["market share", "revenue growth", "energy"]
+
+
+def load_corpus(directory: str = None) -> dict:
+    """Saved pages (*.html, *.htm) from a directory, or generated pages of several sizes."""
+    if directory:
+        paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in (".html", ".htm"))
+        return {p.name: p.read_text(encoding="utf-8", errors="replace") for p in paths}
+    return {f"generated-{n}-sections": make_page(n, seed=n) for n in (50, 300, 1500)}
+
+
+def parse_and_extract(html: str, parser: str) -> int:
+    """One scrape's worth of work: parse and index, then keyword, explore and selector extraction."""
+    page = _parse_page("corpus", "corpus", html, parser=parser)
+    snippets = _keyword_snippets(page, KEYWORDS)
+    for snippet in snippets:
+        page.links_near(page.element_for_span(*snippet["span"]))
+    headings = [page.element_text(h) for h in page.find_all("h1", "h2", "h3")]
+    selected = [(page.element_text(el), page.links_in(el)) for el in page.select("section p")]
+    return len(snippets) + len(headings) + len(selected)
+
+
+def measure(html: str, parser: str, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        parse_and_extract(html, parser)
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    parse_and_extract(html, parser)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+if __name__ == "__main__":
+    # Usage: python BenchmarkParsers.py [directory of saved .html pages]
+    corpus = load_corpus(sys.argv[1] if len(sys.argv) > 1 else None)
+    parsers = available_parsers()
+    print(f"{'page':<32} {'size':>8}  " + "  ".join(f"{p:>22}" for p in parsers))
+    totals = {p: 0.0 for p in parsers}
+    for name, html in corpus.items():
+        cells = []
+        for parser in parsers:
+            seconds, peak = measure(html, parser)
+            totals[parser] += seconds
+            cells.append(f"{seconds * 1000:8.1f}ms {peak / 1e6:7.1f}MB peak")
+        print(f"{name[:32]:<32} {len(html) / 1e6:6.2f}MB  " + "  ".join(cells))
+    print(f"{'total':<32} {'':>8}  " + "  ".join(f"{totals[p] * 1000:8.1f}ms{'':>13}" for p in parsers))
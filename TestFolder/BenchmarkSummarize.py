@@ -0,0 +1,147 @@
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from data_profiler import summarize_dataframe, get_cached_summary, encode_summary_for_prompt
+
+
+def legacy_summarize(
+    df: pd.DataFrame,
+    sample_values: int = 5,
+    categorical_threshold: float = 0.05
+) -> Dict[str, Any]:
+    # The previous implementation, copied verbatim from the baseline tools.py for comparison
+    print("DEBUG: Inside summarize_dataframe")
+    """
+    Generate a robust, LLM-friendly summary of a pandas DataFrame.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe
+    sample_values : int
+        Number of unique example values to capture per column
+    categorical_threshold : float
+        Max ratio of unique values to rows for categorical inference
+
+    Returns
+    -------
+    Dict[str, Any]
+        JSON-serializable dataset summary
+    """
+
+    def infer_semantic_type(values: list[str], col_name: str) -> str:
+        lower_vals = {str(v).lower() for v in values}
+
+        if lower_vals <= {"male", "female"}:
+            return "gender"
+        if lower_vals <= {"yes", "no"}:
+            return "boolean"
+        if "date" in col_name.lower():
+            return "date"
+        if "id" in col_name.lower():
+            return "identifier"
+        if "location" in col_name.lower():
+            return "location"
+
+        return "category"
+
+    def infer_role(series: pd.Series) -> str:
+        if pd.api.types.is_bool_dtype(series):
+            return "boolean"
+
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return "datetime"
+
+        if pd.api.types.is_numeric_dtype(series):
+            return "numeric"
+
+        unique_count = series.nunique(dropna=True)
+        total_count = len(series)
+
+        if unique_count <= categorical_threshold * total_count:
+            return "categorical"
+
+        return "text"
+
+    summary = {
+        "row_count": int(len(df)),
+        "column_count": int(len(df.columns)),
+        "duplicate_rows": int(df.duplicated().sum()),
+        "memory_usage_mb": round(df.memory_usage(deep=True).sum() / 1e6, 2),
+        "columns": []
+    }
+
+    for col in df.columns:
+        series = df[col]
+        non_null = series.dropna()
+
+        unique_values = non_null.unique()
+        example_values = [
+            v.item() if isinstance(v, np.generic) else v
+            for v in unique_values[:sample_values]
+        ]
+
+        role = infer_role(series)
+
+        column_info = {
+            "name": col,
+            "dtype": str(series.dtype),
+            "role": role,
+            "missing_count": int(series.isna().sum()),
+            "missing_percent": round(series.isna().mean() * 100, 2),
+            "unique_count": int(series.nunique(dropna=True)),
+            "example_values": example_values
+        }
+
+        if role == "categorical":
+            column_info["semantic_type"] = infer_semantic_type(
+                example_values, col
+            )
+
+        summary["columns"].append(column_info)
+
+    print(f"DEBUG: Summary generated with {len(summary['columns'])} columns")
+    return summary
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    amount = rng.normal(100, 25, rows)
+    amount[rng.random(rows) < 0.01] = np.nan
+    return pd.DataFrame({
+        "order_id": np.arange(rows),
+        "region": rng.choice(["North", "South", "East", "West"], rows),
+        "product": rng.choice([f"SKU-{i}" for i in range(500)], rows),
+        "quantity": rng.integers(1, 20, rows),
+        "amount": amount,
+        "returned": rng.random(rows) < 0.05,
+    })
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {time.perf_counter() - start:8.2f}s")
+    return result
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    run_legacy = "--legacy" in sys.argv
+
+    df = timed(f"build {rows:,} rows", lambda: make_frame(rows))
+    if run_legacy:
+        timed("legacy summarize", lambda: legacy_summarize(df))
+    summary = timed("summarize_dataframe", lambda: summarize_dataframe(df))
+    timed("cached summary (miss)", lambda: get_cached_summary("bench", df, 1))
+    timed("cached summary (hit)", lambda: get_cached_summary("bench", df, 1))
+
+    import json
+    print(f"json.dumps(indent=2) size: {len(json.dumps(summary, indent=2, default=str)):,} chars")
+    print(f"compact encoding size:     {len(encode_summary_for_prompt(summary)):,} chars")
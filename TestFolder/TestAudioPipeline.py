@@ -0,0 +1,87 @@
+import sys
+import tempfile
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import audio_pipeline
+from audio_pipeline import transcribe_file
+
+RATE = 16_000
+
+
+def write_wav(path: Path, samples: np.ndarray, width: int = 2, rate: int = RATE) -> None:
+    """Mono 16- or 24-bit PCM WAV of float samples in [-1, 1]."""
+    scaled = (np.clip(samples, -1, 1) * (2 ** (8 * width - 1) - 1)).astype("<i4")
+    raw = scaled.view(np.uint8).reshape(-1, 4)[:, :width].tobytes()
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(width)
+        wav.setframerate(rate)
+        wav.writeframes(raw)
+
+
+def talk_and_pause(seconds_each: float, parts: int) -> np.ndarray:
+    """Alternating tone bursts and silences, so there are pauses to split at."""
+    t = np.arange(int(seconds_each * RATE)) / RATE
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t)
+    return np.concatenate([tone if i % 2 == 0 else np.zeros_like(tone) for i in range(parts)])
+
+
+class StandIn:
+    """Local transcription function: one segment per chunk, failing chosen calls once."""
+
+    def __init__(self, fail_names=()):
+        self.calls = []
+        self.fail_names = set(fail_names)
+
+    def __call__(self, audio: bytes, name: str):
+        self.calls.append(name)
+        if name in self.fail_names:
+            self.fail_names.discard(name)
+            raise RuntimeError("provider unavailable")
+        return {"text": f"<{name}>", "segments": [{"start": 0.0, "end": 1.0, "text": name}]}
+
+
+def test_chunks_are_stitched_with_offsets_and_failures_retried():
+    audio_pipeline.RETRY_BACKOFF_SECONDS = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "talk.wav"
+        write_wav(path, talk_and_pause(4, 6))  # 24 seconds
+        stand_in = StandIn(fail_names={"talk_part001.wav"})
+        result = transcribe_file(str(path), stand_in, max_chunk_seconds=8, codec="wav")
+    assert result["chunks"] >= 3, result
+    assert result["failed_chunks"] == []
+    assert stand_in.calls.count("talk_part001.wav") == 2  # retried once, alone
+    assert len(stand_in.calls) == result["chunks"] + 1
+    starts = [segment["start"] for segment in result["segments"]]
+    assert starts == sorted(starts) and starts[0] == 0.0 and starts[-1] > 8
+    assert result["text"].startswith("<talk_part000.wav>")
+
+
+def test_24_bit_wav_is_decoded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "deep.wav"
+        signal = talk_and_pause(1, 2)
+        write_wav(path, signal, width=3)
+        decoded = audio_pipeline._read_wav(str(path))[0]
+    assert np.abs(decoded - signal).max() < 1e-4
+
+
+def test_undecodable_wav_is_sent_whole():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "odd.wav"
+        path.write_bytes(b"RIFF\x00\x00\x00\x00WAVEnot really a wav file")
+        stand_in = StandIn()
+        result = transcribe_file(str(path), stand_in)
+        assert stand_in.calls == ["odd.wav"]
+        assert result["chunks"] == 1 and result["bytes_sent"] == path.stat().st_size
+
+
+if __name__ == "__main__":
+    test_chunks_are_stitched_with_offsets_and_failures_retried()
+    test_24_bit_wav_is_decoded()
+    test_undecodable_wav_is_sent_whole()
+    print("OK")
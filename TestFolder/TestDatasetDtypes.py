@@ -0,0 +1,52 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import dataset_store
+from dataset_store import load_table, optimize_dtypes
+
+
+def check_integer_arithmetic(df: pd.DataFrame) -> None:
+    """Subtraction, multiplication and addition must not wrap around on optimized integer columns."""
+    assert df["q"].dtype.kind == "i" and df["r"].dtype.kind == "i", df.dtypes
+    assert (df["q"] - df["r"]).tolist() == [-5, 5, 100]
+    assert (df["q"] * 2).tolist() == [10, 20, 400]
+    assert (df["q"] + df["r"]).tolist() == [15, 15, 300]
+    assert (df["q"] * df["q"] * df["q"]).tolist() == [125, 1000, 8_000_000]
+
+
+def test_optimized_integers_do_not_wrap():
+    check_integer_arithmetic(optimize_dtypes(pd.DataFrame({"q": [5, 10, 200], "r": [10, 5, 100]})))
+
+
+def test_cached_integers_do_not_wrap():
+    original_cache_dir = dataset_store.CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_store.CACHE_DIR = Path(tmp) / "cache"
+        try:
+            csv = Path(tmp) / "data.csv"
+            csv.write_text("q,r\n5,10\n10,5\n200,100\n")
+            check_integer_arithmetic(load_table(str(csv)))  # parsed and cached
+            check_integer_arithmetic(load_table(str(csv)))  # read back from the columnar cache
+        finally:
+            dataset_store.CACHE_DIR = original_cache_dir
+
+
+def test_float_sums_keep_double_precision():
+    """Integer-valued floats fit in float32, but their sums and products must not be computed in it."""
+    values = pd.Series((np.arange(2_000_000) % 100_003).astype(np.float64))
+    optimized = optimize_dtypes(pd.DataFrame({"x": values}))["x"]
+    assert optimized.dtype == np.float64, optimized.dtype
+    assert optimized.sum() == values.sum()
+    assert (optimized * optimized).sum() == (values * values).sum()
+
+
+if __name__ == "__main__":
+    test_optimized_integers_do_not_wrap()
+    test_cached_integers_do_not_wrap()
+    test_float_sums_keep_double_precision()
+    print("OK")
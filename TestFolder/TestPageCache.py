@@ -0,0 +1,127 @@
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+os.environ.setdefault("GROQ_API_KEY", "test")  # Scraper imports the summarizer client
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import page_cache
+import scrape_scheduler
+from Scraper import _fetch_html
+
+PAGES = {
+    "/fresh": ("max-age=300", None),
+    "/stale": ("max-age=0", '"v1"'),
+}
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Local stand-in origin: counts requests and honours If-None-Match."""
+
+    requests = []
+
+    def do_GET(self):
+        StandIn.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/old":
+            self.send_response(301)
+            self.send_header("Location", "/fresh")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/big"):
+            cache_control, etag = "max-age=300", None
+        else:
+            cache_control, etag = PAGES[self.path]
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+            return
+        body = f"<html><body><p>page {self.path}</p>{'x' * 2000 if self.path.startswith('/big') else ''}</body></html>"
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", cache_control)
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_with_cache(test):
+    """Run test(base_url) against the stand-in server with an empty cache in a temp directory."""
+    saved = (page_cache.CACHE_DIR, page_cache.DB_PATH, page_cache._initialized, page_cache.MAX_BYTES,
+             dict(page_cache._stats), scrape_scheduler.PER_DOMAIN_INTERVAL_SECONDS)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StandIn.requests = []
+    with tempfile.TemporaryDirectory() as tmp:
+        page_cache.CACHE_DIR = Path(tmp)
+        page_cache.DB_PATH = Path(tmp) / "pages.db"
+        page_cache._initialized = False
+        scrape_scheduler.PER_DOMAIN_INTERVAL_SECONDS = 0
+        try:
+            test(f"http://127.0.0.1:{server.server_port}")
+        finally:
+            server.shutdown()
+            server.server_close()
+            (page_cache.CACHE_DIR, page_cache.DB_PATH, page_cache._initialized, page_cache.MAX_BYTES,
+             stats, scrape_scheduler.PER_DOMAIN_INTERVAL_SECONDS) = saved
+            page_cache._stats.update(stats)
+
+
+def test_fresh_page_is_served_without_a_request():
+    def test(base):
+        first = _fetch_html(base + "/fresh")
+        second = _fetch_html(base + "/fresh")
+        assert not first["cached"] and second["cached"]
+        assert second["html"] == first["html"]
+        assert StandIn.requests == [("/fresh", None)]
+    run_with_cache(test)
+
+
+def test_stale_page_is_revalidated_with_its_etag():
+    def test(base):
+        first = _fetch_html(base + "/stale")
+        revalidated_before = page_cache.cache_stats()["revalidated"]
+        second = _fetch_html(base + "/stale")
+        assert second["cached"] and second["html"] == first["html"]
+        assert StandIn.requests == [("/stale", None), ("/stale", '"v1"')]
+        assert page_cache.cache_stats()["revalidated"] == revalidated_before + 1
+    run_with_cache(test)
+
+
+def test_redirected_url_is_served_from_its_target():
+    def test(base):
+        _fetch_html(base + "/old")
+        StandIn.requests = []
+        again = _fetch_html(base + "/old")
+        assert again["cached"] and again["final_url"] == base + "/fresh"
+        assert StandIn.requests == []
+    run_with_cache(test)
+
+
+def test_least_recently_used_page_is_evicted():
+    def test(base):
+        page_cache.MAX_BYTES = 5000
+        for path in ("/big1", "/big2", "/big3"):
+            _fetch_html(base + path)
+        assert page_cache.lookup(base + "/big1") is None
+        assert page_cache.lookup(base + "/big3") is not None
+        assert page_cache.cache_stats()["evicted"] >= 1
+    run_with_cache(test)
+
+
+if __name__ == "__main__":
+    test_fresh_page_is_served_without_a_request()
+    test_stale_page_is_revalidated_with_its_etag()
+    test_redirected_url_is_served_from_its_target()
+    test_least_recently_used_page_is_evicted()
+    print("OK")
@@ -0,0 +1,69 @@
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("GROQ_API_KEY", "test")  # Scraper imports the summarizer client
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from bs4 import BeautifulSoup
+
+import Scraper
+from Scraper import _clean_text, _parse_page
+
+# Inputs where libxml2 and html.parser build different trees
+PAGES = {
+    "after_html": "<html><body><p>one</p></body></html><p>after html</p>",
+    "after_body": "<html><body><p>one</p></body><p>after body</p></html>",
+    "cdata": "<html><body><p>a <![CDATA[cdata text]]> b</p></body></html>",
+    "nul": "<html><body><p>a\x00b</p><p>c</p></body></html>",
+    "comment": "<p>x<!-- hidden -->y</p><script>var s = 1;</script>",
+    "textarea": "<textarea>raw <b>x</b></textarea><p>after</p>",
+    "fragment": "<p>one</p><div>two</div>",
+    "empty": "   ",
+}
+
+
+def baseline_text(html):
+    """The text scrape_data returned before parser backends existed."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "iframe", "template"]):
+        tag.decompose()
+    return _clean_text(soup.get_text(" ", strip=True))
+
+
+def test_default_parser_matches_baseline():
+    assert Scraper._parser == (os.getenv("SCRAPER_PARSER") or "html.parser")
+    for name, html in PAGES.items():
+        page = _parse_page("http://test/" + name, "http://test/" + name, html)
+        assert page.text == baseline_text(html), name
+
+
+def test_lxml_matches_baseline():
+    if "lxml" not in Scraper.available_parsers():
+        print("lxml not installed; skipped")
+        return
+    for name, html in PAGES.items():
+        page = _parse_page("http://test/" + name, "http://test/" + name, html, parser="lxml")
+        if name == "nul":
+            # libxml2 replaces NUL bytes with U+FFFD
+            assert page.text == baseline_text(html).replace("\x00", "�"), name
+        else:
+            assert page.text == baseline_text(html), name
+
+
+def test_table_numbers_keep_identifiers_as_text():
+    html = ("<table><tr><th>id</th><th>population</th><th>pair</th><th>share</th></tr>"
+            "<tr><td>007</td><td>1,234,567</td><td>10 20</td><td>0.5</td></tr>"
+            "<tr><td>12</td><td>89</td><td>3</td><td></td></tr></table>")
+    for parser in Scraper.available_parsers():
+        frame = _parse_page("http://test/table", "http://test/table", html, parser=parser).frames[0]
+        assert list(frame["id"]) == ["007", "12"], parser
+        assert list(frame["pair"]) == ["10 20", "3"], parser
+        assert list(frame["population"]) == [1234567, 89], parser
+        assert frame["share"][0] == 0.5 and frame["share"].isna()[1], parser
+
+
+if __name__ == "__main__":
+    test_default_parser_matches_baseline()
+    test_lxml_matches_baseline()
+    test_table_numbers_keep_identifiers_as_text()
+    print("OK")
@@ -4,16 +4,32 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 import os
 import json
 import atexit
+import asyncio
+import shutil
+import time
 
 # --- Project imports ---
 from graph import build_graph
 from langchain_core.messages import HumanMessage, SystemMessage
-from session_context import set_session_id, get_session_id
+from session_context import set_session_id, get_session_id, set_progress_listener, clear_progress_listener
 from prompts import SYSTEM_PROMPT
+from query_planner import planner_stats
+from data_profiler import encode_summary_for_prompt
+from dataset_store import CACHE_DIR as DATASET_CACHE_DIR
+from dataset_registry import registry_stats, drop_session as drop_session_datasets
+from transcript_store import store_stats as transcript_store_stats
+from speech_jobs import job_stats as speech_job_stats
+from image_pipeline import image_stats
+from http_client import pool_stats as http_pool_stats
+from browser_pool import pool_stats as browser_pool_stats
+from page_cache import cache_stats as page_cache_stats
+from parsed_pages import page_stats as parsed_page_stats, drop_session as drop_session_pages
+from scrape_scheduler import scheduler_stats as scrape_scheduler_stats
+from utilities import summary_stats
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {
@@ -75,6 +91,11 @@ def cleanup_files():
         except Exception as e:
             print(f"   Error deleting folder {dir_path}: {e}")
 
+    # Columnar copies of the uploaded datasets are useless once the sources are gone
+    if DATASET_CACHE_DIR.exists():
+        shutil.rmtree(DATASET_CACHE_DIR, ignore_errors=True)
+        print(f"   Deleted dataset cache: {DATASET_CACHE_DIR}")
+
     uploaded_files.clear()
     print("✅ Cleanup complete\n")
 
@@ -83,6 +104,48 @@ atexit.register(cleanup_files)
 # --- Conversation tracking ---
 conversations = {}
 
+# --- Idle sessions ---
+# Conversations are kept, but a session idle this long releases its datasets (memory and
+# spill files); the files stay in Files/ and can be loaded again
+SESSION_IDLE_SECONDS = int(os.getenv("SESSION_IDLE_MINUTES", "120")) * 60
+SESSION_REAP_INTERVAL_SECONDS = 5 * 60
+
+session_last_seen: Dict[str, float] = {}
+
+
+def touch_session(session_id: str) -> None:
+    session_last_seen[session_id] = time.monotonic()
+
+
+def release_idle_sessions() -> List[str]:
+    """Release the datasets and parsed pages of sessions idle longer than SESSION_IDLE_SECONDS."""
+    now = time.monotonic()
+    idle = [sid for sid, seen in list(session_last_seen.items()) if now - seen > SESSION_IDLE_SECONDS]
+    for session_id in idle:
+        session_last_seen.pop(session_id, None)
+        drop_session_datasets(session_id)
+        drop_session_pages(session_id)
+        if session_id in conversations:
+            conversations[session_id].append(SystemMessage(
+                content="Datasets loaded earlier in this session were released after inactivity. "
+                        "Load them again with load_dataset(file_path) before analyzing them."))
+        print(f"🧹 Released idle session {session_id}")
+    return idle
+
+
+async def reap_idle_sessions():
+    while True:
+        await asyncio.sleep(SESSION_REAP_INTERVAL_SECONDS)
+        try:
+            release_idle_sessions()
+        except Exception as e:
+            print(f"❌ Releasing idle sessions failed: {e}")
+
+
+@app.on_event("startup")
+async def start_session_reaper():
+    asyncio.create_task(reap_idle_sessions())
+
 # --- React frontend paths ---
 frontend_dist = Path(__file__).parent / "frontend" / "dist"
 
@@ -99,7 +162,18 @@ app.mount("/plots", StaticFiles(directory=plots_dir), name="plots")
 async def health_check():
     return {
         "status": "healthy",
-        "uploaded_files_count": len(uploaded_files)
+        "uploaded_files_count": len(uploaded_files),
+        "query_planner": planner_stats(),
+        "datasets": registry_stats(),
+        "transcripts": transcript_store_stats(),
+        "speech_jobs": speech_job_stats(),
+        "images": image_stats(),
+        "http": http_pool_stats(),
+        "browser": browser_pool_stats(),
+        "page_cache": page_cache_stats(),
+        "parsed_pages": parsed_page_stats(),
+        "scrape_scheduler": scrape_scheduler_stats(),
+        "summarizer": summary_stats()
     }
 
 @app.get("/")
@@ -131,6 +205,7 @@ async def upload_files(files: List[UploadFile] = File(...), session_id: str = Fo
 
     session_dir = FILES_DIR / session_id
     session_dir.mkdir(exist_ok=True)
+    touch_session(session_id)
 
     for file in files:
         try:
@@ -178,7 +253,7 @@ async def upload_files(files: List[UploadFile] = File(...), session_id: str = Fo
             raise HTTPException(status_code=500, detail=f"Error uploading {file.filename}: {str(e)}")
 
         if dataset_summaries:
-            notification_content += "\nDataset Summaries:\n" + "\n".join([f"- {s['filename']}: {s['summary']}" for s in dataset_summaries])
+            notification_content += "\nDataset Summaries:\n" + "\n".join([f"- {s['filename']}:\n{encode_summary_for_prompt(s['summary'])}" for s in dataset_summaries])
 
         # Notify agent
         if session_id not in conversations:
@@ -206,6 +281,12 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str = "default"):
         
     print(f"🔌 WebSocket connected: {connection_id} (session: {session_id})")
 
+    # Tools run in worker threads; forward their progress events through the event loop
+    loop = asyncio.get_running_loop()
+    def forward_progress(event):
+        asyncio.run_coroutine_threadsafe(websocket.send_json(event), loop)
+    set_progress_listener(session_id, forward_progress)
+
     try:
         while True:
             data = await websocket.receive_text()
@@ -216,6 +297,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str = "default"):
                 continue
 
             # Append user message to session history
+            touch_session(session_id)
             conversations[session_id].append(HumanMessage(content=user_message))
 
             # Acknowledge user message
@@ -240,6 +322,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str = "default"):
                 # Update conversation history with agent response
                 if final_state and "messages" in final_state:
                     conversations[session_id] = final_state["messages"]
+                touch_session(session_id)
 
                 # Send done message
                 await websocket.send_json({"type": "agent_message", "content": "", "done": True})
@@ -249,11 +332,13 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str = "default"):
 
     except WebSocketDisconnect:
         print(f"🔌 WebSocket disconnected: {connection_id}")
+        clear_progress_listener(session_id, forward_progress)
         # data = await websocket.receive_text()
         # Do NOT remove conversation history on disconnect to allow persistence
         pass
     except Exception as e:
         print(f"❌ WebSocket error: {str(e)}")
+        clear_progress_listener(session_id, forward_progress)
         try:
             await websocket.send_json({"type": "error", "content": f"Connection error: {str(e)}"})
         except:
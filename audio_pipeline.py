@@ -0,0 +1,345 @@
+# audio_pipeline.py
+import io
+import shutil
+import subprocess
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Decoding anything other than WAV needs the ffmpeg binary
+_HAS_FFMPEG = shutil.which("ffmpeg") is not None
+
+# Speech models work at 16 kHz mono; chunks are decoded and re-encoded at this rate
+SAMPLE_RATE = 16_000
+
+# Chunks stay well under the provider's upload limit and are transcribed in parallel
+MAX_CHUNK_SECONDS = 300
+MAX_WORKERS = 4
+MAX_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 1.0
+
+# Silence detection works on the RMS energy of short frames
+FRAME_SECONDS = 0.03
+
+# Optional silence trimming: quieter than SILENCE_DB for at least MIN_SILENCE_SECONDS
+# is cut down to KEEP_SILENCE_SECONDS on each side
+SILENCE_DB = -40.0
+MIN_SILENCE_SECONDS = 1.0
+KEEP_SILENCE_SECONDS = 0.25
+
+# Codec chunks are uploaded in: "ogg" (Opus), "flac" or "wav"; ogg and flac need ffmpeg
+CHUNK_CODEC = "ogg"
+OPUS_BITRATE = "24k"
+
+# ffmpeg encoder, container and file extension per codec
+_CODECS = {
+    "ogg": (["-c:a", "libopus", "-b:a", OPUS_BITRATE, "-f", "ogg"], ".ogg"),
+    "flac": (["-c:a", "flac", "-f", "flac"], ".flac"),
+}
+
+# A transcription function takes (audio bytes, file name) and returns
+# {"text": str, "segments": [{"start": float, "end": float, "text": str}, ...]}
+TranscribeFn = Callable[[bytes, str], Dict[str, Any]]
+
+
+def can_decode(file_path: str) -> bool:
+    """Whether the file can be decoded to samples (and therefore split)."""
+    return _HAS_FFMPEG or Path(file_path).suffix.lower() == ".wav"
+
+
+def _read_wav(file_path: str) -> Tuple[np.ndarray, int]:
+    with wave.open(str(file_path), "rb") as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif width == 3:
+        # Little-endian 24-bit: widen to 32 bits by putting each sample in the top three bytes
+        padded = np.zeros((len(raw) // 3, 4), dtype=np.uint8)
+        padded[:, 1:] = np.frombuffer(raw[:len(raw) // 3 * 3], dtype=np.uint8).reshape(-1, 3)
+        samples = padded.view("<i4").ravel().astype(np.float32) / 2147483648
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width * 8} bits")
+    return samples.reshape(-1, channels).mean(axis=1), rate
+
+
+def _resample(samples: np.ndarray, rate: int, target: int) -> np.ndarray:
+    if rate == target or not len(samples):
+        return samples
+    duration = len(samples) / rate
+    positions = np.arange(int(duration * target)) * (rate / target)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def decode_audio(file_path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an audio file to mono float32 samples at ``sample_rate``.
+
+    Uses ffmpeg when it is installed; otherwise only WAV files can be decoded.
+    """
+    if _HAS_FFMPEG:
+        result = subprocess.run(
+            ["ffmpeg", "-nostdin", "-v", "error", "-i", str(file_path),
+             "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"],
+            capture_output=True, check=True
+        )
+        return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768
+    if Path(file_path).suffix.lower() != ".wav":
+        raise RuntimeError("ffmpeg not installed; only .wav files can be decoded")
+    samples, rate = _read_wav(file_path)
+    return _resample(samples, rate, sample_rate)
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Encode mono float samples as 16-bit PCM WAV."""
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def encode_chunk(samples: np.ndarray, codec: str = CHUNK_CODEC,
+                 sample_rate: int = SAMPLE_RATE) -> Tuple[bytes, str]:
+    """
+    Encode mono samples for upload.
+
+    Returns:
+        (encoded bytes, file extension); falls back to WAV without ffmpeg or if encoding fails
+    """
+    if codec in _CODECS and _HAS_FFMPEG:
+        args, extension = _CODECS[codec]
+        pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+        try:
+            result = subprocess.run(
+                ["ffmpeg", "-v", "error", "-f", "s16le", "-ar", str(sample_rate), "-ac", "1",
+                 "-i", "-", *args, "-"],
+                input=pcm, capture_output=True, check=True
+            )
+            return result.stdout, extension
+        except subprocess.CalledProcessError as e:
+            print(f"DEBUG: ffmpeg could not encode {codec} ({e.stderr.decode(errors='replace').strip()}), using wav")
+    return encode_wav(samples, sample_rate), ".wav"
+
+
+def _frame_energy(samples: np.ndarray, frame: int) -> np.ndarray:
+    usable = len(samples) // frame * frame
+    return np.sqrt(np.mean(samples[:usable].reshape(-1, frame) ** 2, axis=1))
+
+
+def remove_silence(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    threshold_db: float = SILENCE_DB,
+    min_silence_seconds: float = MIN_SILENCE_SECONDS,
+    keep_seconds: float = KEEP_SILENCE_SECONDS
+) -> Tuple[np.ndarray, List[Tuple[float, float]]]:
+    """
+    Cut long silences down to short pauses.
+
+    Returns:
+        (trimmed samples, kept spans as (start, end) seconds of the original audio),
+        so timestamps in the trimmed audio can be mapped back (see _original_time)
+    """
+    frame = max(int(FRAME_SECONDS * sample_rate), 1)
+    energy = _frame_energy(samples, frame)
+    silent = 20 * np.log10(np.maximum(energy, 1e-10)) < threshold_db
+
+    # Runs of silent frames: starts where silent begins, ends where it stops
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    run_starts, run_ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    min_frames, keep_frames = int(min_silence_seconds / FRAME_SECONDS), int(keep_seconds / FRAME_SECONDS)
+
+    spans, position = [], 0
+    for run_start, run_end in zip(run_starts, run_ends):
+        if run_end - run_start < max(min_frames, 2 * keep_frames + 1):
+            continue
+        cut_start, cut_end = (run_start + keep_frames) * frame, (run_end - keep_frames) * frame
+        spans.append((position, cut_start))
+        position = cut_end
+    spans.append((position, len(samples)))
+    spans = [(start, end) for start, end in spans if end > start]
+
+    trimmed = np.concatenate([samples[start:end] for start, end in spans]) if spans else samples[:0]
+    return trimmed, [(float(start / sample_rate), float(end / sample_rate)) for start, end in spans]
+
+
+def _original_time(seconds: float, spans: Optional[List[Tuple[float, float]]]) -> float:
+    """Map a time in silence-trimmed audio back to the original recording."""
+    if not spans:
+        return seconds
+    lengths = np.array([end - start for start, end in spans])
+    trimmed_starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    i = max(int(np.searchsorted(trimmed_starts, seconds, side="right")) - 1, 0)
+    return float(spans[i][0] + min(seconds - trimmed_starts[i], lengths[i]))
+
+
+def split_at_silence(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                     max_chunk_seconds: float = MAX_CHUNK_SECONDS) -> List[Tuple[int, int]]:
+    """
+    Split audio into chunks of at most ``max_chunk_seconds``, cutting at silence.
+
+    Each cut is placed at the quietest frame in the second half of the allowed
+    window, so words are not split unless the speaker never pauses.
+
+    Returns:
+        (start, end) sample offsets covering the whole signal
+    """
+    max_len = int(max_chunk_seconds * sample_rate)
+    if len(samples) <= max_len:
+        return [(0, len(samples))]
+
+    frame = max(int(FRAME_SECONDS * sample_rate), 1)
+    energy = _frame_energy(samples, frame)
+
+    chunks = []
+    start = 0
+    while len(samples) - start > max_len:
+        lo, hi = (start + max_len // 2) // frame, (start + max_len) // frame
+        window = energy[lo:hi]
+        cut = (lo + int(np.argmin(window))) * frame if len(window) else start + max_len
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, len(samples)))
+    return chunks
+
+
+def _transcribe_chunks(chunks: List[Dict[str, Any]], transcribe_fn: TranscribeFn,
+                       max_workers: int, max_retries: int) -> None:
+    """Transcribe chunks concurrently, retrying only the ones that failed."""
+    pending = chunks
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            print(f"DEBUG: Retrying {len(pending)} failed chunk(s), attempt {attempt + 1}")
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            futures = [(chunk, pool.submit(transcribe_fn, chunk["audio"], chunk["name"])) for chunk in pending]
+            for chunk, future in futures:
+                try:
+                    chunk["result"] = future.result()
+                    chunk["error"] = None
+                except Exception as e:
+                    chunk["error"] = str(e)
+        pending = [chunk for chunk in pending if chunk["error"]]
+        if not pending:
+            return
+
+
+def _format_time(seconds: float) -> str:
+    return f"{int(seconds // 60)}:{int(seconds % 60):02d}"
+
+
+def transcribe_file(
+    file_path: str,
+    transcribe_fn: TranscribeFn,
+    max_chunk_seconds: float = MAX_CHUNK_SECONDS,
+    max_workers: int = MAX_WORKERS,
+    max_retries: int = MAX_RETRIES,
+    codec: str = CHUNK_CODEC,
+    trim_silence: bool = False,
+    preprocess: bool = True
+) -> Dict[str, Any]:
+    """
+    Transcribe an audio file of any length.
+
+    The audio is decoded to 16 kHz mono (all a speech model uses), split at
+    silences into chunks of at most ``max_chunk_seconds`` and each chunk is
+    re-encoded with a compact codec. The chunks are transcribed concurrently (at
+    most ``max_workers`` at a time) and the results are stitched back together
+    with segment timestamps shifted by each chunk's offset. Failed chunks are
+    retried on their own; chunks that still fail are marked in the text instead
+    of failing the whole file.
+
+    Args:
+        file_path: Path to the audio file
+        transcribe_fn: Function that transcribes one chunk (see TranscribeFn);
+            pass a local stand-in to run the pipeline without a provider
+        max_chunk_seconds: Upper bound on chunk length
+        max_workers: Maximum concurrent transcription requests
+        max_retries: Extra attempts for chunks that fail
+        codec: Upload codec for chunks: "ogg" (Opus), "flac" or "wav"
+        trim_silence: Cut long silences before upload; timestamps still refer
+            to the original recording
+        preprocess: If False, upload the original file as-is in one request
+
+    Returns:
+        Dict containing:
+        - text: The stitched transcript
+        - segments: Timestamped segments relative to the start of the file
+        - chunks: Number of chunks transcribed
+        - failed_chunks: (start, end) seconds of chunks that could not be transcribed
+        - duration: Audio length in seconds (None if the file was not decoded)
+        - bytes_sent: Total audio bytes uploaded
+    """
+    name = Path(file_path).name
+    spans = None
+    samples = None
+    if preprocess and can_decode(file_path):
+        try:
+            samples = decode_audio(file_path)
+        except Exception as e:
+            # e.g. a WAV encoding the standard library cannot read (float samples)
+            print(f"DEBUG: Could not decode {name} locally ({e}), transcribing it whole")
+    elif preprocess:
+        print(f"DEBUG: Cannot decode {name} locally, transcribing it whole")
+    if samples is None:
+        # Without a decoder the file goes out as-is, in one request
+        chunks = [{"name": name, "audio": Path(file_path).read_bytes(), "offset": 0.0, "end": None}]
+        duration = None
+    else:
+        duration = len(samples) / SAMPLE_RATE
+        if trim_silence:
+            samples, spans = remove_silence(samples)
+            print(f"DEBUG: Trimmed silence from {name}: {duration:.0f}s -> {len(samples) / SAMPLE_RATE:.0f}s")
+        bounds = split_at_silence(samples, SAMPLE_RATE, max_chunk_seconds)
+        stem = Path(file_path).stem
+        chunks = []
+        for i, (start, end) in enumerate(bounds):
+            audio, extension = encode_chunk(samples[start:end], codec)
+            chunks.append({
+                "name": f"{stem}_part{i:03d}{extension}",
+                "audio": audio,
+                "offset": start / SAMPLE_RATE,
+                "end": end / SAMPLE_RATE,
+            })
+        print(f"DEBUG: Split {name} ({duration:.0f}s) into {len(chunks)} chunk(s)")
+
+    _transcribe_chunks(chunks, transcribe_fn, max_workers, max_retries)
+
+    texts, segments, failed = [], [], []
+    for chunk in chunks:
+        if chunk["error"]:
+            start = _original_time(chunk["offset"], spans)
+            end = _original_time(chunk["end"], spans) if chunk["end"] is not None else 0.0
+            failed.append((start, end))
+            texts.append(f"[untranscribed {_format_time(start)}-{_format_time(end)}]")
+            print(f"DEBUG: Chunk {chunk['name']} failed: {chunk['error']}")
+            continue
+        result = chunk["result"]
+        texts.append(result.get("text", "").strip())
+        for segment in result.get("segments") or []:
+            segments.append({
+                "start": round(_original_time(segment["start"] + chunk["offset"], spans), 2),
+                "end": round(_original_time(segment["end"] + chunk["offset"], spans), 2),
+                "text": segment["text"].strip(),
+            })
+
+    return {
+        "text": " ".join(t for t in texts if t),
+        "segments": segments,
+        "chunks": len(chunks),
+        "failed_chunks": failed,
+        "duration": duration,
+        "bytes_sent": sum(len(chunk["audio"]) for chunk in chunks),
+    }
@@ -0,0 +1,202 @@
+# browser_pool.py
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional
+
+# Optional: JS rendering needs Playwright (pip install playwright && playwright install firefox)
+try:
+    from playwright.sync_api import sync_playwright
+    _HAS_PLAYWRIGHT = True
+except Exception:
+    sync_playwright = None
+    _HAS_PLAYWRIGHT = False
+
+# Playwright's sync API is bound to the thread that started it, so each worker
+# thread owns one browser and one context and renders pages one at a time
+WORKERS = 2
+
+# A context is replaced after this many pages to shed accumulated memory, cookies and caches
+PAGES_PER_CONTEXT = 50
+
+# Hard limit for one page: navigation plus waiting for the DOM
+PAGE_DEADLINE_SECONDS = 20
+
+# Requests for these resource types are aborted; they do not change the DOM we read
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+USER_AGENT = "Mozilla/5.0 (compatible; MyAgent/1.0; +https://example.org/bot)"
+
+_jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+_workers: list = []
+_lock = threading.Lock()
+_stats = {"pages": 0, "errors": 0, "timeouts": 0, "blocked_requests": 0,
+          "contexts_created": 0, "browsers_launched": 0}
+
+# Why Playwright could not be started in a worker (e.g. browsers not installed)
+_start_error: Optional[str] = None
+
+
+def is_available() -> bool:
+    return _HAS_PLAYWRIGHT and _start_error is None
+
+
+def _count(key: str) -> None:
+    with _lock:
+        _stats[key] += 1
+
+
+def _fail_queued(error: str) -> None:
+    """Answer every queued page with an error instead of leaving its caller waiting."""
+    while True:
+        try:
+            job = _jobs.get_nowait()
+        except queue.Empty:
+            return
+        if job is not None and job[2].set_running_or_notify_cancel():
+            job[2].set_result({"error": error})
+
+
+def _block_resources(route) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        _count("blocked_requests")
+        route.abort()
+    else:
+        route.continue_()
+
+
+class _Worker(threading.Thread):
+    """Owns a browser and a recycled context; renders queued pages until told to stop."""
+
+    def __init__(self, index: int):
+        super().__init__(name=f"browser-{index}", daemon=True)
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages_in_context = 0
+
+    def _ensure_context(self) -> None:
+        if self.browser is None or not self.browser.is_connected():
+            self.browser = self.playwright.firefox.launch(headless=True)
+            self.context = None
+            _count("browsers_launched")
+        if self.context is not None and self.pages_in_context >= PAGES_PER_CONTEXT:
+            self.context.close()
+            self.context = None
+        if self.context is None:
+            self.context = self.browser.new_context(user_agent=USER_AGENT, java_script_enabled=True)
+            self.context.route("**/*", _block_resources)
+            self.pages_in_context = 0
+            _count("contexts_created")
+
+    def _render(self, url: str, deadline: float) -> Dict[str, Any]:
+        self._ensure_context()
+        page = self.context.new_page()
+        self.pages_in_context += 1
+        try:
+            remaining_ms = max(deadline - time.monotonic(), 0.1) * 1000
+            page.set_default_timeout(remaining_ms)
+            page.goto(url, wait_until="domcontentloaded", timeout=remaining_ms)
+            return {"html": page.content(), "final_url": page.url}
+        finally:
+            page.close()
+
+    def run(self) -> None:
+        global _start_error
+        try:
+            self.playwright = sync_playwright().start()
+        except Exception as e:
+            print(f"DEBUG: Could not start Playwright ({e}); JS rendering disabled")
+            with _lock:
+                _start_error = str(e)
+                _fail_queued(f"Browser could not be started: {e}")
+            return
+        try:
+            while True:
+                job = _jobs.get()
+                if job is None:
+                    break
+                url, deadline, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if time.monotonic() >= deadline:
+                    future.set_result({"error": f"Timed out waiting for a browser to render {url}"})
+                    continue
+                try:
+                    future.set_result(self._render(url, deadline))
+                    _count("pages")
+                except Exception as e:
+                    _count("errors")
+                    future.set_result({"error": str(e)})
+                    # A crashed browser or context is rebuilt on the next page
+                    if self.browser is not None and not self.browser.is_connected():
+                        self.browser = self.context = None
+        finally:
+            for closable in (self.context, self.browser):
+                try:
+                    if closable is not None:
+                        closable.close()
+                except Exception:
+                    pass
+            self.playwright.stop()
+
+
+def _start_workers() -> None:
+    with _lock:
+        if not _workers:
+            for i in range(WORKERS):
+                worker = _Worker(i)
+                worker.start()
+                _workers.append(worker)
+            atexit.register(shutdown)
+
+
+def render(url: str, timeout: float = PAGE_DEADLINE_SECONDS) -> Dict[str, Any]:
+    """
+    Render a page with JavaScript in a pooled browser context.
+
+    Browsers are started once and reused; images, fonts and media are not
+    downloaded. ``timeout`` bounds the whole call, including waiting for a free
+    browser.
+
+    Returns:
+        Dict with html and final_url, or error
+    """
+    if not _HAS_PLAYWRIGHT:
+        return {"error": "Playwright not installed; cannot render JS."}
+    _start_workers()
+    deadline = time.monotonic() + timeout
+    future: Future = Future()
+    with _lock:
+        if _start_error is not None:
+            return {"error": f"Browser could not be started: {_start_error}"}
+        _jobs.put((url, deadline, future))
+    try:
+        # A little grace so the worker can report its own timeout error
+        return future.result(timeout=timeout + 2)
+    except FutureTimeout:
+        future.cancel()
+        _count("timeouts")
+        return {"error": f"Rendering {url} took longer than {timeout}s"}
+
+
+def shutdown() -> None:
+    """Stop the workers and close their browsers."""
+    with _lock:
+        workers = list(_workers)
+        _workers.clear()
+    # Joined without the lock: workers finishing a page still update _stats
+    for _ in workers:
+        _jobs.put(None)
+    for worker in workers:
+        worker.join(timeout=5)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Pages rendered, failures and how often browsers and contexts were (re)created."""
+    with _lock:
+        stats = dict(_stats)
+    return {**stats, "workers": len(_workers), "queued": _jobs.qsize(), "available": is_available(),
+            "start_error": _start_error}
@@ -0,0 +1,233 @@
+# data_profiler.py
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Above this many rows, distinct counts, duplicates and examples come from a sample
+SUMMARY_SAMPLE_THRESHOLD = 1_000_000
+SUMMARY_SAMPLE_ROWS = 200_000
+
+# Rows scanned per column when collecting example values
+EXAMPLE_SCAN_ROWS = 1_000
+
+# Cached summaries: cache key -> (fingerprint, summary), least recently used first
+SUMMARY_CACHE_SIZE = 128
+
+_summary_cache: "OrderedDict[Hashable, Tuple[tuple, Dict[str, Any]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _infer_semantic_type(values: list, col_name: str) -> str:
+    lower_vals = {str(v).lower() for v in values}
+
+    if lower_vals <= {"male", "female"}:
+        return "gender"
+    if lower_vals <= {"yes", "no"}:
+        return "boolean"
+    if "date" in col_name.lower():
+        return "date"
+    if "id" in col_name.lower():
+        return "identifier"
+    if "location" in col_name.lower():
+        return "location"
+
+    return "category"
+
+
+def _infer_role(series: pd.Series, unique_count: int, total_count: int, categorical_threshold: float) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+
+    if pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+
+    if unique_count <= categorical_threshold * total_count:
+        return "categorical"
+
+    return "text"
+
+
+def _example_values(series: pd.Series, sample_values: int) -> list:
+    non_null = series.head(EXAMPLE_SCAN_ROWS).dropna()
+    if non_null.empty:
+        non_null = series.dropna().head(EXAMPLE_SCAN_ROWS)
+    return [
+        v.item() if isinstance(v, np.generic) else v
+        for v in non_null.unique()[:sample_values]
+    ]
+
+
+def summarize_dataframe(
+    df: pd.DataFrame,
+    sample_values: int = 5,
+    categorical_threshold: float = 0.05,
+    sample_threshold: int = SUMMARY_SAMPLE_THRESHOLD
+) -> Dict[str, Any]:
+    """
+    Generate a robust, LLM-friendly summary of a pandas DataFrame.
+
+    Null counts are exact. Above ``sample_threshold`` rows, distinct counts,
+    duplicate rows, example values and memory usage are computed on a fixed
+    random sample and the summary is flagged with ``sampled``.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input dataframe
+    sample_values : int
+        Number of unique example values to capture per column
+    categorical_threshold : float
+        Max ratio of unique values to rows for categorical inference
+    sample_threshold : int
+        Row count above which statistics are computed on a sample
+
+    Returns
+    -------
+    Dict[str, Any]
+        JSON-serializable dataset summary
+    """
+    print("DEBUG: Inside summarize_dataframe")
+    row_count = int(len(df))
+    sampled = row_count > sample_threshold
+    profile_df = df.sample(n=SUMMARY_SAMPLE_ROWS, random_state=0) if sampled else df
+    profile_rows = len(profile_df)
+
+    # One vectorized pass per statistic instead of per-column Python loops
+    missing = df.isna().sum()
+    unique = profile_df.nunique(dropna=True)
+    memory_bytes = profile_df.memory_usage(deep=True).sum()
+    if sampled:
+        memory_bytes = memory_bytes * row_count / profile_rows
+
+    summary = {
+        "row_count": row_count,
+        "column_count": int(len(df.columns)),
+        "memory_usage_mb": round(float(memory_bytes) / 1e6, 2),
+        "sampled": sampled,
+        "columns": []
+    }
+    if sampled:
+        summary["sample_rows"] = profile_rows
+        summary["duplicate_rows_in_sample"] = int(profile_df.duplicated().sum())
+    else:
+        summary["duplicate_rows"] = int(df.duplicated().sum())
+
+    for position, col in enumerate(df.columns):
+        series = profile_df.iloc[:, position]
+        unique_count = int(unique.iloc[position])
+        missing_count = int(missing.iloc[position])
+        example_values = _example_values(series, sample_values)
+        role = _infer_role(series, unique_count, profile_rows, categorical_threshold)
+
+        column_info = {
+            "name": col,
+            "dtype": str(series.dtype),
+            "role": role,
+            "missing_count": missing_count,
+            "missing_percent": round(missing_count / row_count * 100, 2) if row_count else 0.0,
+            "unique_count": unique_count,
+            "example_values": example_values
+        }
+
+        if role == "categorical":
+            column_info["semantic_type"] = _infer_semantic_type(example_values, str(col))
+
+        summary["columns"].append(column_info)
+
+    print(f"DEBUG: Summary generated with {len(summary['columns'])} columns")
+    return summary
+
+
+def dataset_fingerprint(df: pd.DataFrame, version: int = 0) -> tuple:
+    """Cheap identity for a dataset: its load version plus shape, columns and dtypes."""
+    return (version, df.shape, tuple(map(str, df.columns)), tuple(map(str, df.dtypes)))
+
+
+def get_cached_summary(key: Hashable, df: pd.DataFrame, version: int = 0) -> Dict[str, Any]:
+    """
+    Return the summary for ``df``, recomputing only when the dataset changed.
+
+    Args:
+        key: Cache key, e.g. the session id
+        df: The dataset to summarize
+        version: Load counter bumped every time a new file replaces the dataset
+
+    Returns:
+        The summary produced by summarize_dataframe
+    """
+    fingerprint = dataset_fingerprint(df, version)
+    with _cache_lock:
+        cached = _summary_cache.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            _summary_cache.move_to_end(key)
+            return cached[1]
+
+    summary = summarize_dataframe(df)
+    _cache_put(key, (fingerprint, summary))
+    return summary
+
+
+def _cache_put(key: Hashable, value: Tuple[tuple, Dict[str, Any]]) -> None:
+    with _cache_lock:
+        _summary_cache[key] = value
+        _summary_cache.move_to_end(key)
+        while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+
+
+def store_summary(key: Hashable, df: pd.DataFrame, version: int, summary: Dict[str, Any]) -> None:
+    """Cache a summary maintained elsewhere (e.g. merged sketches after an append) for ``df``."""
+    _cache_put(key, (dataset_fingerprint(df, version), summary))
+
+
+def invalidate_summary(key: Hashable) -> None:
+    """Drop the cached summary for ``key``."""
+    with _cache_lock:
+        _summary_cache.pop(key, None)
+
+
+def _format_value(value: Any, max_len: int = 24) -> str:
+    text = str(value).replace("|", "/").replace("\n", " ")
+    return text if len(text) <= max_len else text[:max_len - 1] + "…"
+
+
+def encode_summary_for_prompt(summary: Dict[str, Any]) -> str:
+    """
+    Encode a dataset summary as a compact, one-line-per-column schema for LLM prompts.
+
+    Example:
+        rows=1000 cols=2 mem=0.02MB dup=0
+        name|dtype|role|nulls|unique|examples
+        Region|object|categorical:location|0|3|N,S,E
+        Sales|float64|numeric|2|998|1.5,2.25,3.0
+    """
+    header = f"rows={summary['row_count']} cols={summary['column_count']} mem={summary['memory_usage_mb']}MB"
+    if summary.get("engine") == "duckdb":
+        header += " engine=duckdb unique=approximate"
+    elif summary.get("engine") == "sketch":
+        if summary["duplicate_rows_estimate"] is None:
+            header += f" dup=unknown(<{summary['duplicate_rows_margin']}) unique=approximate"
+        else:
+            header += f" dup~{summary['duplicate_rows_estimate']} unique=approximate"
+    elif summary.get("sampled"):
+        header += f" sampled={summary['sample_rows']} dup_in_sample={summary['duplicate_rows_in_sample']}"
+    else:
+        header += f" dup={summary.get('duplicate_rows', 0)}"
+
+    lines = [header, "name|dtype|role|nulls|unique|examples"]
+    for col in summary["columns"]:
+        role = col["role"]
+        if col.get("semantic_type"):
+            role += f":{col['semantic_type']}"
+        examples = ",".join(_format_value(v) for v in col["example_values"])
+        lines.append(
+            f"{_format_value(col['name'], 64)}|{col['dtype']}|{role}|"
+            f"{col['missing_count']}|{col['unique_count']}|{examples}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,328 @@
+# dataset_registry.py
+import copy
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from dataset_store import CACHE_DIR, _HAS_PYARROW, column_kinds, concat_frames, schemas_compatible
+from sketches import profile_frame
+
+# Memory budgets for in-memory frames (override with environment variables)
+GLOBAL_BUDGET_BYTES = int(os.getenv("DATASET_MEMORY_BUDGET_MB", "2048")) * 1024 * 1024
+SESSION_BUDGET_BYTES = int(os.getenv("SESSION_DATASET_BUDGET_MB", "1024")) * 1024 * 1024
+
+# Where evicted frames are written so they can be reloaded on demand
+SPILL_DIR = CACHE_DIR / "spill"
+
+# Registry: session_id -> {dataset name -> entry}
+# An entry holds the frame (None while spilled), its footprint and bookkeeping
+_registry: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+# Most recently loaded dataset per session
+_active: Dict[str, str] = {}
+
+_lock = threading.RLock()
+_stats = {"spills": 0, "reloads": 0}
+
+
+# Names generated code already uses for the primary dataset (the SQL view `data`)
+RESERVED_NAMES = {"data"}
+
+
+def dataset_name_for(file_path: str) -> str:
+    """Default dataset name for a file: its stem, reduced to identifier characters."""
+    name = re.sub(r"\W+", "_", Path(file_path).stem).strip("_").lower() or "dataset"
+    return f"{name}_file" if name in RESERVED_NAMES else name
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _spill_path(session_id: str, name: str) -> Path:
+    suffix = ".parquet" if _HAS_PYARROW else ".pkl"
+    return SPILL_DIR / re.sub(r"\W+", "_", session_id) / f"{name}{suffix}"
+
+
+def _spill(session_id: str, name: str, entry: Dict[str, Any]) -> None:
+    path = _spill_path(session_id, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if _HAS_PYARROW:
+        entry["df"].to_parquet(path)
+    else:
+        entry["df"].to_pickle(path)
+    entry["spill_path"] = path
+    entry["df"] = None
+    _stats["spills"] += 1
+    print(f"DEBUG: Spilled dataset '{name}' of session {session_id} ({entry['bytes'] / 1e6:.1f}MB)")
+
+
+def _reload(session_id: str, name: str, entry: Dict[str, Any]) -> None:
+    path = entry["spill_path"]
+    entry["df"] = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_pickle(path)
+    _stats["reloads"] += 1
+    print(f"DEBUG: Reloaded dataset '{name}' of session {session_id} from spill")
+
+
+def _resident(entries) -> int:
+    return sum(e["bytes"] for e in entries if e["df"] is not None)
+
+
+def _enforce_budgets(protect: tuple) -> None:
+    """Spill least recently used frames until the session and global budgets hold."""
+    session_id = protect[0]
+
+    def candidates(scope):
+        return sorted(
+            ((sid, name, e) for sid, name, e in scope
+             if e["df"] is not None and (sid, name) != protect),
+            key=lambda item: item[2]["last_used"]
+        )
+
+    session_scope = [(session_id, n, e) for n, e in _registry.get(session_id, {}).items()]
+    for sid, name, entry in candidates(session_scope):
+        if _resident(e for _, _, e in session_scope) <= SESSION_BUDGET_BYTES:
+            break
+        _spill(sid, name, entry)
+
+    global_scope = [(sid, n, e) for sid, entries in _registry.items() for n, e in entries.items()]
+    for sid, name, entry in candidates(global_scope):
+        if _resident(e for _, _, e in global_scope) <= GLOBAL_BUDGET_BYTES:
+            break
+        _spill(sid, name, entry)
+
+
+def _same_file(a: str, b: str) -> bool:
+    return str(Path(a).resolve()) == str(Path(b).resolve())
+
+
+def register_dataset(session_id: str, name: str, df: Optional[pd.DataFrame] = None,
+                     source_path: Optional[str] = None, engine: str = "pandas",
+                     schema: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Add or replace a dataset in a session and make it the active one.
+
+    Args:
+        session_id: Owning session
+        name: Dataset name used to address it later
+        df: The frame (None for datasets queried out of core)
+        source_path: File the dataset was loaded from
+        engine: "pandas" for in-memory frames, "duckdb" for out-of-core sources
+        schema: Column kinds (see dataset_store.column_kinds); derived from df when omitted
+
+    Returns:
+        The registry entry
+    """
+    with _lock:
+        entries = _registry.setdefault(session_id, {})
+        previous = entries.get(name)
+        entry = {
+            "name": name,
+            "df": df,
+            "engine": engine,
+            "source_path": source_path,
+            "parts": [source_path] if source_path else [],
+            "schema": schema if schema is not None else column_kinds(df) if df is not None else {},
+            "sketch": None,
+            "bytes": _frame_bytes(df) if df is not None else 0,
+            "version": previous["version"] + 1 if previous else 1,
+            "spill_path": None,
+            "last_used": time.monotonic(),
+        }
+        previous_active = _active.get(session_id)
+        entries[name] = entry
+        _active[session_id] = name
+        try:
+            if df is not None:
+                _enforce_budgets((session_id, name))
+        except Exception:
+            # e.g. a spill file could not be written: leave the session as it was
+            if previous:
+                entries[name] = previous
+            else:
+                del entries[name]
+            if previous_active is None:
+                _active.pop(session_id, None)
+            else:
+                _active[session_id] = previous_active
+            raise
+        if previous and previous["spill_path"]:
+            Path(previous["spill_path"]).unlink(missing_ok=True)
+        return entry
+
+
+def find_append_target(session_id: str, file_path: str, schema: Dict[str, str],
+                       name: Optional[str] = None) -> Optional[str]:
+    """
+    Find the dataset a new file should be appended to.
+
+    A file that is already part of a dataset is a re-upload and is never appended.
+    Otherwise the named dataset (or, without a name, the most recently used one)
+    whose columns match ``schema`` is the target.
+
+    Args:
+        session_id: Owning session
+        file_path: The uploaded file
+        schema: Column kinds of the uploaded file
+        name: Restrict the search to this dataset
+
+    Returns:
+        The dataset name, or None if the file should be loaded on its own
+    """
+    with _lock:
+        entries = _registry.get(session_id, {})
+        if any(_same_file(part, file_path) for e in entries.values() for part in e["parts"]):
+            return None
+        if name is not None:
+            candidates = [entries[name]] if name in entries else []
+        else:
+            candidates = sorted(entries.values(), key=lambda e: e["last_used"], reverse=True)
+        for entry in candidates:
+            if entry["schema"] and schemas_compatible(entry["schema"], schema):
+                return entry["name"]
+        return None
+
+
+def append_dataset(session_id: str, name: str, source_path: str,
+                   delta: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Append a file's rows to a registered dataset and make it the active one.
+
+    In-memory frames get the new rows concatenated and their DatasetSketch extended
+    with only those rows (the sketch of the existing rows is built once, on the
+    first append). Out-of-core datasets just gain another source file.
+
+    Args:
+        session_id: Owning session
+        name: Registered dataset to extend
+        source_path: File the new rows come from
+        delta: The new rows (None for out-of-core datasets)
+
+    Returns:
+        The updated registry entry
+    """
+    with _lock:
+        entry = get_entry(session_id, name)
+        if entry is None:
+            raise KeyError(f"No dataset named '{name}' in this session")
+        previous = {**entry, "parts": list(entry["parts"])}
+        previous_active = _active.get(session_id)
+        if delta is not None:
+            # Extend a copy, so the entry's sketch is untouched if the append fails
+            sketch = copy.deepcopy(entry["sketch"]) if entry["sketch"] is not None else profile_frame(entry["df"])
+            entry["sketch"] = profile_frame(delta, sketch=sketch)
+            entry["df"] = concat_frames(entry["df"], delta)
+            entry["bytes"] = _frame_bytes(entry["df"])
+            entry["spill_path"] = None
+        entry["parts"] = entry["parts"] + [source_path]
+        entry["version"] += 1
+        entry["last_used"] = time.monotonic()
+        _active[session_id] = name
+        try:
+            if delta is not None:
+                _enforce_budgets((session_id, name))
+        except Exception:
+            # e.g. a spill file could not be written: leave the dataset as it was
+            entry.clear()
+            entry.update(previous)
+            if previous_active is None:
+                _active.pop(session_id, None)
+            else:
+                _active[session_id] = previous_active
+            raise
+        if delta is not None and previous["spill_path"]:
+            Path(previous["spill_path"]).unlink(missing_ok=True)
+        print(f"DEBUG: Appended {Path(source_path).name} to dataset '{name}' "
+              f"({len(entry['parts'])} parts)")
+        return entry
+
+
+def resolve_name(session_id: str, name_or_file: Optional[str] = None) -> Optional[str]:
+    """Map a dataset name, file path or file name to a registered name (default: the active one)."""
+    entries = _registry.get(session_id, {})
+    if not name_or_file:
+        return _active.get(session_id)
+    if name_or_file in entries:
+        return name_or_file
+    for name, entry in entries.items():
+        for source in entry["parts"]:
+            if name_or_file == source or Path(name_or_file).name == Path(source).name:
+                return name
+    candidate = dataset_name_for(name_or_file)
+    return candidate if candidate in entries else None
+
+
+def get_entry(session_id: str, name_or_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return a registry entry, reloading its frame from the spill cache if needed.
+
+    Args:
+        session_id: Owning session
+        name_or_file: Dataset name or source file; defaults to the active dataset
+
+    Returns:
+        The entry, or None if no such dataset is registered
+    """
+    with _lock:
+        name = resolve_name(session_id, name_or_file)
+        if name is None:
+            return None
+        entry = _registry[session_id][name]
+        entry["last_used"] = time.monotonic()
+        if entry["engine"] == "pandas" and entry["df"] is None:
+            _reload(session_id, name, entry)
+            _enforce_budgets((session_id, name))
+        return entry
+
+
+def get_dataset(session_id: str, name_or_file: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """Return the frame for a dataset (see get_entry)."""
+    entry = get_entry(session_id, name_or_file)
+    return entry["df"] if entry else None
+
+
+def list_datasets(session_id: str) -> List[Dict[str, Any]]:
+    """Describe the datasets registered for a session."""
+    with _lock:
+        active = _active.get(session_id)
+        return [
+            {
+                "name": name,
+                "file": Path(e["source_path"]).name if e["source_path"] else None,
+                "parts": len(e["parts"]),
+                "engine": e["engine"],
+                "memory_mb": round(e["bytes"] / 1e6, 2),
+                "in_memory": e["df"] is not None,
+                "active": name == active,
+            }
+            for name, e in _registry.get(session_id, {}).items()
+        ]
+
+
+def drop_session(session_id: str) -> None:
+    """Forget all datasets of a session and delete their spill files."""
+    with _lock:
+        for entry in _registry.pop(session_id, {}).values():
+            if entry["spill_path"]:
+                Path(entry["spill_path"]).unlink(missing_ok=True)
+        _active.pop(session_id, None)
+
+
+def registry_stats() -> Dict[str, Any]:
+    """Memory accounting across all sessions."""
+    with _lock:
+        entries = [e for session in _registry.values() for e in session.values()]
+        return {
+            "sessions": len(_registry),
+            "datasets": len(entries),
+            "resident_mb": round(_resident(entries) / 1e6, 2),
+            "spilled": sum(1 for e in entries if e["engine"] == "pandas" and e["df"] is None),
+            "global_budget_mb": GLOBAL_BUDGET_BYTES // (1024 * 1024),
+            "session_budget_mb": SESSION_BUDGET_BYTES // (1024 * 1024),
+            **_stats,
+        }
@@ -0,0 +1,172 @@
+# dataset_store.py
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Optional: Parquet cache needs pyarrow
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+# Directory holding the columnar copies of uploaded datasets
+CACHE_DIR = Path(__file__).parent / ".dataset_cache"
+
+# Bumped when optimize_dtypes changes, so cached copies written by an older version are not reused
+CACHE_FORMAT = 3
+
+# Text columns with fewer unique values than this ratio of rows become categoricals
+CATEGORY_RATIO = 0.5
+
+SUPPORTED_EXTENSIONS = {".csv", ".xls", ".xlsx"}
+
+
+def _read_source(path: Path) -> pd.DataFrame:
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        return pd.read_csv(path)
+    if ext in (".xls", ".xlsx"):
+        return pd.read_excel(path)
+    raise ValueError(f"Unsupported file type: {ext}. Use .csv, .xls, or .xlsx")
+
+
+def optimize_dtypes(df: pd.DataFrame, category_ratio: float = CATEGORY_RATIO) -> pd.DataFrame:
+    """
+    Shrink a freshly parsed frame in place of its default dtypes.
+
+    - Low-cardinality text columns become categoricals
+    - Integers and floats stay 64-bit: narrower types would silently wrap around or
+      lose precision in the arithmetic (sums, products) generated analysis code
+      runs on them, even when every stored value fits
+    """
+    out = {}
+    rows = max(len(df), 1)
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            out[col] = series
+        elif pd.api.types.is_integer_dtype(series):
+            out[col] = series if series.dtype == np.int64 or pd.api.types.is_extension_array_dtype(series) \
+                else series.astype(np.int64)
+        elif pd.api.types.is_float_dtype(series):
+            out[col] = series if series.dtype == np.float64 or pd.api.types.is_extension_array_dtype(series) \
+                else series.astype(np.float64)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if series.nunique(dropna=True) / rows < category_ratio:
+                out[col] = series.astype("category")
+            else:
+                out[col] = series
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+def cache_path_for(file_path: str) -> Path:
+    """Parquet cache location for a source file, keyed by its path, size and mtime."""
+    path = Path(file_path).resolve()
+    stat = path.stat()
+    key = hashlib.sha256(f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{CACHE_FORMAT}".encode()).hexdigest()[:24]
+    return CACHE_DIR / f"{path.stem}-{key}.parquet"
+
+
+def load_table(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load a CSV or Excel file through the columnar cache.
+
+    The first load parses the source file, optimizes dtypes and writes a Parquet
+    copy; later loads read only the requested columns from that copy.
+
+    Args:
+        file_path: Path to a .csv, .xls or .xlsx file
+        columns: Optional subset of columns to load
+
+    Returns:
+        The (dtype-optimized) DataFrame
+    """
+    path = Path(file_path)
+    if path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported file type: {path.suffix.lower()}. Use .csv, .xls, or .xlsx")
+
+    if not _HAS_PYARROW:
+        df = optimize_dtypes(_read_source(path))
+        return df[columns] if columns else df
+
+    cached = cache_path_for(file_path)
+    if cached.exists():
+        print(f"DEBUG: Loading {path.name} from columnar cache")
+        return pd.read_parquet(cached, columns=columns)
+
+    df = optimize_dtypes(_read_source(path))
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_suffix(".tmp")
+        df.to_parquet(tmp, index=False)
+        tmp.replace(cached)
+        print(f"DEBUG: Cached {path.name} as {cached.name}")
+    except Exception as e:
+        # e.g. non-string column names or mixed-type object columns
+        print(f"DEBUG: Could not write columnar cache for {path.name}: {e}")
+    return df[columns] if columns else df
+
+
+def read_header(file_path: str, rows: int = 100) -> pd.DataFrame:
+    """Parse only the first rows of a file, e.g. to check its schema."""
+    path = Path(file_path)
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        return pd.read_csv(path, nrows=rows)
+    if ext in (".xls", ".xlsx"):
+        return pd.read_excel(path, nrows=rows)
+    raise ValueError(f"Unsupported file type: {ext}. Use .csv, .xls, or .xlsx")
+
+
+def column_kinds(df: pd.DataFrame) -> Dict[str, str]:
+    """Coarse type of each column, used to decide whether two files share a schema."""
+    kinds = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            kinds[str(col)] = "bool"
+        elif pd.api.types.is_numeric_dtype(series):
+            kinds[str(col)] = "number"
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            kinds[str(col)] = "datetime"
+        else:
+            kinds[str(col)] = "text"
+    return kinds
+
+
+def schemas_compatible(existing: Dict[str, str], incoming: Dict[str, str]) -> bool:
+    """
+    Whether two files can be stacked: same column names and matching column kinds.
+
+    An all-empty column parses as a float, so "number" also matches "bool" and "datetime".
+    """
+    if set(existing) != set(incoming):
+        return False
+    for col, kind in existing.items():
+        other = incoming[col]
+        if kind != other and ("text" in (kind, other) or "number" not in (kind, other)):
+            return False
+    return True
+
+
+def concat_frames(base: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """Append rows, keeping categoricals categorical by unioning their categories."""
+    from pandas.api.types import union_categoricals
+
+    delta = delta[list(base.columns)]
+    columns = {}
+    for col in base.columns:
+        left, right = base[col], delta[col]
+        if isinstance(left.dtype, pd.CategoricalDtype) or isinstance(right.dtype, pd.CategoricalDtype):
+            merged = union_categoricals([left.astype("category"), right.astype("category")])
+            columns[col] = pd.Series(merged)
+        else:
+            columns[col] = pd.concat([left, right], ignore_index=True)
+    return pd.DataFrame(columns)
+
@@ -96,6 +96,9 @@ function App() {
               }];
             });
           }
+        } else if (data.type === 'progress') {
+          // Long-running tools (e.g. video transcription) report progress while the agent waits
+          console.log(`⏳ ${data.tool}: ${data.content}`);
         } else if (data.type === 'error') {
           setMessages(prev => [...prev, {
             id: Date.now().toString(),
@@ -0,0 +1,99 @@
+# http_client.py
+import threading
+from typing import Any, Dict, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Synchronous only: every caller (the agent's tools, scrape_many's scrape_scheduler
+# workers, speech_jobs) runs on threads, so one thread-safe pooled requests.Session
+# serves them all, with concurrency capped per host by the pool size below
+
+# Defaults for every outbound call; callers may pass their own timeout
+CONNECT_TIMEOUT_SECONDS = 5
+READ_TIMEOUT_SECONDS = 20
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS)
+
+# Connection pools are kept for this many hosts, each with at most PER_HOST_CONNECTIONS
+# connections; further requests to a busy host wait for a free connection
+MAX_HOSTS = 32
+PER_HOST_CONNECTIONS = 8
+
+# Retry policy: connection failures and throttling/unavailable responses, with
+# exponential backoff (honouring Retry-After). Read timeouts are not retried because
+# the server may already have acted on the request.
+RETRIES = 3
+BACKOFF_SECONDS = 0.5
+RETRY_STATUSES = (429, 502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_retry = Retry(
+    total=RETRIES,
+    connect=RETRIES,
+    read=0,
+    status=RETRIES,
+    backoff_factor=BACKOFF_SECONDS,
+    status_forcelist=RETRY_STATUSES,
+    allowed_methods=RETRY_METHODS,
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+_adapter = HTTPAdapter(pool_connections=MAX_HOSTS, pool_maxsize=PER_HOST_CONNECTIONS,
+                       pool_block=True, max_retries=_retry)
+_session = requests.Session()
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+_lock = threading.Lock()
+
+
+def request(method: str, url: str, timeout: Union[float, Tuple[float, float], None] = None,
+            **kwargs) -> requests.Response:
+    """
+    Send a request over the shared keep-alive pool.
+
+    Args:
+        method: HTTP method
+        url: Absolute URL
+        timeout: Seconds, or (connect, read) seconds (default: DEFAULT_TIMEOUT)
+        **kwargs: Passed to requests (headers, params, data, json, stream, ...)
+
+    Returns:
+        The response. Streamed responses must be closed (or used as a context
+        manager) so their connection goes back to the pool.
+    """
+    return _session.request(method, url, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET over the shared pool (see request)."""
+    return request("GET", url, **kwargs)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Connection reuse per host: requests sent, connections opened and idle connections.
+
+    A host whose request count is far above its connection count is being served
+    from warm connections.
+    """
+    hosts = {}
+    pools = _adapter.poolmanager.pools
+    with _lock:
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats = hosts.setdefault(pool.host, {"requests": 0, "connections_opened": 0, "idle": 0})
+            stats["requests"] += pool.num_requests
+            stats["connections_opened"] += pool.num_connections
+            stats["idle"] += pool.pool.qsize() if pool.pool is not None else 0
+    total_requests = sum(s["requests"] for s in hosts.values())
+    total_connections = sum(s["connections_opened"] for s in hosts.values())
+    return {
+        "requests": total_requests,
+        "connections_opened": total_connections,
+        "reuse_ratio": round(1 - total_connections / total_requests, 3) if total_requests else None,
+        "hosts": hosts,
+    }
@@ -0,0 +1,181 @@
+# image_pipeline.py
+import io
+import json
+import mimetypes
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from google.genai import types
+
+# Optional: downscaling needs Pillow; without it images are sent as-is
+try:
+    from PIL import Image, ImageOps
+    _HAS_PIL = True
+except ImportError:
+    Image = ImageOps = None
+    _HAS_PIL = False
+
+from transcript_store import file_key
+
+IMAGE_MODEL = "gemini-2.5-flash"
+
+# The model works on downsampled tiles anyway; larger images only cost upload time and tokens
+MAX_EDGE = 1536
+JPEG_QUALITY = 85
+
+# Answers by (image hash, normalized question), and prepared images by (image hash, max edge)
+ANSWER_CACHE_SIZE = 512
+PREPARED_CACHE_SIZE = 32
+
+_answers: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_prepared: "OrderedDict[Tuple[str, int], Tuple[bytes, str]]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"answer_hits": 0, "answer_misses": 0, "requests": 0, "bytes_sent": 0}
+
+
+def normalize_query(query: str) -> str:
+    """Cache form of a question: lower case, single spaces, no trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?.!").lower()
+
+
+def _lru_get(cache: OrderedDict, key):
+    with _lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _lru_put(cache: OrderedDict, key, value, size: int) -> None:
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+def prepare_image(file_path: str, max_edge: int = MAX_EDGE) -> Tuple[bytes, str]:
+    """
+    Downscale an image so its longest edge is at most ``max_edge`` and re-encode it.
+
+    Photos become JPEG; images with transparency stay PNG. The original bytes are
+    kept when re-encoding would not make them smaller.
+
+    Returns:
+        (image bytes, mime type)
+    """
+    key = (file_key(file_path), max_edge)
+    cached = _lru_get(_prepared, key)
+    if cached is not None:
+        return cached
+
+    original = Path(file_path).read_bytes()
+    mime_type = mimetypes.guess_type(file_path)[0] or "image/jpeg"
+    result = (original, mime_type)
+    if _HAS_PIL:
+        with Image.open(io.BytesIO(original)) as image:
+            image = ImageOps.exif_transpose(image)
+            resized = max(image.size) > max_edge
+            if resized:
+                image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            buffer = io.BytesIO()
+            if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+                image.save(buffer, format="PNG", optimize=True)
+                encoded = (buffer.getvalue(), "image/png")
+            else:
+                image.convert("RGB").save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+                encoded = (buffer.getvalue(), "image/jpeg")
+        if resized or len(encoded[0]) < len(original):
+            result = encoded
+    _lru_put(_prepared, key, result, PREPARED_CACHE_SIZE)
+    return result
+
+
+def _batch_prompt(names: List[str], questions: List[str]) -> str:
+    listed = "\n".join(f"{j + 1}. {q}" for j, q in enumerate(questions))
+    return (
+        f"You are given {len(names)} image(s), labeled above. Answer every question below "
+        f"separately for every image.\n\nQUESTIONS:\n{listed}\n\n"
+        'Reply with JSON: {"answers": [{"image": <image number>, "question": <question number>, '
+        '"answer": "<answer>"}, ...]} with one entry per image and question.'
+    )
+
+
+def explain_images(client, file_paths: List[str], questions: List[str],
+                   max_edge: int = MAX_EDGE) -> List[Dict[str, Any]]:
+    """
+    Answer each question about each image, in at most one model request.
+
+    Answers are cached by (image content hash, normalized question); only the
+    pairs not in the cache are sent, with every needed image (downscaled, see
+    prepare_image) in the same request.
+
+    Args:
+        client: google.genai client
+        file_paths: Image files
+        questions: Questions asked about every image
+        max_edge: Longest image edge sent to the model
+
+    Returns:
+        One dict per (image, question): file, question, answer and cached
+    """
+    keys = {(p, q): (file_key(p), normalize_query(q)) for p in file_paths for q in questions}
+    answers = {pair: _lru_get(_answers, key) for pair, key in keys.items()}
+    missing = [pair for pair, answer in answers.items() if answer is None]
+    with _lock:
+        _stats["answer_hits"] += len(answers) - len(missing)
+        _stats["answer_misses"] += len(missing)
+
+    if missing:
+        images = list(dict.fromkeys(p for p, _ in missing))
+        asked = list(dict.fromkeys(q for _, q in missing))
+        parts = []
+        for i, path in enumerate(images):
+            data, mime_type = prepare_image(path, max_edge)
+            if len(images) > 1:
+                parts.append(types.Part(text=f"Image {i + 1} ({Path(path).name}):"))
+            parts.append(types.Part.from_bytes(data=data, mime_type=mime_type))
+            with _lock:
+                _stats["bytes_sent"] += len(data)
+        with _lock:
+            _stats["requests"] += 1
+
+        if len(images) == 1 and len(asked) == 1:
+            response = client.models.generate_content(model=IMAGE_MODEL, contents=parts + [asked[0]])
+            fresh = {(images[0], asked[0]): response.text}
+        else:
+            print(f"DEBUG: Batched {len(images)} image(s) x {len(asked)} question(s) into one request")
+            response = client.models.generate_content(
+                model=IMAGE_MODEL,
+                contents=parts + [_batch_prompt([Path(p).name for p in images], asked)],
+                config=types.GenerateContentConfig(response_mime_type="application/json")
+            )
+            fresh = {}
+            for item in json.loads(response.text).get("answers", []):
+                i, j = int(item["image"]) - 1, int(item["question"]) - 1
+                if 0 <= i < len(images) and 0 <= j < len(asked):
+                    fresh[(images[i], asked[j])] = str(item["answer"])
+
+        for pair, answer in fresh.items():
+            if pair in keys and answers[pair] is None:
+                answers[pair] = answer
+                _lru_put(_answers, keys[pair], answer, ANSWER_CACHE_SIZE)
+
+    return [
+        {
+            "file": path,
+            "question": question,
+            "answer": answers[(path, question)] or "No answer was returned for this image and question.",
+            "cached": (path, question) not in missing,
+        }
+        for path in file_paths for question in questions
+    ]
+
+
+def image_stats() -> Dict[str, Any]:
+    """Cache effectiveness and upload volume."""
+    with _lock:
+        return {**_stats, "cached_answers": len(_answers)}
@@ -0,0 +1,278 @@
+# page_cache.py
+import email.utils
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests.structures import CaseInsensitiveDict
+
+# Fetched pages outlive sessions, like transcripts
+CACHE_DIR = Path(os.getenv("PAGE_CACHE_DIR", Path(__file__).parent / ".page_cache"))
+DB_PATH = CACHE_DIR / "pages.db"
+
+# Least recently used pages are evicted once the stored bodies exceed this many bytes
+MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Pages larger than this are never stored
+MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+# Freshness when the server gives neither max-age nor Expires: a tenth of the time
+# since Last-Modified (RFC 9111 heuristic), capped, or the default without Last-Modified
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_SECONDS = 24 * 60 * 60
+DEFAULT_TTL_SECONDS = 5 * 60
+
+# Response headers kept with a page
+_STORED_HEADERS = ("content-type", "cache-control", "expires", "date", "etag", "last-modified", "content-language")
+
+# Query parameters that never change page content
+_TRACKING_PARAMS = re.compile(r"^(utm_.*|fbclid|gclid|msclkid|mc_cid|mc_eid|igshid|ref_src)$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    final_url TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    body TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored REAL NOT NULL,
+    expires REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+CREATE TABLE IF NOT EXISTS aliases (
+    requested TEXT PRIMARY KEY,
+    key TEXT NOT NULL
+);
+"""
+
+_lock = threading.Lock()
+_initialized = False
+_stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialized
+    if not _initialized:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(DB_PATH, timeout=30)
+    if not _initialized:
+        with _lock:
+            con.execute("PRAGMA journal_mode = WAL")
+            con.executescript(_SCHEMA)
+            _initialized = True
+    return con
+
+
+def normalize_url(url: str) -> str:
+    """
+    Cache key for a URL: lower-case scheme and host, no default port, no fragment,
+    no tracking parameters, and query parameters in sorted order.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING_PARAMS.match(k))
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def _cache_control(headers) -> Dict[str, Optional[str]]:
+    directives = {}
+    for item in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = item.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _expiry(headers, now: float) -> float:
+    """Time until which a response may be served without revalidation."""
+    directives = _cache_control(headers)
+    if "no-cache" in directives:
+        return now
+    for name in ("s-maxage", "max-age"):
+        if (directives.get(name) or "").isdigit():
+            return now + int(directives[name])
+    expires = _http_date(headers.get("Expires"))
+    if expires is not None:
+        date = _http_date(headers.get("Date")) or now
+        return now + max(expires - date, 0)
+    last_modified = _http_date(headers.get("Last-Modified"))
+    if last_modified is not None:
+        date = _http_date(headers.get("Date")) or now
+        return now + min(max(date - last_modified, 0) * HEURISTIC_FRACTION, HEURISTIC_MAX_SECONDS)
+    return now + DEFAULT_TTL_SECONDS
+
+
+def lookup(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the cached page for a requested URL (following a stored redirect), or None.
+
+    A fresh entry counts as a hit and can be served as-is; a stale one must be
+    revalidated (see conditional_headers).
+
+    Returns:
+        Dict with key, final_url, html, headers, etag, last_modified and fresh
+    """
+    requested = normalize_url(url)
+    con = _connect()
+    try:
+        alias = con.execute("SELECT key FROM aliases WHERE requested = ?", (requested,)).fetchone()
+        key = alias[0] if alias else requested
+        row = con.execute(
+            "SELECT final_url, headers, etag, last_modified, body, expires FROM pages WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            with con:
+                con.execute("UPDATE pages SET last_access = ? WHERE key = ?", (time.time(), key))
+    finally:
+        con.close()
+    if row is None:
+        return None
+    final_url, headers, etag, last_modified, body, expires = row
+    fresh = time.time() < expires
+    if fresh:
+        with _lock:
+            _stats["hits"] += 1
+    return {
+        "key": key,
+        "final_url": final_url,
+        "html": body,
+        "headers": json.loads(headers),
+        "etag": etag,
+        "last_modified": last_modified,
+        "fresh": fresh,
+    }
+
+
+def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since headers that revalidate a stale entry."""
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def revalidated(entry: Dict[str, Any], response) -> None:
+    """
+    Extend a stale entry after the server answered 304 Not Modified.
+
+    Headers sent with the 304 (new Cache-Control, ETag, ...) replace the stored ones.
+    """
+    now = time.time()
+    headers = {**entry["headers"], **{k.lower(): v for k, v in response.headers.items() if k.lower() in _STORED_HEADERS}}
+    con = _connect()
+    try:
+        with con:
+            con.execute(
+                "UPDATE pages SET headers = ?, etag = ?, last_modified = ?, expires = ?, last_access = ? WHERE key = ?",
+                (json.dumps(headers), headers.get("etag"), headers.get("last-modified"),
+                 _expiry(CaseInsensitiveDict(headers), now), now, entry["key"])
+            )
+    finally:
+        con.close()
+    with _lock:
+        _stats["revalidated"] += 1
+
+
+def store(url: str, response, body: Optional[str] = None) -> bool:
+    """
+    Cache a successful response under its normalized final URL; the requested URL
+    becomes an alias when it redirected.
+
+    Every call counts as a cache miss: the full body came over the network.
+    Responses marked no-store, non-200 responses and oversized bodies are not cached.
+    Pass body when the response was streamed (its content is already consumed).
+
+    Returns:
+        True if the page was stored
+    """
+    with _lock:
+        _stats["misses"] += 1
+    if response.status_code != 200 or "no-store" in _cache_control(response.headers):
+        return False
+    if body is None:
+        body = response.text
+    size = len(body.encode("utf-8"))
+    if size > MAX_ENTRY_BYTES:
+        return False
+    now = time.time()
+    key = normalize_url(response.url)
+    requested = normalize_url(url)
+    headers = {k.lower(): v for k, v in response.headers.items() if k.lower() in _STORED_HEADERS}
+    con = _connect()
+    try:
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO pages (key, final_url, headers, etag, last_modified, body, size, stored, "
+                "expires, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, json.dumps(headers), headers.get("etag"), headers.get("last-modified"),
+                 body, size, now, _expiry(response.headers, now), now)
+            )
+            if requested != key:
+                con.execute("INSERT OR REPLACE INTO aliases (requested, key) VALUES (?, ?)", (requested, key))
+        evicted = _evict(con)
+    finally:
+        con.close()
+    with _lock:
+        _stats["stored"] += 1
+        _stats["evicted"] += evicted
+    return True
+
+
+def _evict(con: sqlite3.Connection) -> int:
+    """Drop least recently used pages until the cache fits in MAX_BYTES."""
+    total = con.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+    if total <= MAX_BYTES:
+        return 0
+    evicted = 0
+    with con:
+        for key, size in con.execute("SELECT key, size FROM pages ORDER BY last_access").fetchall():
+            if total <= MAX_BYTES:
+                break
+            con.execute("DELETE FROM pages WHERE key = ?", (key,))
+            con.execute("DELETE FROM aliases WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+    if evicted:
+        print(f"DEBUG: Evicted {evicted} cached page(s); cache now {total / 1e6:.1f}MB")
+    return evicted
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit, revalidation and miss counts and the cache's size."""
+    con = _connect()
+    try:
+        pages, size = con.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+    finally:
+        con.close()
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+    return {
+        **stats,
+        "hit_ratio": round((stats["hits"] + stats["revalidated"]) / lookups, 3) if lookups else None,
+        "pages": pages,
+        "bytes": size,
+        "max_bytes": MAX_BYTES,
+    }
@@ -0,0 +1,355 @@
+# parsed_pages.py
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from page_cache import normalize_url
+
+# Memory budgets for parsed pages (override with environment variables)
+GLOBAL_BUDGET_BYTES = int(os.getenv("PAGE_MEMORY_BUDGET_MB", "256")) * 1024 * 1024
+SESSION_BUDGET_BYTES = int(os.getenv("SESSION_PAGE_BUDGET_MB", "64")) * 1024 * 1024
+
+# A parsed page is reused for follow-up calls this long; after that it is fetched again
+# (usually straight from page_cache)
+PAGE_TTL_SECONDS = 15 * 60
+
+_TOKEN_RE = re.compile(r"\S+")
+
+# Table cells read as numbers: plain numbers and "1,234.5" style thousands separators.
+# Cells with leading zeros ("007") or inner spaces ("10 20") stay text.
+_NUMBER_RE = re.compile(r"[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?")
+_GROUPED_NUMBER_RE = re.compile(r"[-+]?\d{1,3}(,\d{3})+(\.\d+)?")
+_LEADING_ZERO_RE = re.compile(r"[-+]?0\d")
+
+# Fixed cost per indexed element (proxy object, id map entry, index arrays)
+ELEMENT_OVERHEAD = 120
+
+
+class ParsedPage:
+    """
+    A fetched page after parsing: the DOM without scripts and styles, its flattened
+    text, and an index mapping one to the other, plus derived structures built on
+    first use.
+
+    ``index`` (built while flattening the text, see Scraper._flatten) numbers the
+    elements in document order; everything else refers to elements by that number:
+
+    - tags / tag_names / tag_parents: element, its tag name and its parent's number (-1 for the root)
+    - tag_ends: number just past an element's last descendant, so [n, tag_ends[n]) is its subtree
+    - tag_text_starts / tag_text_ends: an element's text as offsets into text
+    - string_starts / string_tags: start offset of each text node and the element holding it
+    - link_orders / link_hrefs: numbers and hrefs of the <a href> elements
+
+    ``frames`` holds the page's tables as DataFrames once they are asked for, so
+    follow-up calls page through a table without parsing it again.
+
+    ``backend`` is the parser backend that built ``root``; only CSS selection and
+    HTML serialization go through it, so the rest works the same for every backend.
+    """
+
+    def __init__(self, url: str, final_url: str, html: str, root: Any, text: str,
+                 index: Dict[str, Any], backend: Any):
+        self.url = url
+        self.final_url = final_url
+        self.root = root
+        self.text = text
+        self.backend = backend
+        self.tags: List[Any] = index["tags"]
+        self.tag_order: Dict[int, int] = index["tag_order"]
+        self.tag_names: List[str] = index["tag_names"]
+        self.tag_parents: array = index["tag_parents"]
+        self.tag_ends: array = index["tag_ends"]
+        self.tag_text_starts: array = index["tag_text_starts"]
+        self.tag_text_ends: array = index["tag_text_ends"]
+        self.string_starts: array = index["string_starts"]
+        self.string_tags: array = index["string_tags"]
+        self.link_orders: array = index["link_orders"]
+        self.link_hrefs: List[str] = index["link_hrefs"]
+        self.bytes = (len(html) * backend.tree_overhead + len(text) * 2
+                      + len(self.tags) * ELEMENT_OVERHEAD + len(self.string_starts) * 16)
+        self.parsed_at = time.monotonic()
+        self.last_used = self.parsed_at
+        self._lower: Optional[str] = None
+        self._tokens: Optional[Tuple[array, array]] = None
+        self._names: Optional[set] = None
+        self._frames: Optional[List[pd.DataFrame]] = None
+        # Why the download stopped before the end of the page (see Scraper._read_body), and
+        # the (terms, matches) an early stop was made for
+        self.partial: Optional[str] = None
+        self.read_for: Tuple[set, int] = (set(), 0)
+
+    @property
+    def lower_text(self) -> str:
+        """Lower-cased text, for case-insensitive keyword search."""
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def tokens(self) -> Tuple[array, array]:
+        """Start and end character offsets of every whitespace-separated token in text."""
+        if self._tokens is None:
+            starts, ends = array("q"), array("q")
+            for match in _TOKEN_RE.finditer(self.text):
+                starts.append(match.start())
+                ends.append(match.end())
+            self._tokens = (starts, ends)
+            self.bytes += len(starts) * 16
+        return self._tokens
+
+    def order(self, element: Any) -> int:
+        """Document-order number of an element of this page."""
+        return self.tag_order[id(element)]
+
+    def name(self, element: Any) -> str:
+        return self.tag_names[self.order(element)]
+
+    def element_text(self, element: Any) -> str:
+        """Whitespace-normalized text of an element (as get_text(" ", strip=True) would give)."""
+        n = self.order(element)
+        return self.text[self.tag_text_starts[n]:self.tag_text_ends[n]]
+
+    def element_for_span(self, start: int, end: int) -> Optional[Any]:
+        """
+        Innermost element containing the text between two offsets: the element holding
+        the text node with the span, or the nearest common ancestor when it crosses nodes.
+        """
+        if not self.string_tags:
+            return None
+        first = self.string_tags[max(bisect_right(self.string_starts, start) - 1, 0)]
+        last = self.string_tags[max(bisect_right(self.string_starts, max(end - 1, start)) - 1, 0)]
+        # An ancestor has a smaller number and a subtree reaching past its descendants
+        while not (first <= last < self.tag_ends[first]):
+            first = self.tag_parents[first]
+            if first < 0:
+                return self.tags[0]
+        return self.tags[first]
+
+    def _links_in_subtree(self, n: int) -> List[str]:
+        lo = bisect_left(self.link_orders, n)
+        hi = bisect_left(self.link_orders, self.tag_ends[n])
+        return list(dict.fromkeys(self.link_hrefs[lo:hi]))
+
+    def links_in(self, element: Any) -> List[str]:
+        """hrefs of the links inside an element, in document order."""
+        return self._links_in_subtree(self.order(element))
+
+    def links_near(self, element: Any) -> List[str]:
+        """
+        hrefs of the links in an element's parent (which covers the element and its
+        neighbouring siblings), or in the element itself when it has no parent.
+        """
+        n = self.order(element)
+        parent = self.tag_parents[n]
+        return self._links_in_subtree(parent if parent >= 0 else n)
+
+    def children(self, element: Any, names: Tuple[str, ...] = ()) -> List[Any]:
+        """Child elements, optionally only those with one of the given tag names."""
+        n = self.order(element)
+        return [self.tags[c] for c in range(n + 1, self.tag_ends[n])
+                if self.tag_parents[c] == n and (not names or self.tag_names[c] in names)]
+
+    def descendants(self, element: Any, names: Tuple[str, ...] = ()) -> List[Any]:
+        """Descendant elements in document order, optionally only those with the given tag names."""
+        n = self.order(element)
+        return [self.tags[c] for c in range(n + 1, self.tag_ends[n]) if not names or self.tag_names[c] in names]
+
+    def find_all(self, *names: str) -> List[Any]:
+        """All elements with one of the given tag names, in document order."""
+        return [self.tags[n] for n, name in enumerate(self.tag_names) if name in names]
+
+    def has_tag(self, name: str) -> bool:
+        if self._names is None:
+            self._names = set(self.tag_names)
+        return name in self._names
+
+    def select(self, css: str) -> List[Any]:
+        """Elements matching a CSS selector, in document order."""
+        return self.backend.select(self.root, css)
+
+    def outer_html(self, element: Any) -> str:
+        return self.backend.outer_html(element)
+
+    def attribute(self, element: Any, name: str) -> Optional[str]:
+        return self.backend.attribute(element, name)
+
+    @property
+    def tables(self) -> List[Any]:
+        """All <table> elements in document order."""
+        return self.find_all("table")
+
+    def table_number(self, table: Any) -> int:
+        """Position of a <table> element in tables (its table id)."""
+        n = self.order(table)
+        return sum(1 for name in self.tag_names[:n] if name == "table")
+
+    @property
+    def frames(self) -> List[pd.DataFrame]:
+        """
+        Every table of the page as a DataFrame, aligned with tables, built in one
+        pass over the element index on first use and kept with the page.
+        """
+        if self._frames is None:
+            self._frames = [self._table_frame(self.order(t)) for t in self.tables]
+            self.bytes += sum(int(df.memory_usage(index=True, deep=True).sum()) for df in self._frames)
+        return self._frames
+
+    def _span(self, n: int, name: str) -> int:
+        try:
+            return max(1, min(int(self.attribute(self.tags[n], name) or 1), 1000))
+        except ValueError:
+            return 1
+
+    def _table_frame(self, n: int) -> pd.DataFrame:
+        """
+        DataFrame of the table numbered n: colspan/rowspan cells are repeated into every
+        position they cover, leading header rows (<thead>, or only <th> cells) become
+        the column names, rows of nested tables are left to those tables.
+        """
+        rows, header = [], []
+        pending: Dict[int, List[Any]] = {}  # column -> [rows still covered, text] of rowspan cells
+        c, end = n + 1, self.tag_ends[n]
+        while c < end:
+            name = self.tag_names[c]
+            if name == "table":
+                c = self.tag_ends[c]
+                continue
+            if name != "tr":
+                c += 1
+                continue
+            cells = [k for k in range(c + 1, self.tag_ends[c])
+                     if self.tag_parents[k] == c and self.tag_names[k] in ("td", "th")]
+            row: List[Optional[str]] = []
+
+            def fill_spanned():
+                while len(row) in pending:
+                    covered = pending[len(row)]
+                    row.append(covered[1])
+                    covered[0] -= 1
+                    if covered[0] == 0:
+                        del pending[len(row) - 1]
+
+            for k in cells:
+                fill_spanned()
+                text = self.text[self.tag_text_starts[k]:self.tag_text_ends[k]]
+                rowspan = self._span(k, "rowspan")
+                for _ in range(self._span(k, "colspan")):
+                    if rowspan > 1:
+                        pending[len(row)] = [rowspan - 1, text]
+                    row.append(text)
+            fill_spanned()
+            for col in [col for col in pending if col >= len(row)]:
+                del pending[col]
+            if row:
+                is_header = (self.tag_names[self.tag_parents[c]] == "thead"
+                             or all(self.tag_names[k] == "th" for k in cells))
+                header.append(is_header and len(header) == len(rows))
+                rows.append(row)
+            c = self.tag_ends[c]
+
+        head_count = sum(header)
+        width = max((len(r) for r in rows), default=0)
+        rows = [r + [None] * (width - len(r)) for r in rows]
+        columns = []
+        for i in range(width):
+            parts = list(dict.fromkeys(r[i] for r in rows[:head_count] if r[i]))
+            columns.append(" / ".join(parts) or str(i))
+        seen: Dict[str, int] = {}
+        for i, col in enumerate(columns):
+            if col in seen:
+                seen[col] += 1
+                columns[i] = f"{col}.{seen[col]}"
+            else:
+                seen[col] = 0
+
+        df = pd.DataFrame(rows[head_count:], columns=columns)
+        for col in df.columns:
+            values = df[col].replace("", None)
+            filled = values.dropna()
+            if len(filled) and all(_is_number(cell) for cell in filled):
+                df[col] = pd.to_numeric(values.str.replace(",", "", regex=False))
+        return df
+
+
+def _is_number(cell: str) -> bool:
+    if _LEADING_ZERO_RE.match(cell):
+        return False
+    return bool(_NUMBER_RE.fullmatch(cell) or _GROUPED_NUMBER_RE.fullmatch(cell))
+
+
+# Cache: session_id -> {(normalized url, js) -> page}
+_pages: Dict[str, Dict[Tuple[str, bool], ParsedPage]] = {}
+_lock = threading.RLock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+
+def _resident(pages) -> int:
+    return sum(p.bytes for p in pages)
+
+
+def _enforce_budgets(session_id: str, protect: ParsedPage) -> None:
+    """Drop least recently used pages until the session and global budgets hold."""
+    scopes = [
+        ([(session_id, k, p) for k, p in _pages.get(session_id, {}).items()], SESSION_BUDGET_BYTES),
+        ([(sid, k, p) for sid, pages in _pages.items() for k, p in pages.items()], GLOBAL_BUDGET_BYTES),
+    ]
+    for scope, budget in scopes:
+        total = _resident(p for _, _, p in scope)
+        for sid, key, page in sorted(scope, key=lambda item: item[2].last_used):
+            if total <= budget:
+                break
+            if page is protect or key not in _pages.get(sid, {}):
+                continue
+            del _pages[sid][key]
+            total -= page.bytes
+            _stats["evictions"] += 1
+
+
+def get_page(session_id: str, url: str, js: bool = False) -> Optional[ParsedPage]:
+    """Return the session's parsed copy of a page, or None if it is missing or too old."""
+    key = (normalize_url(url), js)
+    with _lock:
+        page = _pages.get(session_id, {}).get(key)
+        if page is not None and time.monotonic() - page.parsed_at > PAGE_TTL_SECONDS:
+            del _pages[session_id][key]
+            _stats["expired"] += 1
+            page = None
+        if page is None:
+            _stats["misses"] += 1
+            return None
+        page.last_used = time.monotonic()
+        _stats["hits"] += 1
+        return page
+
+
+def put_page(session_id: str, url: str, page: ParsedPage, js: bool = False) -> None:
+    """Keep a parsed page for the session's follow-up calls, evicting old pages to stay in budget."""
+    with _lock:
+        _pages.setdefault(session_id, {})[(normalize_url(url), js)] = page
+        _enforce_budgets(session_id, page)
+
+
+def drop_session(session_id: str) -> None:
+    """Forget all parsed pages of a session."""
+    with _lock:
+        _pages.pop(session_id, None)
+
+
+def page_stats() -> Dict[str, Any]:
+    """Reuse counts and memory held by parsed pages."""
+    with _lock:
+        pages = [p for session in _pages.values() for p in session.values()]
+        return {
+            "sessions": len(_pages),
+            "pages": len(pages),
+            "resident_mb": round(_resident(pages) / 1e6, 2),
+            "global_budget_mb": GLOBAL_BUDGET_BYTES // (1024 * 1024),
+            "session_budget_mb": SESSION_BUDGET_BYTES // (1024 * 1024),
+            **_stats,
+        }
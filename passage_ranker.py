@@ -0,0 +1,141 @@
+# passage_ranker.py
+import math
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+
+# Approximate token budget of one compressed scrape result (snippet, element text or table)
+DEFAULT_TOKEN_BUDGET = 150
+
+# Sentences longer than this are cut into passages of this many words
+MAX_PASSAGE_WORDS = 40
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Relative score boost for passages carrying numbers (figures, dates, prices, percentages)
+NUMERIC_BOOST = 0.25
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:['.,][a-z0-9]+)*")
+_NUMBER_RE = re.compile(r"\d")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers him his how i if in into is it its itself just me more most my no nor not now
+of off on once only or other our ours out over own same she should so some such than that the their
+theirs them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count of a text (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _terms(text: str) -> List[str]:
+    """Lower-cased content words of a text, with plural -s dropped."""
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss") and not word[-2].isdigit():
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def split_passages(text: str, max_words: int = MAX_PASSAGE_WORDS) -> List[str]:
+    """Split text into sentences, cutting sentences longer than max_words into chunks."""
+    passages = []
+    for sentence in _SENTENCE_RE.split(text.strip()):
+        words = sentence.split()
+        for i in range(0, len(words), max_words):
+            passages.append(" ".join(words[i:i + max_words]))
+    return passages
+
+
+def rank_passages(passages: List[str], query_terms: List[str]) -> List[Tuple[float, int]]:
+    """
+    Score passages against query terms with BM25 (statistics taken from the passages
+    themselves), boosting passages that carry numbers.
+
+    Returns:
+        (score, passage index) pairs, best first; ties keep numeric, then earlier, passages first
+    """
+    docs = [Counter(_terms(p)) for p in passages]
+    avg_len = (sum(sum(d.values()) for d in docs) / len(docs)) if docs else 0
+    query = set(query_terms)
+    df = {t: sum(1 for d in docs if t in d) for t in query}
+    idf = {t: math.log(1 + (len(docs) - n + 0.5) / (n + 0.5)) for t, n in df.items()}
+
+    ranked = []
+    for i, (passage, doc) in enumerate(zip(passages, docs)):
+        length = sum(doc.values())
+        score = 0.0
+        for t in query:
+            tf = doc.get(t, 0)
+            if tf:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (avg_len or 1))
+                score += idf[t] * tf * (BM25_K1 + 1) / (tf + norm)
+        numeric = bool(_NUMBER_RE.search(passage))
+        if numeric:
+            score *= 1 + NUMERIC_BOOST
+        ranked.append((score, numeric, -i))
+    ranked.sort(reverse=True)
+    return [(score, -neg_i) for score, _, neg_i in ranked]
+
+
+def compress(text: str, query: Optional[str] = None, keywords: Optional[List[str]] = None,
+             token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """
+    Extractive, query-aware compression: the passages of text most relevant to the
+    query and keywords that fit in token_budget, in their original order.
+
+    Text already within the budget is returned unchanged. Passages matching the query
+    come first, then passages with numbers; with no match at all, numeric and leading
+    passages are kept. Passages are verbatim, so numbers are never altered; gaps
+    between kept passages are marked with " … ".
+
+    Args:
+        text: Text to compress (page text, a snippet, an element's text)
+        query: The user's question
+        keywords: Search terms that located the text
+        token_budget: Approximate number of tokens to keep
+
+    Returns:
+        The compressed text
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+    passages = split_passages(text)
+    if not passages:
+        return text
+    query_terms = _terms(" ".join([query or ""] + list(keywords or [])))
+
+    ranked = rank_passages(passages, query_terms)
+    if ranked[0][0] > 0:
+        # Passages matching nothing in the query only fill the budget when they carry numbers
+        ranked = [(score, i) for score, i in ranked if score > 0 or _NUMBER_RE.search(passages[i])]
+
+    kept, used = [], 0
+    for _, i in ranked:
+        cost = estimate_tokens(passages[i]) + 1
+        if used + cost > token_budget and kept:
+            continue
+        kept.append(i)
+        used += cost
+        if used >= token_budget:
+            break
+
+    pieces = []
+    previous = None
+    for i in sorted(kept):
+        if previous is not None and i != previous + 1:
+            pieces.append("…")
+        pieces.append(passages[i])
+        previous = i
+    return " ".join(pieces)
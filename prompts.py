@@ -34,6 +34,8 @@ You have access to the following tools:
 
 3) convert_audio_to_text  
    - Transcribe audio files.
+   - Transcripts are stored, so transcribing the same file or video again is instant.
+   - For follow-up questions about a specific part of something already transcribed, use get_transcript_excerpt(source, start_seconds, end_seconds) with the file path or video URL.
 
 4) list_attached_files  
    - Get all file names located in the "Files" folder.  
@@ -48,10 +50,12 @@ You have access to the following tools:
    - Extract and transcribe speech from YouTube, TikTok, or Facebook URLs.  
    - ONLY USE when the user wants transcript-based answering.  
    - DO NOT use if the user wants visual analysis.
+   - Long videos keep transcribing in the background. If it says the transcription is still running, tell the user and call SpeechToText again with the same URL later.
 
 7) gemini_vision  
    - Use ONLY for vision analysis on a YouTube video.  
    - If user only wants audio/transcript → use SpeechToText instead.
+   - Follow-up questions about the same video are answered from a stored scene description. Pass start_seconds/end_seconds for questions about a specific moment, and reanalyze=True only if the user says a previous answer was wrong.
 
 8) reverse_string  
    - Reverse a string.
@@ -67,10 +71,15 @@ You have access to the following tools:
 10) scrape_data — TOOL BEHAVIOR & USAGE GUIDELINES (for the agent)
 This tool extracts only targeted, relevant contextual text, not full pages.
 Inputs: url, keyword, selector.
+   - To look for several terms on one page, pass them together as keywords=[...] in ONE call.
+   - Long results are cut down locally to the passages most relevant to user_query (numbers kept verbatim); pass summarize=True only if you need an LLM-written summary instead (much slower).
+   - Tables come back as their schema and first rows with a table_id; read more rows, or filter them, with get_table_rows(url, table_id, ...).
+   - To check several pages (e.g. the web_search hits) for the same keyword/selector, call scrape_many(urls=[...], keyword=...) ONCE instead of scrape_data per URL; it fetches them concurrently and returns one result per URL.
 
-11) analyze_data(user_query: str)
+11) analyze_data(user_query: str, datasets: list[str] = None)
    - PRIMARY TOOL FOR DATA ANALYSIS.
    - Use this when the user asks questions about a CSV/Excel file they just uploaded.
+   - Uses the most recently loaded dataset by default. Pass dataset names (see list_datasets) to pick another one or to join several.
    - Automatically loads the session dataset, generates Python code (using Pandas/Matplotlib), executes it, and returns the result (text + plots).
    - Example: analyze_data("Plot the distribution of CGPA")
    - If the user provides a file, creating a plot is often a good default action if appropriate.
@@ -78,15 +87,20 @@ Inputs: url, keyword, selector.
 12) load_dataset(file_path: str)
    - Use this to manually load a dataset if analyze_data says "No dataset loaded".
    - You almost never need to call this directly unless you are debugging; analyze_data handles it.
+   - Very large files are queried in place (engine="duckdb") instead of being loaded into memory; analyze_data works the same way for them.
+   - Each file is loaded as its own dataset. Only when the user asks to combine a file with a loaded dataset that has the same columns (e.g. the next month of the same export), pass mode="append" (and name=<that dataset>) to append it.
+
+   - list_datasets() shows the datasets loaded in this session and their names.
 
 13) get_weather(location: str)
    - Use this to get current weather data for a location using the WeatherAPI.
    - Input: location string
    - Output: A dictionary containing the weather data.
 
-14) image_explanation(image_url: str, user_query: str)
+14) image_explanation(file_path: str, user_query: str, more_file_paths: list[str] = None, more_queries: list[str] = None)
    - Use this to analyze an image based on a user query
-   - Input: image_url string, user_query string
+   - Input: file_path string, user_query string
+   - For several images or questions, pass them all in ONE call (more_file_paths / more_queries) instead of calling once per image.
    - Output: image explanation string
 
 ────────────────────────────────────────────
@@ -0,0 +1,232 @@
+# query_planner.py
+import difflib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Plans below this confidence fall back to LLM code generation
+CONFIDENCE_THRESHOLD = 0.75
+
+# Largest N accepted for "top N" questions
+MAX_TOP_N = 100
+
+# Anything that hints at plots, filters or multi-step reasoning goes to the LLM
+_FALLBACK_PATTERN = re.compile(
+    r"\b(plot|chart|graph|visuali[sz]e|histogram|scatter|trend|correlat\w*|regression|"
+    r"predict\w*|forecast\w*|where|filter\w*|if|between|greater|less|more than|fewer than|"
+    r"above|below|except|excluding|without|compare|why|explain|which|who|when)\b|[<>=]"
+)
+
+_LEADING_FILLER = re.compile(
+    r"^((please|can you|could you|tell me|show me|give me|find|calculate|compute|get|"
+    r"what is|what are|what s|whats|list|return) )+"
+)
+_TRAILING_FILLER = re.compile(
+    r"( (are there|is there|does it have|do we have|in total|overall|please|"
+    r"in (the|this|my) (dataset|data|file|table|sheet|dataframe|spreadsheet)))+$"
+)
+
+_AGGREGATIONS = {
+    "average": "mean", "avg": "mean", "mean": "mean",
+    "sum": "sum", "total": "sum",
+    "maximum": "max", "max": "max", "highest": "max", "largest": "max",
+    "minimum": "min", "min": "min", "lowest": "min", "smallest": "min",
+    "median": "median",
+    "standard deviation": "std", "std": "std",
+}
+_AGG_LABELS = {
+    "mean": "Average", "sum": "Sum", "max": "Maximum",
+    "min": "Minimum", "median": "Median", "std": "Standard deviation",
+}
+_AGG_WORDS = "|".join(sorted(map(re.escape, _AGGREGATIONS), key=len, reverse=True))
+_ROW_WORDS = r"(rows|records|entries|observations|samples|lines)"
+_GROUP_WORDS = r"(by|per|for each|in each|of each|across|grouped by|for every)"
+
+_ROW_COUNT = re.compile(rf"((how many|number of|count of|count the|total number of) {_ROW_WORDS}|row count|record count)")
+_COLUMN_COUNT = re.compile(r"(how many|number of|count of|total number of) (columns|fields|variables)")
+_AGGREGATE = re.compile(
+    rf"(the )?(?P<agg>{_AGG_WORDS}) (of |for )?(the )?(?P<col>.+?)( {_GROUP_WORDS} (the )?(?P<group>.+))?"
+)
+_COUNT_BY = re.compile(
+    rf"((count|counts|value counts|breakdown|number of {_ROW_WORDS}|how many {_ROW_WORDS}|"
+    rf"how many (?P<noun>[a-z0-9 ]+?))( of| for)? {_GROUP_WORDS} (the )?(?P<group>.+)"
+    rf"|value counts (of|for) (the )?(?P<vc_group>.+))"
+)
+_TOP_N = re.compile(
+    r"(?P<dir>top|bottom) (?P<n>\d+ )?(?P<what>.+?) (by|based on|ranked by|in terms of|with the (highest|most|lowest)) "
+    r"(the )?(?P<metric>.+)"
+)
+_UNIQUE = re.compile(r"(how many|number of|count of|count the) (unique|distinct|different) (?P<col>.+)")
+_MISSING = re.compile(
+    r"(how many|number of|count of|count the) (missing|null|nan|empty|blank)( values| entries| cells)?"
+    r"( (in|for|of) (the )?(?P<col>.+))?"
+)
+
+_planner_stats = {"hits": 0, "misses": 0}
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9]+", " ", str(text).lower())).strip()
+
+
+def _strip_fillers(text: str) -> str:
+    text = _LEADING_FILLER.sub("", text)
+    return _TRAILING_FILLER.sub("", text).strip()
+
+
+def _resolve_column(phrase: Optional[str], columns: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], float]:
+    """Match a phrase from the question to a column, returning (column_info, confidence)."""
+    if not phrase:
+        return None, 0.0
+    phrase = re.sub(r"^(the|all|each|every|column|field) ", "", phrase.strip())
+    phrase = re.sub(r" (column|field|values)$", "", phrase)
+
+    by_name = {_normalize(c["name"]): c for c in columns}
+    if phrase in by_name:
+        return by_name[phrase], 1.0
+
+    singular = phrase.rstrip("s")
+    for name, info in by_name.items():
+        if name.rstrip("s") == singular:
+            return info, 0.95
+
+    close = difflib.get_close_matches(phrase, list(by_name), n=1, cutoff=0.85)
+    if close:
+        ratio = difflib.SequenceMatcher(None, phrase, close[0]).ratio()
+        return by_name[close[0]], round(ratio * 0.9, 2)
+
+    return None, 0.0
+
+
+def _is_numeric(column: Dict[str, Any]) -> bool:
+    return column.get("role") == "numeric"
+
+
+def _plan(query: str, summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    columns = summary.get("columns", [])
+
+    if _COLUMN_COUNT.fullmatch(query):
+        return {"intent": "column_count", "confidence": 1.0, "columns": [],
+                "code": 'print("Number of columns:", df.shape[1])'}
+
+    if _ROW_COUNT.fullmatch(query):
+        return {"intent": "row_count", "confidence": 1.0, "columns": [],
+                "code": 'print("Number of rows:", len(df))'}
+
+    m = _UNIQUE.fullmatch(query)
+    if m:
+        col, conf = _resolve_column(m.group("col"), columns)
+        if col:
+            name = col["name"]
+            return {"intent": "unique_count", "confidence": conf, "columns": [name],
+                    "code": f'print("Unique values in", {name!r} + ":", df[{name!r}].nunique())'}
+        return None
+
+    m = _MISSING.fullmatch(query)
+    if m:
+        if not m.group("col"):
+            return {"intent": "missing_values", "confidence": 1.0, "columns": [],
+                    "code": 'print(df.isna().sum().to_string())'}
+        col, conf = _resolve_column(m.group("col"), columns)
+        if col:
+            name = col["name"]
+            return {"intent": "missing_values", "confidence": conf, "columns": [name],
+                    "code": f'print("Missing values in", {name!r} + ":", df[{name!r}].isna().sum())'}
+        return None
+
+    m = _TOP_N.fullmatch(query)
+    if m:
+        n = min(int((m.group("n") or "5").strip()), MAX_TOP_N)
+        largest = m.group("dir") == "top"
+        metric, metric_conf = _resolve_column(m.group("metric"), columns)
+        if not metric or not _is_numeric(metric):
+            return None
+        method = "nlargest" if largest else "nsmallest"
+        metric_name = metric["name"]
+
+        what = m.group("what")
+        if re.fullmatch(_ROW_WORDS + r"|items", what):
+            return {"intent": "top_n", "confidence": metric_conf, "columns": [metric_name],
+                    "code": f"print(df.{method}({n}, {metric_name!r}).to_string())"}
+
+        entity, entity_conf = _resolve_column(what, columns)
+        if not entity or entity["name"] == metric_name:
+            return None
+        entity_name = entity["name"]
+        confidence = min(metric_conf, entity_conf)
+        if entity.get("unique_count") == summary.get("row_count"):
+            code = f"print(df.{method}({n}, {metric_name!r})[[{entity_name!r}, {metric_name!r}]].to_string(index=False))"
+        else:
+            code = f"print(df.groupby({entity_name!r})[{metric_name!r}].sum().{method}({n}).to_string())"
+        return {"intent": "top_n", "confidence": confidence,
+                "columns": [entity_name, metric_name], "code": code}
+
+    m = _COUNT_BY.fullmatch(query)
+    if m:
+        group, conf = _resolve_column(m.group("group") or m.group("vc_group"), columns)
+        if not group:
+            return None
+        if m.group("noun"):
+            # "how many orders per region" counts rows, which is only a guess
+            conf = min(conf, 0.8)
+        name = group["name"]
+        return {"intent": "count_by", "confidence": conf, "columns": [name],
+                "code": f"print(df[{name!r}].value_counts(dropna=False).to_string())"}
+
+    m = _AGGREGATE.fullmatch(query)
+    if m:
+        agg = _AGGREGATIONS[m.group("agg")]
+        col, conf = _resolve_column(m.group("col"), columns)
+        if not col or not _is_numeric(col):
+            return None
+        name = col["name"]
+        label = _AGG_LABELS[agg]
+        if not m.group("group"):
+            return {"intent": "aggregate", "confidence": conf, "columns": [name],
+                    "code": f'print("{label} of", {name!r} + ":", df[{name!r}].{agg}())'}
+        group, group_conf = _resolve_column(m.group("group"), columns)
+        if not group or group["name"] == name:
+            return None
+        group_name = group["name"]
+        return {"intent": "grouped_aggregate", "confidence": min(conf, group_conf),
+                "columns": [name, group_name],
+                "code": f"print(df.groupby({group_name!r})[{name!r}].{agg}().sort_values(ascending=False).to_string())"}
+
+    return None
+
+
+def plan_query(user_query: str, summary: Dict[str, Any],
+               threshold: float = CONFIDENCE_THRESHOLD) -> Optional[Dict[str, Any]]:
+    """
+    Map a common aggregate question straight to pandas code using the dataset summary.
+
+    Args:
+        user_query: The user's question about the data
+        summary: Dataset summary produced by summarize_dataframe
+        threshold: Minimum confidence required to use the plan
+
+    Returns:
+        Dict with intent, confidence, columns and code (expects the frame as `df`),
+        or None when the question should go to LLM code generation.
+    """
+    raw = str(user_query).lower()
+    plan = None
+    if not _FALLBACK_PATTERN.search(raw):
+        query = _strip_fillers(_normalize(raw))
+        plan = _plan(query, summary)
+
+    if plan is None or plan["confidence"] < threshold:
+        _planner_stats["misses"] += 1
+        return None
+
+    _planner_stats["hits"] += 1
+    return plan
+
+
+def planner_stats() -> Dict[str, Any]:
+    """Return how often questions were answered without code generation."""
+    total = _planner_stats["hits"] + _planner_stats["misses"]
+    return {
+        "hits": _planner_stats["hits"],
+        "misses": _planner_stats["misses"],
+        "hit_rate": round(_planner_stats["hits"] / total, 3) if total else 0.0,
+    }
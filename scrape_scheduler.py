@@ -0,0 +1,121 @@
+# scrape_scheduler.py
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Pages fetched at the same time across all scrape_many calls
+MAX_CONCURRENT_SCRAPES = 8
+
+# Politeness per host: at most this many requests in flight, started at least this far apart
+PER_DOMAIN_CONCURRENCY = 2
+PER_DOMAIN_INTERVAL_SECONDS = 0.5
+
+# Default time budget for a whole scrape_many call
+DEFAULT_DEADLINE_SECONDS = 45
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SCRAPES, thread_name_prefix="scrape")
+
+# Deadline (time.monotonic()) of the job running in the current context, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("scrape_deadline", default=None)
+
+_domains: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+_stats = {"jobs": 0, "timeouts": 0, "throttle_waits": 0, "throttle_wait_seconds": 0.0}
+
+
+def time_left(default: float) -> float:
+    """Seconds the current job may still spend (``default`` when it has no deadline)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    return min(default, deadline - time.monotonic())
+
+
+def _domain(host: str) -> Dict[str, Any]:
+    with _lock:
+        if host not in _domains:
+            _domains[host] = {"slots": threading.Semaphore(PER_DOMAIN_CONCURRENCY), "next_start": 0.0}
+        return _domains[host]
+
+
+@contextmanager
+def domain_slot(url: str, timeout: float):
+    """
+    Hold one of the host's request slots, waiting for a free slot and for the
+    host's minimum interval since the previous request.
+
+    Raises:
+        TimeoutError: if the request could not start within ``timeout`` seconds
+    """
+    host = (urlsplit(url).hostname or "").lower()
+    domain = _domain(host)
+    started = time.monotonic()
+    if not domain["slots"].acquire(timeout=max(timeout, 0)):
+        raise TimeoutError(f"No free connection slot for {host} within {timeout:.0f}s")
+    try:
+        with _lock:
+            start_at = max(time.monotonic(), domain["next_start"])
+            domain["next_start"] = start_at + PER_DOMAIN_INTERVAL_SECONDS
+        delay = start_at - time.monotonic()
+        if delay > 0:
+            if time.monotonic() + delay - started > timeout:
+                raise TimeoutError(f"Rate limit for {host} would delay the request past its deadline")
+            time.sleep(delay)
+        waited = time.monotonic() - started
+        if waited > 0.01:
+            with _lock:
+                _stats["throttle_waits"] += 1
+                _stats["throttle_wait_seconds"] += waited
+        yield
+    finally:
+        domain["slots"].release()
+
+
+def _run_job(fn: Callable[[str], Dict[str, Any]], url: str, deadline: float) -> Dict[str, Any]:
+    _deadline.set(deadline)
+    return fn(url)
+
+
+def run_all(urls: List[str], fn: Callable[[str], Dict[str, Any]],
+            deadline_seconds: float = DEFAULT_DEADLINE_SECONDS) -> List[Dict[str, Any]]:
+    """
+    Run fn(url) for every URL concurrently and collect the results in input order.
+
+    Jobs share the global worker cap; each runs in a copy of the caller's context
+    (session id) with the call's deadline, which fetches honour through time_left
+    and domain_slot. URLs still running when the deadline passes get a "timeout"
+    result; raised exceptions become "error" results.
+    """
+    deadline = time.monotonic() + deadline_seconds
+    futures = [
+        _executor.submit(contextvars.copy_context().run, _run_job, fn, url, deadline)
+        for url in urls
+    ]
+    wait(futures, timeout=max(deadline - time.monotonic(), 0))
+
+    results = []
+    for url, future in zip(urls, futures):
+        if not future.done():
+            future.cancel()
+            results.append({"status": "timeout", "note": f"Not finished within {deadline_seconds:.0f}s",
+                            "meta": {"fetched_url": url}})
+            with _lock:
+                _stats["timeouts"] += 1
+        elif future.exception() is not None:
+            results.append({"status": "error", "error": str(future.exception()), "meta": {"fetched_url": url}})
+        else:
+            results.append(future.result())
+    with _lock:
+        _stats["jobs"] += len(urls)
+    return results
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    """Jobs run, deadline misses and time spent waiting on per-host limits."""
+    with _lock:
+        return {**_stats, "throttle_wait_seconds": round(_stats["throttle_wait_seconds"], 2),
+                "hosts": len(_domains), "max_concurrent": MAX_CONCURRENT_SCRAPES}
@@ -1,9 +1,13 @@
 # session_context.py
 from contextvars import ContextVar
+from typing import Any, Callable, Dict
 
 # Context variable to store the current session ID
 session_id_var: ContextVar[str] = ContextVar('session_id', default='default')
 
+# Progress listeners: session_id -> callback receiving progress events (set by the websocket)
+_progress_listeners: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+
 def get_session_id() -> str:
     """Get the current session ID from context."""
     return session_id_var.get()
@@ -11,3 +15,22 @@ def get_session_id() -> str:
 def set_session_id(session_id: str) -> None:
     """Set the session ID in context."""
     session_id_var.set(session_id)
+
+def set_progress_listener(session_id: str, listener: Callable[[Dict[str, Any]], None]) -> None:
+    """Register the callback that receives a session's progress events."""
+    _progress_listeners[session_id] = listener
+
+def clear_progress_listener(session_id: str, listener: Callable[[Dict[str, Any]], None]) -> None:
+    """Remove a session's progress callback, unless a newer connection has replaced it."""
+    if _progress_listeners.get(session_id) is listener:
+        del _progress_listeners[session_id]
+
+def report_progress(tool: str, message: str, **details: Any) -> None:
+    """Send a progress event for the current session to its listener, if one is connected."""
+    listener = _progress_listeners.get(get_session_id())
+    if listener is None:
+        return
+    try:
+        listener({"type": "progress", "tool": tool, "content": message, **details})
+    except Exception as e:
+        print(f"DEBUG: Progress listener failed: {e}")
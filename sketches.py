@@ -0,0 +1,397 @@
+# sketches.py
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Optional: pyarrow's streaming CSV reader is several times faster than pandas chunks
+try:
+    import pyarrow.csv as pa_csv
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+# Rows read per chunk when streaming a CSV with pandas
+CHUNK_ROWS = 200_000
+
+# Bytes per block for the pyarrow streaming reader
+BLOCK_BYTES = 16 * 1024 * 1024
+
+# HyperLogLog precision: 2**12 registers, ~1.6% standard error
+HLL_PRECISION = 12
+
+
+def _normalized(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Give each column a stable representation so hashes agree across chunks (1 == 1.0)."""
+    out = {}
+    for col in chunk.columns:
+        series = chunk[col]
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            out[col] = series.astype("float64")
+        else:
+            out[col] = series.astype(str).where(series.notna())
+    return pd.DataFrame(out, index=chunk.index)
+
+
+def _hashes(values: pd.Series) -> np.ndarray:
+    """
+    64-bit hash per value. Text that parses as a number hashes like that number,
+    so a column read as text in one chunk and as numbers in another ("1" and 1.0)
+    counts each value once.
+    """
+    hashes = pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy(np.uint64)
+    if pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+        numbers = pd.to_numeric(values, errors="coerce")
+        numeric = numbers.notna().to_numpy()
+        if numeric.any():
+            hashes = hashes.copy()
+            hashes[numeric] = pd.util.hash_pandas_object(
+                numbers[numeric].astype("float64"), index=False).to_numpy(np.uint64)
+    return hashes
+
+
+def _combine_hashes(column_hashes: List[np.ndarray]) -> np.ndarray:
+    """Row hashes from per-column hashes (FNV-style fold, then a splitmix64 finalizer)."""
+    row = np.zeros(len(column_hashes[0]), dtype=np.uint64)
+    for h in column_hashes:
+        row = (row * np.uint64(0x100000001B3)) ^ h
+    row ^= row >> np.uint64(30)
+    row *= np.uint64(0xBF58476D1CE4E5B9)
+    row ^= row >> np.uint64(27)
+    row *= np.uint64(0x94D049BB133111EB)
+    row ^= row >> np.uint64(31)
+    return row
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch over 64-bit hashes."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # The remaining 64-p bits fit exactly in a float64, so frexp gives their bit length
+        rest_bits = 64 - self.p
+        rest = (hashes & np.uint64((1 << rest_bits) - 1)).astype(np.float64)
+        _, bit_length = np.frexp(rest)
+        rank = (rest_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            raw = self.m * np.log(self.m / zeros)
+        return int(round(raw))
+
+
+class ReservoirSample:
+    """Uniform fixed-size sample of a stream (Algorithm R, vectorized per chunk)."""
+
+    def __init__(self, size: int = 1_000, seed: int = 0):
+        self.size = size
+        self.seen = 0
+        self.items: List[Any] = []
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values) -> None:
+        values = np.asarray(values)
+        fill = min(len(values), self.size - len(self.items))
+        if fill > 0:
+            self.items.extend(values[:fill].tolist())
+        rest = len(values) - max(fill, 0)
+        if rest > 0:
+            positions = self.seen + max(fill, 0) + np.arange(rest)
+            slots = self.rng.integers(0, positions + 1)
+            # Only a handful of items per chunk replace a slot, so this loop stays short
+            for i in np.nonzero(slots < self.size)[0]:
+                self.items[slots[i]] = values[max(fill, 0) + i]
+        self.seen += len(values)
+
+    def merge(self, other: "ReservoirSample") -> None:
+        total = self.seen + other.seen
+        if total == 0:
+            return
+        take_other = self.rng.binomial(self.size, other.seen / total) if other.seen else 0
+        mine = list(self.rng.permutation(np.array(self.items, dtype=object)))[:self.size - take_other]
+        theirs = list(self.rng.permutation(np.array(other.items, dtype=object)))[:take_other]
+        self.items = mine + theirs
+        self.seen = total
+
+
+class QuantileSketch:
+    """KLL-style mergeable quantile sketch: compacts sorted buffers level by level."""
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(self.k * (2 / 3) ** depth))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            buf = self.levels[level]
+            if len(buf) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                buf = np.sort(buf)
+                even = len(buf) - len(buf) % 2
+                promoted = buf[:even][int(self.rng.integers(2))::2]
+                self.levels[level] = buf[even:]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, buf in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], buf])
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        if self.count == 0:
+            return [None for _ in qs]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(buf), 2.0 ** level) for level, buf in enumerate(self.levels)])
+        order = np.argsort(items)
+        items, cumulative = items[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+        return [float(items[min(np.searchsorted(cumulative, q * total), len(items) - 1)]) for q in qs]
+
+
+class ColumnSketch:
+    """Null count, distinct count, sample and (for numbers) range and quantiles of one column."""
+
+    def __init__(self, reservoir_size: int = 1_000, quantile_k: int = 200, seed: int = 0):
+        self.dtypes: List[str] = []
+        self.numeric = True
+        self.nulls = 0
+        self.count = 0
+        self.distinct = HyperLogLog()
+        self.sample = ReservoirSample(reservoir_size, seed)
+        self.quantile = QuantileSketch(quantile_k, seed)
+        self.min = None
+        self.max = None
+        self.total = 0.0
+
+    def update(self, raw: pd.Series, normalized: pd.Series, hashes: np.ndarray) -> None:
+        is_number = pd.api.types.is_numeric_dtype(raw) and not pd.api.types.is_bool_dtype(raw)
+        # An all-null chunk parses as float64 and says nothing about the column's type
+        if raw.notna().any():
+            dtype = str(raw.dtype)
+            if dtype not in self.dtypes:
+                self.dtypes.append(dtype)
+            if not is_number:
+                self.numeric = False
+
+        present = normalized.notna().to_numpy()
+        non_null = normalized[present]
+        self.nulls += len(raw) - len(non_null)
+        self.count += len(raw)
+        self.distinct.add_hashes(hashes[present])
+        self.sample.update(raw.dropna().to_numpy())
+
+        if is_number and len(non_null):
+            values = non_null.to_numpy(np.float64)
+            self.quantile.update(values)
+            self.total += float(values.sum())
+            low, high = float(values.min()), float(values.max())
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+
+    def merge(self, other: "ColumnSketch") -> None:
+        self.dtypes += [d for d in other.dtypes if d not in self.dtypes]
+        self.numeric = self.numeric and other.numeric
+        self.nulls += other.nulls
+        self.count += other.count
+        self.distinct.merge(other.distinct)
+        self.sample.merge(other.sample)
+        self.quantile.merge(other.quantile)
+        self.total += other.total
+        for attr, pick in (("min", min), ("max", max)):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, pick(values) if values else None)
+
+    def dtype(self) -> str:
+        if not self.dtypes:
+            return "float64"
+        if len(self.dtypes) == 1:
+            return self.dtypes[0]
+        if self.numeric:
+            return "float64"
+        return "object"
+
+
+class DatasetSketch:
+    """Streaming profile of a whole dataset, built one chunk at a time."""
+
+    def __init__(self, reservoir_size: int = 1_000, quantile_k: int = 200, seed: int = 0):
+        self.reservoir_size = reservoir_size
+        self.quantile_k = quantile_k
+        self.seed = seed
+        self.rows = 0
+        self.bytes_per_row = 0.0
+        self.columns: Dict[str, ColumnSketch] = {}
+        self.distinct_rows = HyperLogLog()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if chunk.empty:
+            return
+        normalized = _normalized(chunk)
+        column_hashes = []
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnSketch(self.reservoir_size, self.quantile_k, self.seed)
+            hashes = _hashes(normalized[col])
+            self.columns[col].update(chunk[col], normalized[col], hashes)
+            column_hashes.append(hashes)
+        self.distinct_rows.add_hashes(_combine_hashes(column_hashes))
+
+        chunk_bytes = float(chunk.memory_usage(deep=True).sum())
+        total = self.rows + len(chunk)
+        self.bytes_per_row = (self.bytes_per_row * self.rows + chunk_bytes) / total
+        self.rows = total
+
+    def merge(self, other: "DatasetSketch") -> None:
+        for col, sketch in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(sketch)
+            else:
+                self.columns[col] = sketch
+        self.distinct_rows.merge(other.distinct_rows)
+        total = self.rows + other.rows
+        if total:
+            self.bytes_per_row = (self.bytes_per_row * self.rows + other.bytes_per_row * other.rows) / total
+        self.rows = total
+
+    def _duplicate_margin(self) -> int:
+        """Three standard errors of the distinct-row count, in rows."""
+        return int(3 * 1.04 / np.sqrt(self.distinct_rows.m) * self.rows)
+
+    def _duplicate_estimate(self) -> Optional[int]:
+        # Differences inside the margin are noise: None says "unknown, below the
+        # margin", not "no duplicates"
+        duplicates = int(self.rows) - self.distinct_rows.estimate()
+        return duplicates if duplicates > self._duplicate_margin() else None
+
+    def to_summary(self, sample_values: int = 5, categorical_threshold: float = 0.05) -> Dict[str, Any]:
+        """Summary in the same shape as summarize_dataframe, with approximate statistics."""
+        from data_profiler import _infer_semantic_type
+
+        summary = {
+            "row_count": int(self.rows),
+            "column_count": len(self.columns),
+            "memory_usage_mb": round(self.bytes_per_row * self.rows / 1e6, 2),
+            "engine": "sketch",
+            "duplicate_rows_estimate": self._duplicate_estimate(),
+            "duplicate_rows_margin": self._duplicate_margin(),
+            "columns": []
+        }
+        for name, sketch in self.columns.items():
+            unique_count = min(sketch.distinct.estimate(), sketch.count - sketch.nulls)
+            examples = [v.item() if isinstance(v, np.generic) else v
+                        for v in pd.unique(pd.Series(sketch.sample.items, dtype=object))[:sample_values]]
+            if sketch.numeric:
+                role = "numeric"
+            elif unique_count <= categorical_threshold * max(sketch.count, 1):
+                role = "categorical"
+            else:
+                role = "text"
+
+            column_info = {
+                "name": name,
+                "dtype": sketch.dtype(),
+                "role": role,
+                "missing_count": int(sketch.nulls),
+                "missing_percent": round(sketch.nulls / sketch.count * 100, 2) if sketch.count else 0.0,
+                "unique_count": int(unique_count),
+                "example_values": examples
+            }
+            if role == "numeric" and sketch.quantile.count:
+                p25, p50, p75 = sketch.quantile.quantiles([0.25, 0.5, 0.75])
+                column_info.update({
+                    "min": sketch.min,
+                    "max": sketch.max,
+                    "mean": sketch.total / sketch.quantile.count,
+                    "quantiles": {"p25": p25, "p50": p50, "p75": p75}
+                })
+            if role == "categorical":
+                column_info["semantic_type"] = _infer_semantic_type(examples, str(name))
+            summary["columns"].append(column_info)
+        return summary
+
+
+def profile_csv(file_path: str, chunk_rows: int = CHUNK_ROWS,
+                sketch: Optional[DatasetSketch] = None) -> DatasetSketch:
+    """
+    Build a DatasetSketch in one chunked pass over a CSV file.
+
+    Memory stays bounded by one chunk plus the sketches, whatever the file size.
+
+    Args:
+        file_path: Path to the CSV file
+        chunk_rows: Rows parsed per chunk
+        sketch: Existing sketch to extend (e.g. when appending rows)
+
+    Returns:
+        The updated sketch; call .to_summary() for a dataset summary
+    """
+    sketch = sketch or DatasetSketch()
+    if _HAS_PYARROW:
+        # pyarrow fixes column types from the first block and raises mid-file when a
+        # later block disagrees (e.g. "ABC" in an integer column), so its chunks go
+        # into a separate sketch that is only merged once the whole file was read
+        partial = DatasetSketch(sketch.reservoir_size, sketch.quantile_k, sketch.seed)
+        try:
+            for chunk in _arrow_csv_chunks(file_path):
+                partial.update(chunk)
+        except Exception as e:
+            print(f"DEBUG: pyarrow CSV reader failed ({e}), profiling with pandas chunks")
+        else:
+            sketch.merge(partial)
+            return sketch
+    for chunk in pd.read_csv(file_path, chunksize=chunk_rows):
+        sketch.update(chunk)
+    return sketch
+
+
+def profile_frame(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS,
+                  sketch: Optional[DatasetSketch] = None) -> DatasetSketch:
+    """Build (or extend) a DatasetSketch from an in-memory frame, one slice at a time."""
+    sketch = sketch or DatasetSketch()
+    for start in range(0, len(df), chunk_rows):
+        sketch.update(df.iloc[start:start + chunk_rows])
+    return sketch
+
+
+def _arrow_csv_chunks(file_path: str):
+    """Yield a CSV file as DataFrame chunks read by pyarrow's streaming reader."""
+    reader = pa_csv.open_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(block_size=BLOCK_BYTES),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
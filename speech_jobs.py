@@ -0,0 +1,209 @@
+# speech_jobs.py
+import json
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import http_client
+
+ENDPOINT = "https://speech-to-text-ai.p.rapidapi.com/transcribe"
+API_HOST = "speech-to-text-ai.p.rapidapi.com"
+
+# Remote transcription of a long video can take minutes; nothing may take longer than the deadline
+CONNECT_TIMEOUT_SECONDS = 10
+JOB_DEADLINE_SECONDS = 15 * 60
+
+# Jobs run on a small dedicated pool, never on the agent's worker threads
+MAX_CONCURRENT_JOBS = 4
+
+# Poll interval starts short and backs off to the maximum
+POLL_INITIAL_SECONDS = 0.5
+POLL_MAX_SECONDS = 5.0
+
+# Finished jobs are forgotten after this long (the transcript itself lives in transcript_store)
+FINISHED_JOB_TTL_SECONDS = 60 * 60
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix="speech-job")
+
+# Jobs: job id -> job; running jobs are also reachable by their transcript key
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_by_key: Dict[str, str] = {}
+_lock = threading.Lock()
+
+_FINISHED = ("done", "failed", "timed_out")
+
+
+def _elapsed(job: Dict[str, Any]) -> float:
+    return (job["finished"] or time.monotonic()) - job["submitted"]
+
+
+def _abort(response) -> None:
+    """Stop a response from another thread, interrupting a blocked read."""
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    try:
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    response.close()
+
+
+def _fetch_transcript(job: Dict[str, Any], api_key: str, deadline: float) -> Dict[str, Any]:
+    """
+    Request the transcript, giving up at ``deadline`` (time.monotonic()).
+
+    The read timeout only bounds each socket read, so a response that keeps
+    trickling in is also cut off by a timer that shuts its socket down at the
+    deadline (which interrupts a read in progress), and reads are checked
+    against the deadline as data arrives.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError(f"No transcript after {JOB_DEADLINE_SECONDS}s")
+    response = http_client.get(
+        ENDPOINT,
+        headers={"x-rapidapi-key": api_key, "x-rapidapi-host": API_HOST},
+        params={"url": job["url"], "lang": "en", "task": "transcribe"},
+        timeout=(CONNECT_TIMEOUT_SECONDS, remaining),
+        stream=True
+    )
+    watchdog = threading.Timer(max(deadline - time.monotonic(), 0), _abort, args=(response,))
+    watchdog.daemon = True
+    watchdog.start()
+    try:
+        with response:
+            response.raise_for_status()
+            body = bytearray()
+            while time.monotonic() <= deadline:
+                chunk = response.raw.read1(64 * 1024, decode_content=True)
+                if not chunk:
+                    break
+                body += chunk
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No transcript after {JOB_DEADLINE_SECONDS}s")
+            return json.loads(bytes(body))
+    except Exception:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"No transcript after {JOB_DEADLINE_SECONDS}s")
+        raise
+    finally:
+        watchdog.cancel()
+
+
+def _run(job: Dict[str, Any], api_key: str, on_done: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    job["status"] = "running"
+    job["started"] = time.monotonic()
+    try:
+        # The deadline counts from submission, like wait()'s, so time spent queued is included
+        data = _fetch_transcript(job, api_key, job["submitted"] + JOB_DEADLINE_SECONDS)
+        if "text" not in data:
+            raise RuntimeError(data.get("message") or data.get("error") or f"Unexpected response: {str(data)[:200]}")
+        if job["status"] == "timed_out":
+            return
+        job["result"] = data
+        if on_done is not None:
+            on_done(data)
+        job["status"] = "done"
+    except TimeoutError as e:
+        if job["status"] != "timed_out":
+            job["error"] = str(e)
+            job["status"] = "timed_out"
+    except Exception as e:
+        if job["status"] != "timed_out":
+            job["error"] = str(e)
+            job["status"] = "failed"
+    finally:
+        job["finished"] = job["finished"] or time.monotonic()
+        print(f"DEBUG: Speech job {job['id']} {job['status']} after {_elapsed(job):.1f}s")
+
+
+def _forget_old_jobs() -> None:
+    now = time.monotonic()
+    for job_id, job in list(_jobs.items()):
+        if job["status"] in _FINISHED and now - job["finished"] > FINISHED_JOB_TTL_SECONDS:
+            del _jobs[job_id]
+            if _jobs_by_key.get(job["key"]) == job_id:
+                del _jobs_by_key[job["key"]]
+
+
+def submit(url: str, key: str, api_key: str,
+           on_done: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Start transcribing a video in the background, or return the job already running for it.
+
+    Args:
+        url: Video URL sent to the provider
+        key: Canonical transcript key; concurrent requests for the same video share one job
+        api_key: RapidAPI key
+        on_done: Called with the provider response when the job succeeds (e.g. to store it)
+
+    Returns:
+        The job: id, key, url, status ("queued", "running", "done", "failed" or
+        "timed_out"), result, error and timing
+    """
+    with _lock:
+        _forget_old_jobs()
+        existing = _jobs.get(_jobs_by_key.get(key, ""))
+        if existing is not None and existing["status"] not in ("failed", "timed_out"):
+            return existing
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "key": key,
+            "url": url,
+            "status": "queued",
+            "submitted": time.monotonic(),
+            "started": None,
+            "finished": None,
+            "result": None,
+            "error": None,
+        }
+        _jobs[job["id"]] = job
+        _jobs_by_key[key] = job["id"]
+    _executor.submit(_run, job, api_key, on_done)
+    print(f"DEBUG: Submitted speech job {job['id']} for {url}")
+    return job
+
+
+def wait(job: Dict[str, Any], timeout: float,
+         progress: Optional[Callable[[Dict[str, Any], float], None]] = None) -> Dict[str, Any]:
+    """
+    Poll a job with exponential backoff until it finishes or ``timeout`` seconds pass.
+
+    A job past JOB_DEADLINE_SECONDS is marked "timed_out" even if the provider never answers.
+
+    Args:
+        job: Job returned by submit
+        timeout: How long to wait before returning a job that is still running
+        progress: Called as progress(job, elapsed_seconds) after every poll
+
+    Returns:
+        The job, finished or not
+    """
+    give_up = time.monotonic() + timeout
+    interval = POLL_INITIAL_SECONDS
+    while job["status"] not in _FINISHED:
+        if _elapsed(job) > JOB_DEADLINE_SECONDS:
+            job["status"] = "timed_out"
+            job["error"] = f"No transcript after {JOB_DEADLINE_SECONDS}s"
+            job["finished"] = time.monotonic()
+            break
+        remaining = give_up - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, POLL_MAX_SECONDS)
+        if progress is not None:
+            progress(job, _elapsed(job))
+    return job
+
+
+def job_stats() -> Dict[str, Any]:
+    """Jobs per status."""
+    with _lock:
+        counts: Dict[str, int] = {}
+        for job in _jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"jobs": counts, "max_concurrent": MAX_CONCURRENT_JOBS}
@@ -0,0 +1,238 @@
+# sql_engine.py
+import copy
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+import pandas as pd
+
+# Optional: out-of-core analytics needs duckdb
+try:
+    import duckdb
+    _HAS_DUCKDB = True
+except ImportError:
+    duckdb = None
+    _HAS_DUCKDB = False
+
+from dataset_store import cache_path_for, load_table
+from sketches import DatasetSketch, profile_csv
+
+# Files larger than this are queried in place instead of loaded into pandas
+OUT_OF_CORE_BYTES = 200 * 1024 * 1024
+
+# Memory DuckDB may use before spilling to its temp directory
+MEMORY_LIMIT = "1GB"
+TEMP_DIR = Path(tempfile.gettempdir()) / "duckdb_spill"
+
+# Rows returned by sample() for plotting raw distributions
+SAMPLE_ROWS = 100_000
+
+# Name under which the dataset is exposed to generated SQL
+TABLE_NAME = "data"
+
+_NUMERIC_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                  "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE", "DECIMAL", "REAL")
+
+# Entries kept per cache; older file versions are evicted least recently used first
+CACHE_SIZE = 64
+
+# Cached summaries: source fingerprint(s) -> summary
+_summary_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
+# Cached CSV sketches: file fingerprint -> sketch, merged when a dataset spans several files
+_sketch_cache: "OrderedDict[tuple, DatasetSketch]" = OrderedDict()
+
+_cache_lock = threading.Lock()
+
+
+def is_available() -> bool:
+    return _HAS_DUCKDB
+
+
+def should_use_sql(file_path: str) -> bool:
+    """Whether a file is large enough to be analyzed out of core."""
+    return _HAS_DUCKDB and Path(file_path).stat().st_size > OUT_OF_CORE_BYTES
+
+
+def _quote(path: Path) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def quote_identifier(name: str) -> str:
+    """A table or column name as a DuckDB identifier, whatever characters it contains."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _cache_get(cache: OrderedDict, key: Hashable):
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _cache_put(cache: OrderedDict, key: Hashable, value) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def source_relation(file_path: str) -> str:
+    """
+    Return a DuckDB table expression that scans the dataset in place.
+
+    CSV files are read directly. Excel files are converted once into the
+    Parquet cache (they are bounded by Excel's row limit) and read from there.
+    """
+    path = Path(file_path).resolve()
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        return f"read_csv_auto({_quote(path)})"
+    if ext == ".parquet":
+        return f"read_parquet({_quote(path)})"
+    if ext in (".xls", ".xlsx"):
+        cached = cache_path_for(file_path)
+        if not cached.exists():
+            load_table(file_path)
+        if cached.exists():
+            return f"read_parquet({_quote(cached)})"
+        raise ValueError(f"Could not build a columnar copy of {path.name} for SQL analysis")
+    raise ValueError(f"Unsupported file type: {ext}. Use .csv, .xls, or .xlsx")
+
+
+def sources_relation(file_paths: List[str]) -> str:
+    """Table expression over a dataset stored as several files with the same columns (appended parts)."""
+    if len(file_paths) == 1:
+        return source_relation(file_paths[0])
+    paths = [Path(p).resolve() for p in file_paths]
+    if all(p.suffix.lower() == ".csv" for p in paths):
+        return f"read_csv_auto([{', '.join(_quote(p) for p in paths)}], union_by_name=true)"
+    selects = " UNION ALL BY NAME ".join(f"SELECT * FROM {source_relation(p)}" for p in file_paths)
+    return f"({selects})"
+
+
+def connect(relation: str, tables: Optional[Dict[str, Union[str, pd.DataFrame]]] = None):
+    """
+    Open a DuckDB connection with a spill-to-disk memory limit and the dataset as view `data`.
+
+    Args:
+        relation: Table expression for the primary dataset (see source_relation); may name one of `tables`
+                  (a table already named `data` is then the view itself)
+        tables: Extra datasets to expose by name, as table expressions or in-memory DataFrames
+    """
+    if not _HAS_DUCKDB:
+        raise RuntimeError("duckdb not installed; install with: pip install duckdb")
+    TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(config={"memory_limit": MEMORY_LIMIT, "temp_directory": str(TEMP_DIR)})
+    for name, table in (tables or {}).items():
+        if isinstance(table, pd.DataFrame):
+            con.register(name, table)
+        else:
+            con.execute(f"CREATE VIEW {quote_identifier(name)} AS SELECT * FROM {table}")
+    if TABLE_NAME not in (tables or {}):
+        con.execute(f"CREATE VIEW {TABLE_NAME} AS SELECT * FROM {relation}")
+    return con
+
+
+def _role_for(column_type: str, approx_unique: int, row_count: int) -> str:
+    column_type = column_type.upper()
+    if column_type == "BOOLEAN":
+        return "boolean"
+    if column_type.startswith(("DATE", "TIMESTAMP", "TIME")):
+        return "datetime"
+    if column_type.startswith(_NUMERIC_TYPES):
+        return "numeric"
+    if approx_unique <= 0.05 * row_count:
+        return "categorical"
+    return "text"
+
+
+def _fingerprint(file_path: str) -> tuple:
+    stat = Path(file_path).stat()
+    return (str(Path(file_path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+def sketch_source(file_path: str) -> DatasetSketch:
+    """Sketch of one CSV file, built once per file version."""
+    fingerprint = _fingerprint(file_path)
+    sketch = _cache_get(_sketch_cache, fingerprint)
+    if sketch is None:
+        sketch = profile_csv(file_path)
+        _cache_put(_sketch_cache, fingerprint, sketch)
+    return sketch
+
+
+def summarize_source(file_paths: Union[str, List[str]], sample_values: int = 5) -> Dict[str, Any]:
+    """
+    Summarize a dataset in one streaming pass, in the same shape as summarize_dataframe.
+
+    CSV files are profiled chunk by chunk with mergeable sketches (see sketches.py);
+    other sources use DuckDB's SUMMARIZE. Distinct counts are approximate
+    (HyperLogLog), null counts are exact.
+
+    A dataset made of several appended CSV files merges the per-file sketches, so
+    appending a file only profiles that file.
+    """
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    fingerprint = tuple(_fingerprint(p) for p in file_paths)
+    cached = _cache_get(_summary_cache, fingerprint)
+    if cached is not None:
+        return cached
+
+    if all(Path(p).suffix.lower() == ".csv" for p in file_paths):
+        merged = DatasetSketch()
+        for file_path in file_paths:
+            merged.merge(copy.deepcopy(sketch_source(file_path)))
+        summary = merged.to_summary(sample_values=sample_values)
+        _cache_put(_summary_cache, fingerprint, summary)
+        return summary
+
+    con = connect(sources_relation(file_paths))
+    try:
+        stats = con.execute(f"SUMMARIZE SELECT * FROM {TABLE_NAME}").df()
+        head = con.execute(f"SELECT * FROM {TABLE_NAME} LIMIT 1000").df()
+    finally:
+        con.close()
+
+    row_count = int(stats["count"].iloc[0]) if len(stats) else 0
+    summary = {
+        "row_count": row_count,
+        "column_count": int(len(stats)),
+        "memory_usage_mb": round(sum(Path(p).stat().st_size for p in file_paths) / 1e6, 2),
+        "engine": "duckdb",
+        "columns": []
+    }
+    for _, row in stats.iterrows():
+        name = row["column_name"]
+        approx_unique = int(row["approx_unique"] or 0)
+        null_percent = float(row["null_percentage"] or 0)
+        examples = head[name].dropna().unique()[:sample_values] if name in head else []
+        summary["columns"].append({
+            "name": name,
+            "dtype": row["column_type"],
+            "role": _role_for(row["column_type"], approx_unique, row_count),
+            "missing_count": int(round(null_percent / 100 * row_count)),
+            "missing_percent": round(null_percent, 2),
+            "unique_count": approx_unique,
+            "example_values": [v.item() if hasattr(v, "item") else v for v in examples]
+        })
+
+    _cache_put(_summary_cache, fingerprint, summary)
+    return summary
+
+
+def analysis_namespace(con) -> Dict[str, Callable]:
+    """Helpers exposed to generated code: sql() for full-data queries, sample() for plotting."""
+
+    def sql(query: str) -> pd.DataFrame:
+        return con.execute(query).df()
+
+    def sample(n: int = SAMPLE_ROWS) -> pd.DataFrame:
+        return con.execute(f"SELECT * FROM {TABLE_NAME} USING SAMPLE {int(n)} ROWS").df()
+
+    return {"sql": sql, "sample": sample}
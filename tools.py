@@ -1,31 +1,75 @@
 # tools.py
 from langchain_core.tools import tool
+import io
 import json
 from pathlib import Path
 from groq import Groq
 from dotenv import load_dotenv
 import requests
 import os
+import time
 import google.genai as genai
 from google.genai import types
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from bs4 import BeautifulSoup
-from utilities import summarize_text
+from query_planner import plan_query, planner_stats
+from audio_pipeline import transcribe_file
+from speech_jobs import submit as submit_speech_job, wait as wait_for_speech_job
+from video_analysis import answer_question as answer_video_question
+from image_pipeline import explain_images
+from transcript_store import (
+    file_key,
+    canonical_video_key,
+    get_transcript,
+    save_transcript,
+    transcript_excerpt,
+)
+from data_profiler import summarize_dataframe, get_cached_summary, store_summary, encode_summary_for_prompt
+from dataset_store import load_table, read_header, column_kinds
+from dataset_registry import (
+    register_dataset,
+    append_dataset,
+    find_append_target,
+    get_entry,
+    dataset_name_for,
+    list_datasets as list_registered_datasets,
+)
+from sql_engine import (
+    should_use_sql,
+    summarize_source,
+    sources_relation,
+    is_available as sql_engine_available,
+    connect as sql_connect,
+    quote_identifier as sql_quote_identifier,
+    analysis_namespace as sql_analysis_namespace,
+)
 import pandas as pd
 import numpy as np
-import http.client
+import http_client
+import scrape_scheduler
+from passage_ranker import compress
+from page_cache import normalize_url
 
 
 try:
     from ddgs import DDGS
 except ImportError:
     DDGS = None
-from Scraper import _fetch_html,_clean_text,_word_snippet,_find_nearby_urls,_extract_table_structure
+from Scraper import _load_page,_clean_text,_keyword_snippets,_summarize_entries,_table_overview,_table_rows
 load_dotenv()
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 RAPID_API_KEY = os.getenv("RAPID_API_KEY")
 gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
+# How long SpeechToText waits for its background job before handing the turn back
+SPEECH_INLINE_WAIT_SECONDS = 90
+
+# Most pages scrape_many fetches in one call
+SCRAPE_MANY_MAX_URLS = 10
+
+# Most table rows get_table_rows returns in one call
+MAX_TABLE_ROWS = 100
+
 
 @tool
 def calculator(a: float, b: float) -> float:
@@ -111,8 +155,26 @@ def run_python_code(code: str):
 
 
 
+def _whisper_transcribe(audio: bytes, filename: str) -> Dict[str, Any]:
+    """Transcribe one audio chunk with Groq Whisper (the transcription function for audio_pipeline)."""
+    transcription = client.audio.transcriptions.create(
+        file=(filename, audio), # Required audio file
+        model="whisper-large-v3-turbo", # Required model to use for transcription
+        prompt="Specify context or spelling",  # Optional
+        response_format="verbose_json",  # Optional
+        language="en",  # Optional
+        temperature=0.0  # Optional
+    )
+    segments = []
+    for segment in getattr(transcription, "segments", None) or []:
+        if not isinstance(segment, dict):
+            segment = segment.model_dump() if hasattr(segment, "model_dump") else vars(segment)
+        segments.append({"start": segment["start"], "end": segment["end"], "text": segment["text"]})
+    return {"text": transcription.text, "segments": segments}
+
+
 @tool
-def convert_audio_to_text(audio_file: str) -> str:
+def convert_audio_to_text(audio_file: str, trim_silence: bool = False) -> str:
     """Transcribe an audio file to text. 
     
     IMPORTANT: This tool requires the FULL ABSOLUTE PATH to the audio file. 
@@ -121,6 +183,7 @@ def convert_audio_to_text(audio_file: str) -> str:
     
     Args:
         audio_file: The absolute path to the audio file (e.g., "C:\\Users\\...\\Files\\Strawberrypie.mp3")
+        trim_silence: Cut long silences before uploading (faster for recordings with long pauses)
     
     Returns:
         The transcribed text from the audio file, or an error message if the file is not found.
@@ -134,16 +197,22 @@ def convert_audio_to_text(audio_file: str) -> str:
             available_files = list_attached_files()
             return f"ERROR: File not found at path '{filename}'. The file does not exist at this location. Please use list_attached_files() first to get the correct absolute path. Available files: {available_files}"
         
-        with open(filename, "rb") as file:
-            transcription = client.audio.transcriptions.create(
-                file=file, # Required audio file
-                model="whisper-large-v3-turbo", # Required model to use for transcription
-                prompt="Specify context or spelling",  # Optional
-                response_format="verbose_json",  # Optional
-                language="en",  # Optional
-                temperature=0.0  # Optional
-            )
-        return transcription.text
+        # The same audio (by content hash) is only ever transcribed once
+        key = file_key(filename)
+        stored = get_transcript(key)
+        if stored is not None:
+            print(f"DEBUG: Using stored transcript {key}")
+            return stored["text"]
+
+        # Audio is downmixed to 16 kHz mono and re-encoded before upload; long
+        # recordings are split at silences and the chunks transcribed in parallel
+        result = transcribe_file(filename, _whisper_transcribe, trim_silence=trim_silence)
+        if result["failed_chunks"] and len(result["failed_chunks"]) == result["chunks"]:
+            return f"ERROR: Transcription of '{audio_file}' failed for every chunk. Please try again later."
+        if not result["failed_chunks"]:
+            save_transcript(key, filename, result["text"], result["segments"], result["duration"],
+                            provider="groq:whisper-large-v3-turbo")
+        return result["text"]
     except FileNotFoundError as e:
         available_files = list_attached_files()
         return f"ERROR: FileNotFoundError - The file '{audio_file}' was not found. This usually means you need to use list_attached_files() first to get the correct absolute path. Available files: {available_files}"
@@ -220,44 +289,119 @@ def SpeechToText(url: str) -> str:
     url: could be a youtube, facebook or tiktok URL
 
     Returns:
-    transcription: transcription of the input video in string format
+    transcription: transcription of the input video in string format.
+    Long videos may still be transcribing when this returns; in that case call
+    SpeechToText again with the same URL to collect the result.
 
     IMPORTANT: DO NOT CALL THIS TOOL IF USER IS INTERESTED IN THE VISION ANALYSIS. THIS IS ONLY FOR SPEECH RELATED TASKS
     
     """
-    endpoint = "https://speech-to-text-ai.p.rapidapi.com/transcribe"
-    querystring = {"url":url,"lang":"en","task":"transcribe"}
-    headers = {
-	"x-rapidapi-key": RAPID_API_KEY,
-	"x-rapidapi-host": "speech-to-text-ai.p.rapidapi.com"
-    }
-    response = requests.get(endpoint, headers=headers, params=querystring).json()
-    return response['text']
+    from session_context import report_progress
+
+    # Every URL form of the same video maps to one stored transcript
+    key = canonical_video_key(url)
+    stored = get_transcript(key)
+    if stored is not None:
+        print(f"DEBUG: Using stored transcript {key}")
+        return stored["text"]
+
+    def on_done(response):
+        save_transcript(key, url, response['text'], _speech_segments(response), provider="rapidapi:speech-to-text-ai")
+
+    def on_progress(job, elapsed):
+        report_progress("SpeechToText", f"Transcribing video ({job['status']}, {elapsed:.0f}s elapsed)",
+                        job_id=job["id"], elapsed=round(elapsed, 1))
+
+    # The remote transcription runs as a background job; this call only waits for a bounded time
+    job = submit_speech_job(url, key, RAPID_API_KEY, on_done=on_done)
+    report_progress("SpeechToText", "Transcription job submitted", job_id=job["id"])
+    job = wait_for_speech_job(job, SPEECH_INLINE_WAIT_SECONDS, progress=on_progress)
+
+    if job["status"] == "done":
+        report_progress("SpeechToText", "Transcription finished", job_id=job["id"])
+        return job["result"]['text']
+    if job["status"] in ("failed", "timed_out"):
+        return f"ERROR: Transcription of '{url}' failed: {job['error']}"
+    return (f"Transcription of this video is still running (job {job['id']}, "
+            f"{time.monotonic() - job['submitted']:.0f}s so far). Tell the user it is in progress, "
+            f"then call SpeechToText again with the same URL to get the transcript.")
+
+
+def _speech_segments(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Timestamped segments from a SpeechToText response, in whichever shape the API returned them."""
+    segments = []
+    for chunk in response.get("segments") or response.get("chunks") or []:
+        if "timestamp" in chunk:
+            start, end = chunk["timestamp"]
+        else:
+            start, end = chunk.get("start"), chunk.get("end")
+        if start is None or end is None:
+            continue
+        segments.append({"start": start, "end": end, "text": chunk.get("text", "").strip()})
+    return segments
+
+
+def _format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+@tool
+def get_transcript_excerpt(source: str, start_seconds: float = 0.0, end_seconds: Optional[float] = None) -> str:
+    """Return the timestamped part of an already transcribed audio file or video.
+    
+    Use this for follow-up questions about something that was transcribed before
+    (e.g. "what do they say around minute 5?") instead of transcribing again.
+    
+    Args:
+        source: The audio file path or the video URL that was transcribed (any URL form of the video works)
+        start_seconds: Start of the time range in seconds
+        end_seconds: End of the time range in seconds (default: end of the recording)
+        
+    Returns:
+        One "[m:ss-m:ss] text" line per segment, or an error message if the source was never transcribed
+    """
+    try:
+        key = file_key(source) if os.path.exists(source) else canonical_video_key(source)
+        segments = transcript_excerpt(key, start_seconds, end_seconds)
+        if segments is None:
+            return f"ERROR: '{source}' has not been transcribed yet. Use convert_audio_to_text or SpeechToText first."
+        if not segments:
+            stored = get_transcript(key)
+            if not stored["segments"]:
+                return f"No timestamps are stored for '{source}'. Full transcript: {stored['text']}"
+            until = _format_timestamp(end_seconds) if end_seconds is not None else "the end"
+            return f"No speech between {_format_timestamp(start_seconds)} and {until}."
+        return "\n".join(
+            f"[{_format_timestamp(s['start'])}-{_format_timestamp(s['end'])}] {s['text']}" for s in segments
+        )
+    except Exception as e:
+        return f"ERROR: Failed to read transcript for '{source}': {str(e)}"
 
 @tool 
-def gemini_vision(youtube_url:str,user_query:str) -> str:
+def gemini_vision(youtube_url: str, user_query: str, start_seconds: Optional[float] = None,
+                  end_seconds: Optional[float] = None, reanalyze: bool = False) -> str:
     """
     Explain the youtube video
     Args:
     youtube_url: the youtube_url provided by the user
     user_query: the question asked by the user
+    start_seconds: only watch the video from this time (seconds), for questions about a specific moment
+    end_seconds: only watch the video up to this time (seconds)
+    reanalyze: watch the whole video again instead of using the stored description
+        (only when the user says an earlier answer about this video was wrong)
+
+    The first question about a video stores a scene-by-scene description of it, so
+    follow-up questions about the same video are answered much faster.
 
     IMPORTANT: ALWAYS CALL THIS TOOL FOR VISION RELATED TASKS
     returns:
     response: generate by the gemini model in form of string
     """
-    response = gemini_client.models.generate_content(
-    model='models/gemini-2.5-flash',
-    contents=types.Content(
-        parts=[
-            types.Part(
-                file_data=types.FileData(file_uri=youtube_url)
-            ),
-            types.Part(text=user_query)
-        ]
-    )
-)
-    return response.text
+    result = answer_video_question(gemini_client, youtube_url, user_query, start_seconds, end_seconds, reanalyze)
+    print(f"DEBUG: gemini_vision answered from {result['source']}")
+    return result["answer"]
 
 @tool
 def reverse_string(text:str) -> str:
@@ -318,10 +462,12 @@ def web_search(user_query: str) -> str:
 def scrape_data(url: str,
                 selector: Optional[str] = None,
                 keyword: Optional[str] = None,
+                keywords: Optional[List[str]] = None,
                 js: bool = False,
                 max_snippets: int = 5,
                 window_words: int = 20,
-                user_query: Optional[str] = None) -> Dict[str, Any]:
+                user_query: Optional[str] = None,
+                summarize: bool = False) -> Dict[str, Any]:
     """
     Scrape a webpage and extract content based on different modes.
     
@@ -334,17 +480,23 @@ def scrape_data(url: str,
         url (str): The URL of the webpage to scrape.
         selector (Optional[str]): CSS selector to extract specific elements (e.g., "article", "table", ".class-name").
                                   If None and keyword is also None, returns page structure info.
+                                  Standard CSS3 selectors only (no :-soup-contains() or other
+                                  BeautifulSoup extensions).
         keyword (Optional[str]): Search for a specific keyword in the page text. Returns snippets with context.
+        keywords (Optional[List[str]]): Several keywords to search for in one call (e.g. a name and its synonyms);
+                                        nearby matches are merged into one snippet.
         js (bool): Whether to render JavaScript (requires Playwright). Default is False.
-        max_snippets (int): Maximum number of snippets to return. Default is 5.
+        max_snippets (int): Maximum number of matches used per keyword. Default is 5.
         window_words (int): Number of words before and after keyword match to include in snippet. Default is 20.
-        user_query (Optional[str]): The user's original query for query-aware compression. Used internally for summarization.
+        user_query (Optional[str]): The user's original query; the most relevant passages of long results are kept.
+        summarize (bool): Summarize results with the LLM instead of extracting passages locally (slower). Default is False.
     
     Returns:
         Dict[str, Any]: A dictionary with the following structure:
             - status: "ok", "error", "not_found"
-            - snippets: List of keyword-based text snippets with nearby URLs (if keyword search)
-            - selector_results: List of extracted content from CSS selectors (if selector used)
+            - snippets: List of keyword-based text snippets with the keywords they contain and nearby URLs (if keyword search)
+            - selector_results: List of extracted content from CSS selectors (if selector used);
+                                tables give their table_id, schema and first rows (see get_table_rows)
             - headings: List of page headings h1, h2, h3 (if initial exploration)
             - selectors_hint: List of available selectors found on page (if initial exploration)
             - meta: Dictionary with fetched_url and final_url
@@ -352,24 +504,21 @@ def scrape_data(url: str,
     
     Usage Notes (for the agent):
         - First call with only url to explore page structure (get headings and selector hints)
-        - Use keyword parameter to search for specific text content
+        - Use keyword parameter to search for specific text content (keywords for several at once)
         - Use selector parameter to extract structured content (tables, articles, lists, etc.)
         - Set js=True if the page requires JavaScript rendering
         - Combine with web_search() to find relevant URLs first, then scrape them
     """
 
-    fetched = _fetch_html(url, js=js)
-    if "error" in fetched:
-        return {"status": "error", "error": fetched["error"], "meta": {"fetched_url": url}}
-
-    html = fetched["html"]
-    final_url = fetched.get("final_url", url)
-    soup = BeautifulSoup(html, "html.parser")
+    # A keyword-only search may stop downloading once every term has enough matches
+    terms = ([keyword] if keyword else []) + list(keywords or [])
+    stop_terms = terms if terms and not selector else None
+    loaded = _load_page(url, js=js, stop_terms=stop_terms, enough_matches=max_snippets)
+    if "error" in loaded:
+        return {"status": "error", "error": loaded["error"], "meta": {"fetched_url": url}}
 
-    for tag in soup(["script", "style", "noscript", "iframe"]):
-        tag.decompose()
-
-    page_text = _clean_text(soup.get_text(" ", strip=True))
+    page = loaded["page"]
+    final_url = page.final_url
 
     result = {
         "status": "ok",
@@ -380,12 +529,12 @@ def scrape_data(url: str,
     }
 
     # CASE 1 ------------------ Initial call (no keyword + no selector)
-    if not selector and not keyword:
-        headings = [h.get_text(" ", strip=True) for h in soup.select("h1, h2, h3")][:40]
+    if not selector and not keyword and not keywords:
+        headings = [page.element_text(h) for h in page.find_all("h1", "h2", "h3")][:40]
         selectors_found = []
 
         for sel in ["table", "article", "main", "ul", "ol"]:
-            if soup.select_one(sel):
+            if page.has_tag(sel):
                 selectors_found.append(sel)
 
         result["headings"] = headings
@@ -393,83 +542,53 @@ def scrape_data(url: str,
         return result
 
     # CASE 2 ------------------ Keyword search
-    if keyword:
-        low = page_text.lower()
-        kw = keyword.lower()
-
-        matches = []
-        start = 0
-        while len(matches) < max_snippets:
-            idx = low.find(kw, start)
-            if idx == -1:
-                break
-            matches.append((idx, idx + len(kw)))
-            start = idx + len(kw)
-
-
-        if matches:
-            for i, span in enumerate(matches):
-               
-                snippet, _, _ = _word_snippet(page_text, span, window_words=window_words)
-          
-
-                # Find the most specific (smallest) element containing the keyword
-                element = None
-                elements_checked = 0
-                candidate_elements = []
-                
-                # Skip these large container elements
-                skip_tags = {'html', 'body', 'main', 'div', 'section', 'article'}
-                
-                for el in soup.find_all():
-                    elements_checked += 1
-                    try:
-                        el_text = el.get_text(" ", strip=True).lower()
-                        if kw in el_text:
-                            # Skip very large elements (likely page containers)
-                            if len(el_text) > 500:
-                                continue
-                            # Prefer smaller, more specific elements
-                            candidate_elements.append((el, len(el_text)))
-                    except:
-                        continue
-                
-                if candidate_elements:
-                    # Sort by text length (smallest first) and take the most specific
-                    candidate_elements.sort(key=lambda x: x[1])
-                    element = candidate_elements[-1][0]
-                   
+    if terms:
+        found = _keyword_snippets(page, terms, max_snippets=max_snippets, window_words=window_words)
+
+        if found:
+            for found_snippet in found:
+                snippet = found_snippet["text"]
+
+                # The most specific (innermost) element containing the (first) match
+                element = page.element_for_span(*found_snippet["span"])
 
-                urls = _find_nearby_urls(soup, element) if element else []
+                urls = page.links_near(element) if element is not None else []
                 
                 # Compress the snippet text to reduce token usage
-                try:
-                    compressed_snippet = summarize_text(snippet, query=user_query)
-                except Exception as e:
-                    # If summarization fails, use original snippet
-                    print(f"Summarization failed for snippet: {e}")
-                    compressed_snippet = snippet
+                compressed_snippet = snippet if summarize else compress(
+                    snippet, query=user_query, keywords=found_snippet["keywords"])
                 
                 snippet_entry = {
                     "text": compressed_snippet,
+                    "keywords": found_snippet["keywords"],
                     "urls": urls
                 }
 
                 result["snippets"].append(snippet_entry)
 
+            if summarize:
+                _summarize_entries(result["snippets"], query=user_query)
             return result
 
         else:
             if not selector:
                 return {
                     "status": "not_found",
-                    "note": f"Keyword '{keyword}' not found on page.",
+                    "note": f"Keyword(s) {', '.join(repr(t) for t in terms)} not found on page.",
                     "meta": result["meta"]
                 }
 
     # CASE 3 ------------------ CSS Selector extraction
     if selector:
-        elems = soup.select(selector)
+        try:
+            elems = page.select(selector)
+        except Exception as e:
+            # cssselect (lxml backend) does not know soupsieve extensions such as :-soup-contains()
+            return {
+                "status": "error",
+                "error": f"Invalid or unsupported CSS selector '{selector}': {e}",
+                "meta": result["meta"]
+            }
         if not elems:
             return {
                 "status": "not_found",
@@ -479,55 +598,21 @@ def scrape_data(url: str,
 
         for el in elems[:max_snippets]:
             # Check if this is a table element
-            if el.name == 'table':
-                urls = [a.get("href") for a in el.select("a[href]")]
-                table_text = _clean_text(el.get_text(" ", strip=True))
-
-                # Use pandas to extract a clean table representation
-                try:
-                    dfs = pd.read_html(str(el))
-                    if dfs:
-                        df = dfs[0]
-                        table_data = {
-                            "columns": [str(col) for col in df.columns],
-                            "rows": df.to_dict(orient="records"),
-                            "row_count": len(df)
-                        }
-                    else:
-                        table_data = {
-                            "columns": None,
-                            "rows": [],
-                            "row_count": 0
-                        }
-                except Exception as e:
-                    print(f"Pandas failed to parse table: {e}")
-                    table_data = _extract_table_structure(el)
-
-                # Compress table text while preserving structured data
-                try:
-                    compressed_text = summarize_text(table_text, query=user_query)
-                except Exception as e:
-                    print(f"Summarization failed for table: {e}")
-                    compressed_text = table_text
-
+            if page.name(el) == 'table':
+                # Schema and a preview only; rows come from get_table_rows with the table_id
                 result["selector_results"].append({
                     "selector": selector,
                     "type": "table",
-                    "table_data": table_data,
-                    "text": compressed_text,
-                    "urls": urls[:5]
+                    "table_data": _table_overview(page, el),
+                    "urls": page.links_in(el)[:5]
                 })
             else:
                 # For non-table elements, use existing text extraction
-                text = _clean_text(el.get_text(" ", strip=True))
-                urls = [a.get("href") for a in el.select("a[href]")]
+                text = page.element_text(el)
+                urls = page.links_in(el)
                 
                 # Compress the extracted text
-                try:
-                    compressed_text = summarize_text(text, query=user_query)
-                except Exception as e:
-                    print(f"Summarization failed for text: {e}")
-                    compressed_text = text
+                compressed_text = text if summarize else compress(text, query=user_query, keywords=terms)
                 
                 result["selector_results"].append({
                     "selector": selector,
@@ -535,109 +620,141 @@ def scrape_data(url: str,
                     "text": compressed_text,  # Use compressed version
                     "urls": urls[:5]
                 })
-        
+
+        if summarize:
+            _summarize_entries(result["selector_results"], query=user_query)
         return result
 
     return {"status": "not_found", "note": "No matches found", "meta": result["meta"]}
 
 
-def summarize_dataframe(
-    df: pd.DataFrame,
-    sample_values: int = 5,
-    categorical_threshold: float = 0.05
-) -> Dict[str, Any]:
-    print("DEBUG: Inside summarize_dataframe")
-    """
-    Generate a robust, LLM-friendly summary of a pandas DataFrame.
-
-    Parameters
-    ----------
-    df : pd.DataFrame
-        Input dataframe
-    sample_values : int
-        Number of unique example values to capture per column
-    categorical_threshold : float
-        Max ratio of unique values to rows for categorical inference
-
-    Returns
-    -------
-    Dict[str, Any]
-        JSON-serializable dataset summary
+@tool
+def scrape_many(urls: List[str],
+                selector: Optional[str] = None,
+                keyword: Optional[str] = None,
+                keywords: Optional[List[str]] = None,
+                js: bool = False,
+                max_snippets: int = 3,
+                window_words: int = 20,
+                user_query: Optional[str] = None,
+                summarize: bool = False,
+                deadline_seconds: float = scrape_scheduler.DEFAULT_DEADLINE_SECONDS) -> Dict[str, Any]:
     """
+    Scrape several webpages at once with the same keyword/selector spec and return all results together.
 
-    def infer_semantic_type(values: list[str], col_name: str) -> str:
-        lower_vals = {str(v).lower() for v in values}
-
-        if lower_vals <= {"male", "female"}:
-            return "gender"
-        if lower_vals <= {"yes", "no"}:
-            return "boolean"
-        if "date" in col_name.lower():
-            return "date"
-        if "id" in col_name.lower():
-            return "identifier"
-        if "location" in col_name.lower():
-            return "location"
-
-        return "category"
-
-    def infer_role(series: pd.Series) -> str:
-        if pd.api.types.is_bool_dtype(series):
-            return "boolean"
-
-        if pd.api.types.is_datetime64_any_dtype(series):
-            return "datetime"
+    Pages are fetched concurrently (a global cap, and a per-site limit so one site is
+    never hammered); pages not done within deadline_seconds are reported as "timeout"
+    instead of holding up the others.
 
-        if pd.api.types.is_numeric_dtype(series):
-            return "numeric"
+    Args:
+        urls (List[str]): The URLs to scrape (e.g. the hrefs of web_search results). At most 10 are used.
+        selector (Optional[str]): CSS selector to extract on every page (as in scrape_data).
+        keyword (Optional[str]): Keyword to search for on every page (as in scrape_data).
+        keywords (Optional[List[str]]): Several keywords to search for on every page.
+        js (bool): Whether to render JavaScript (requires Playwright). Default is False.
+        max_snippets (int): Maximum number of matches used per keyword and page. Default is 3.
+        window_words (int): Number of words before and after a match to include in a snippet. Default is 20.
+        user_query (Optional[str]): The user's original query; the most relevant passages of long results are kept.
+        summarize (bool): Summarize results with the LLM instead of extracting passages locally (slower). Default is False.
+        deadline_seconds (float): Time budget for the whole call. Default is 45.
 
-        unique_count = series.nunique(dropna=True)
-        total_count = len(series)
+    Returns:
+        Dict[str, Any]: A dictionary with the following structure:
+            - status: "ok" if any page had results, otherwise "not_found" or "error"
+            - results: One scrape_data result per URL, in input order (status may also be "timeout")
+            - counts: Number of results per status
+            - elapsed_seconds: Wall time of the call
 
-        if unique_count <= categorical_threshold * total_count:
-            return "categorical"
+    Usage Notes (for the agent):
+        - Use after web_search to check several hits in one step instead of calling scrape_data per URL
+        - Give keyword/keywords or selector; with neither, each result holds the page's headings
+        - Follow up on a single promising page with scrape_data
+    """
+    started = time.monotonic()
+    by_page: Dict[str, str] = {}
+    for u in urls or []:
+        if u and u.strip():
+            by_page.setdefault(normalize_url(u), u)
+    unique = list(by_page.values())
+    skipped = unique[SCRAPE_MANY_MAX_URLS:]
+    unique = unique[:SCRAPE_MANY_MAX_URLS]
+    if not unique:
+        return {"status": "error", "error": "No URLs given", "results": []}
+
+    def scrape_one(url: str) -> Dict[str, Any]:
+        return scrape_data.func(url, selector=selector, keyword=keyword, keywords=keywords, js=js,
+                                max_snippets=max_snippets, window_words=window_words, user_query=user_query,
+                                summarize=summarize)
+
+    print(f"DEBUG: scrape_many fetching {len(unique)} page(s)")
+    results = scrape_scheduler.run_all(unique, scrape_one, deadline_seconds=deadline_seconds)
+
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r.get("status", "error")] = counts.get(r.get("status", "error"), 0) + 1
+    if counts.get("ok"):
+        status = "ok"
+    elif counts.get("not_found"):
+        status = "not_found"
+    else:
+        status = "error"
+
+    consolidated = {
+        "status": status,
+        "results": results,
+        "counts": counts,
+        "elapsed_seconds": round(time.monotonic() - started, 2)
+    }
+    if skipped:
+        consolidated["note"] = f"Only the first {SCRAPE_MANY_MAX_URLS} URLs were scraped; skipped: {skipped}"
+    return consolidated
 
-        return "text"
 
-    summary = {
-        "row_count": int(len(df)),
-        "column_count": int(len(df.columns)),
-        "duplicate_rows": int(df.duplicated().sum()),
-        "memory_usage_mb": round(df.memory_usage(deep=True).sum() / 1e6, 2),
-        "columns": []
-    }
+@tool
+def get_table_rows(url: str,
+                   table_id: int,
+                   offset: int = 0,
+                   limit: int = 20,
+                   columns: Optional[List[str]] = None,
+                   contains: Optional[str] = None,
+                   filter_column: Optional[str] = None,
+                   filter_value: Optional[str] = None,
+                   js: bool = False) -> Dict[str, Any]:
+    """
+    Read rows of a table found by scrape_data, optionally filtered, a page at a time.
 
-    for col in df.columns:
-        series = df[col]
-        non_null = series.dropna()
-
-        unique_values = non_null.unique()
-        example_values = [
-            v.item() if isinstance(v, np.generic) else v
-            for v in unique_values[:sample_values]
-        ]
-
-        role = infer_role(series)
-
-        column_info = {
-            "name": col,
-            "dtype": str(series.dtype),
-            "role": role,
-            "missing_count": int(series.isna().sum()),
-            "missing_percent": round(series.isna().mean() * 100, 2),
-            "unique_count": int(series.nunique(dropna=True)),
-            "example_values": example_values
-        }
+    Args:
+        url (str): The URL of the page (as passed to scrape_data).
+        table_id (int): The table_id from scrape_data's table_data.
+        offset (int): First row to return, after filtering. Default is 0.
+        limit (int): Number of rows to return (at most 100). Default is 20.
+        columns (Optional[List[str]]): Only return these columns.
+        contains (Optional[str]): Only rows where some cell contains this text (case-insensitive).
+        filter_column (Optional[str]): Column to filter on, together with filter_value.
+        filter_value (Optional[str]): Only rows whose filter_column cell contains this text (case-insensitive).
+        js (bool): Use the JavaScript-rendered page (pass the same value as to scrape_data). Default is False.
 
-        if role == "categorical":
-            column_info["semantic_type"] = infer_semantic_type(
-                example_values, col
-            )
+    Returns:
+        Dict[str, Any]: status, table_id, columns, row_count (matching rows), offset, rows, has_more,
+                        or status "error" with an error message.
 
-        summary["columns"].append(column_info)
+    Usage Notes (for the agent):
+        - Call after scrape_data(selector="table") showed a table's schema and preview
+        - Filter instead of paging through a whole table when looking for specific rows
+    """
+    loaded = _load_page(url, js=js)
+    if "error" in loaded:
+        return {"status": "error", "error": loaded["error"]}
+    frames = loaded["page"].frames
+    if not 0 <= table_id < len(frames):
+        return {"status": "error", "error": f"No table {table_id}; the page has {len(frames)} table(s)."}
 
-    print(f"DEBUG: Summary generated with {len(summary['columns'])} columns")
-    return summary
+    rows = _table_rows(frames[table_id], offset=offset, limit=max(1, min(limit, MAX_TABLE_ROWS)),
+                       columns=columns, contains=contains,
+                       filter_column=filter_column, filter_value=filter_value)
+    if rows["status"] == "ok":
+        rows["table_id"] = table_id
+    return rows
 
 
 @tool
@@ -654,30 +771,49 @@ def get_weather(location: str) -> Dict[str, Any]:
         - error: Error message if the weather data could not be retrieved
     """
     try:
-        conn = http.client.HTTPSConnection("weatherapi230.p.rapidapi.com")
         headers = {
             'x-rapidapi-key': os.getenv("RAPID_API_KEY"),
             'x-rapidapi-host': "weatherapi230.p.rapidapi.com"
         }
-        conn.request("GET", f"/current?units=metric&location={location}", headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-        return {"success": True, "weather_data": data.decode("utf-8")}
+        res = http_client.get("https://weatherapi230.p.rapidapi.com/current",
+                              params={"units": "metric", "location": location}, headers=headers)
+        return {"success": True, "weather_data": res.text}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
 @tool
-def load_dataset(file_path: str) -> Dict[str, Any]:
+def load_dataset(file_path: str, columns: Optional[List[str]] = None, engine: str = "auto",
+                 name: Optional[str] = None, mode: str = "replace") -> Dict[str, Any]:
     """Load a CSV or Excel file into a pandas DataFrame and return its summary.
     
+    The first load converts the file into a columnar (Parquet) cache with compact
+    dtypes; later loads of the same file read from that cache. Files too large for
+    memory are not loaded at all: they are queried in place with DuckDB.
+    Each file becomes a named dataset in the session and the most recently loaded
+    one is what analyze_data uses by default.
+    
+    With mode="append" (or "auto"), a file with the same columns as an already
+    loaded dataset (e.g. next month's export of the same report) is appended to it:
+    only the new file is parsed and the summary statistics are updated from the
+    new rows alone. By default every file is loaded as its own dataset.
+    
     Args:
         file_path: Absolute path to the CSV or Excel file
+        columns: Optional list of column names to load (default: all columns)
+        engine: "pandas", "duckdb" (out-of-core SQL) or "auto" (duckdb for very large files)
+        name: Name to register the dataset under (default: derived from the file name)
+        mode: "replace" (default: load as its own dataset), "auto" (append when the
+            schema matches the named or most recently used dataset) or "append"
+            (fail if there is nothing compatible to append to)
         
     Returns:
         Dict containing:
         - success: Whether the file was loaded successfully
         - summary: Dataset summary from summarize_dataframe
+        - dataset_name: Name the dataset is registered under in this session
+        - engine: Which engine analyze_data will use for this dataset
+        - appended: Whether the rows were appended to an existing dataset
         - error: Error message if loading failed
     """
     from session_context import get_session_id
@@ -689,25 +825,58 @@ def load_dataset(file_path: str) -> Dict[str, Any]:
         
         # Determine file type and load
         ext = path.suffix.lower()
-        if ext == '.csv':
-            df = pd.read_csv(file_path)
-        elif ext in ['.xls', '.xlsx']:
-            df = pd.read_excel(file_path)
-        else:
+        if ext not in ['.csv', '.xls', '.xlsx']:
             return {"success": False, "error": f"Unsupported file type: {ext}. Use .csv, .xls, or .xlsx"}
-        
-        # Store the dataframe in session-specific storage
+        if mode not in ("auto", "append", "replace"):
+            return {"success": False, "error": f"Unknown mode: {mode}. Use auto, append or replace"}
+
         session_id = get_session_id()
-        _session_datasets[session_id] = df
+
+        if mode != "replace":
+            header = read_header(file_path)
+            if columns:
+                header = header[columns]
+            target = find_append_target(session_id, file_path, column_kinds(header), name)
+            if target is not None:
+                return _append_to_dataset(session_id, target, file_path, columns)
+            if mode == "append":
+                return {"success": False, "error": f"No loaded dataset has the same columns as {path.name}"}
+
+        dataset_name = name or dataset_name_for(file_path)
+        use_sql = engine == "duckdb" or (engine == "auto" and should_use_sql(file_path))
+        if use_sql:
+            if not sql_engine_available():
+                return {"success": False, "error": "duckdb not installed; install with: pip install duckdb"}
+            summary = summarize_source(file_path)
+            register_dataset(session_id, dataset_name, source_path=file_path, engine="duckdb",
+                             schema=column_kinds(read_header(file_path)))
+            print(f"DEBUG: {path.name} registered for out-of-core analysis")
+            return {
+                "success": True,
+                "summary": summary,
+                "dataset_name": dataset_name,
+                "engine": "duckdb",
+                "appended": False,
+                "file_path": file_path,
+                "session_id": session_id
+            }
+
+        df = load_table(file_path, columns=columns)
+        
+        # Store the dataframe in the session's dataset registry
+        entry = register_dataset(session_id, dataset_name, df, source_path=file_path)
         
-        # Generate summary
-        summary = summarize_dataframe(df)
+        # Generate summary (cached for analyze_data until the dataset changes)
+        summary = get_cached_summary((session_id, dataset_name), df, entry["version"])
         print("DEBUG: Summary generation complete")
         print(f"DEBUG: Summary keys: {summary.keys()}")
         
         return {
             "success": True,
             "summary": summary,
+            "dataset_name": dataset_name,
+            "engine": "pandas",
+            "appended": False,
             "file_path": file_path,
             "session_id": session_id
         }
@@ -716,9 +885,55 @@ def load_dataset(file_path: str) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
-# Global dictionary to store datasets per session
-# Key: session_id, Value: pandas DataFrame
-_session_datasets = {}
+def _append_to_dataset(session_id: str, name: str, file_path: str,
+                       columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """load_dataset for a file whose rows extend an already registered dataset."""
+    entry = get_entry(session_id, name)
+    if entry["engine"] == "duckdb":
+        entry = append_dataset(session_id, name, file_path)
+        summary = summarize_source(entry["parts"])
+    else:
+        delta = load_table(file_path, columns=columns or list(entry["df"].columns))
+        entry = append_dataset(session_id, name, file_path, delta)
+        summary = entry["sketch"].to_summary()
+        store_summary((session_id, name), entry["df"], entry["version"], summary)
+    return {
+        "success": True,
+        "summary": summary,
+        "dataset_name": name,
+        "engine": entry["engine"],
+        "appended": True,
+        "parts": len(entry["parts"]),
+        "file_path": file_path,
+        "session_id": session_id
+    }
+
+
+@tool
+def list_datasets() -> List[Dict[str, Any]]:
+    """List the datasets loaded in the current session.
+    
+    Use the returned names with analyze_data(user_query, datasets=[...]) to analyze
+    a specific dataset or to join several of them.
+    
+    Returns:
+        A list of dicts with name, file, engine, memory_mb, in_memory and active
+        (the dataset analyze_data uses by default).
+    """
+    from session_context import get_session_id
+    return list_registered_datasets(get_session_id())
+
+
+def _strip_code_fences(text: str) -> str:
+    """Remove markdown code fences the model sometimes wraps code in."""
+    code = text.strip()
+    if code.startswith('```python'):
+        code = code[9:]
+    if code.startswith('```'):
+        code = code[3:]
+    if code.endswith('```'):
+        code = code[:-3]
+    return code.strip()
 
 
 @tool
@@ -730,20 +945,21 @@ def generate_analysis_code(user_query: str, dataset_summary: str) -> str:
     
     Args:
         user_query: The user's question or request about the data
-        dataset_summary: JSON string containing the dataset summary from load_dataset
+        dataset_summary: Compact schema string for the dataset (see encode_summary_for_prompt)
         
     Returns:
         Executable Python code string that can be passed to run_python_code
     """
     code_gen_prompt = f'''You are a data analysis code generator. Generate ONLY executable Python code.
 
-DATASET SUMMARY:
+DATASET SUMMARY (one line per column: name|dtype|role|nulls|unique|examples):
 {dataset_summary}
 
 USER REQUEST: {user_query}
 
 RULES:
-1. The dataframe is already loaded as `df` - do NOT load it again
+1. The dataframe is already loaded as `df` - do NOT load it again. If several datasets are
+   listed, each one is available as `dfs["<name>"]` (the first is also `df`); join them with pd.merge
 2. Use pandas for data manipulation
 3. Use matplotlib.pyplot (as plt) for visualizations
 4. If creating a plot, do NOT call plt.show() - the system saves plots automatically
@@ -760,63 +976,48 @@ Generate the Python code:'''
         )
         
         # Clean the response - remove markdown code blocks if present
-        code = response.text.strip()
-        if code.startswith('```python'):
-            code = code[9:]
-        if code.startswith('```'):
-            code = code[3:]
-        if code.endswith('```'):
-            code = code[:-3]
-        
-        return code.strip()
+        return _strip_code_fences(response.text)
     except Exception as e:
         return f"# Error generating code: {e}"
 
 
-@tool
-def analyze_data(user_query: str) -> Dict[str, Any]:
-    """Analyze the currently loaded dataset based on user's query.
-    
-    This is a high-level tool that combines code generation and execution.
-    First loads the dataset (if not loaded), generates analysis code using Gemini 2.5 Flash,
-    then executes it and returns results including any generated plots.
-    
-    Args:
-        user_query: The user's question about the data (e.g., "How many students have CGPA > 3?")
-        
-    Returns:
-        Dict containing:
-        - text_output: Text results from the analysis
-        - image_path: Path to generated plot (if any)
-        - code: The generated Python code
-        - success: Whether the analysis succeeded
-    """
-    from session_context import get_session_id
-    session_id = get_session_id()
-    
-    current_df = _session_datasets.get(session_id)
-    
-    if current_df is None:
-        return {
-            "success": False,
-            "text_output": "No dataset loaded for this session. Please upload a CSV or Excel file first.",
-            "image_path": None,
-            "code": None
-        }
-    
-    # Get summary of current dataset
-    import numpy as np
-    summary = summarize_dataframe(current_df)
-    summary_str = json.dumps(summary, indent=2, default=str)
-    
-    # Generate code
-    code = generate_analysis_code.func(user_query, summary_str)
-    
-    # Prepare execution environment with the dataset
-    exec_code = f'''df = _current_dataset
-{code}'''
-    
-    # Execute the code
+def generate_sql_analysis_code(user_query: str, dataset_summary: str) -> str:
+    """Generate Python code that analyzes an out-of-core dataset through DuckDB SQL."""
+    code_gen_prompt = f'''You are a data analysis code generator. Generate ONLY executable Python code.
+
+The dataset is too large for memory. It is available as the DuckDB table `data`;
+any other datasets listed below are available as tables under their own names.
+
+DATASET SUMMARY (one line per column: name|dtype|role|nulls|unique|examples):
+{dataset_summary}
+
+USER REQUEST: {user_query}
+
+RULES:
+1. There is NO `df` variable. Two helpers are available:
+   - sql(query) runs DuckDB SQL against the full tables and returns a pandas DataFrame
+   - sample(n=100000) returns a random sample of raw rows of `data` as a pandas DataFrame
+2. Do ALL counting, filtering, grouping and aggregation in SQL with sql(), never on sample()
+3. For plots, plot aggregated sql() results; use sample() only to plot raw distributions (histograms, scatter plots)
+4. Quote column names with double quotes in SQL
+5. Use matplotlib.pyplot (as plt) for visualizations and do NOT call plt.show()
+6. Print any numerical answers or insights clearly
+7. Return ONLY the Python code, no explanations or markdown
+
+Generate the Python code:'''
+
+    try:
+        response = gemini_client.models.generate_content(
+            model='models/gemini-2.5-flash',
+            contents=code_gen_prompt
+        )
+        return _strip_code_fences(response.text)
+    except Exception as e:
+        return f"# Error generating code: {e}"
+
+
+def _execute_analysis(code: str, namespace: Dict[str, Any], engine: str) -> Dict[str, Any]:
+    """Run analysis code, capturing stdout and saving any plot it creates."""
     import io
     import sys
     import matplotlib
@@ -828,6 +1029,7 @@ def analyze_data(user_query: str) -> Dict[str, Any]:
         "text_output": "",
         "image_path": None,
         "code": code,
+        "engine": engine,
         "success": True
     }
     
@@ -840,10 +1042,9 @@ def analyze_data(user_query: str) -> Dict[str, Any]:
             'pd': pd,
             'plt': plt,
             'np': np,
-            '_current_dataset': current_df,
-            'df': current_df
+            **namespace
         }
-        exec(exec_code, namespace)
+        exec(code, namespace)
         
         output = captured_output.getvalue()
         sys.stdout = old_stdout
@@ -868,51 +1069,156 @@ def analyze_data(user_query: str) -> Dict[str, Any]:
     return result
 
 
+def _describe_datasets(session_id: str, entries: List[Dict[str, Any]], label) -> str:
+    """Compact schemas for the datasets passed to the code generator."""
+    if len(entries) == 1 and entries[0]["engine"] == "pandas":
+        entry = entries[0]
+        return encode_summary_for_prompt(get_cached_summary((session_id, entry["name"]), entry["df"], entry["version"]))
+    blocks = []
+    for entry in entries:
+        if entry["engine"] == "duckdb":
+            summary = summarize_source(entry["parts"])
+        else:
+            summary = get_cached_summary((session_id, entry["name"]), entry["df"], entry["version"])
+        blocks.append(f"Dataset {label(entry)}:\n{encode_summary_for_prompt(summary)}")
+    return "\n\n".join(blocks)
+
+
+def _analyze_out_of_core(user_query: str, session_id: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """analyze_data when any selected dataset is queried out of core with DuckDB."""
+    tables = {
+        e["name"]: sources_relation(e["parts"]) if e["engine"] == "duckdb" else e["df"]
+        for e in entries
+    }
+    primary = entries[0]["name"]
+
+    def label(entry):
+        if entry["name"] == primary:
+            return f'table "{primary}" (also available as `data`)'
+        return f'table "{entry["name"]}"'
+
+    code = generate_sql_analysis_code(user_query, _describe_datasets(session_id, entries, label))
+    try:
+        con = sql_connect(sql_quote_identifier(primary), tables)
+    except Exception as e:
+        return {"text_output": f"Error executing analysis: {e}", "image_path": None, "code": code,
+                "engine": "duckdb", "success": False}
+    try:
+        return _execute_analysis(code, sql_analysis_namespace(con), "duckdb")
+    finally:
+        con.close()
+
+
+@tool
+def analyze_data(user_query: str, datasets: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Analyze the currently loaded dataset based on user's query.
+    
+    This is a high-level tool that combines code generation and execution.
+    First loads the dataset (if not loaded), generates analysis code using Gemini 2.5 Flash,
+    then executes it and returns results including any generated plots.
+    Datasets too large for memory are analyzed with DuckDB SQL over the file itself.
+    
+    Args:
+        user_query: The user's question about the data (e.g., "How many students have CGPA > 3?")
+        datasets: Optional dataset names or file names to analyze (see list_datasets).
+                  Several names make them all available so they can be joined.
+                  Defaults to the most recently loaded dataset.
+        
+    Returns:
+        Dict containing:
+        - text_output: Text results from the analysis
+        - image_path: Path to generated plot (if any)
+        - code: The generated Python code
+        - engine: "planner" if answered by the rule-based planner, "llm" if code was generated,
+          "duckdb" if the dataset was queried out of core
+        - success: Whether the analysis succeeded
+    """
+    from session_context import get_session_id
+    session_id = get_session_id()
+
+    entries = []
+    for requested in (datasets or [None]):
+        entry = get_entry(session_id, requested)
+        if entry is None:
+            available = [d["name"] for d in list_registered_datasets(session_id)]
+            if requested is None or not available:
+                message = "No dataset loaded for this session. Please upload a CSV or Excel file first."
+            else:
+                message = f"Dataset '{requested}' not found. Available datasets: {available}"
+            return {
+                "success": False,
+                "text_output": message,
+                "image_path": None,
+                "code": None
+            }
+        entries.append(entry)
+
+    if any(e["engine"] == "duckdb" for e in entries):
+        return _analyze_out_of_core(user_query, session_id, entries)
+    
+    current_df = entries[0]["df"]
+    frames = {e["name"]: e["df"] for e in entries}
+
+    # Common aggregate questions are answered by the rule-based planner,
+    # everything else goes through Gemini code generation
+    plan = None
+    if len(entries) == 1:
+        summary = get_cached_summary((session_id, entries[0]["name"]), current_df, entries[0]["version"])
+        plan = plan_query(user_query, summary)
+    if plan is not None:
+        code = plan["code"]
+        engine = "planner"
+        print(f"DEBUG: Query planner hit ({plan['intent']}, confidence {plan['confidence']}), stats: {planner_stats()}")
+    else:
+        def label(entry):
+            return f'dfs["{entry["name"]}"]' + (" (also available as `df`)" if entry is entries[0] else "")
+        code = generate_analysis_code.func(user_query, _describe_datasets(session_id, entries, label))
+        engine = "llm"
+    
+    return _execute_analysis(code, {'_current_dataset': current_df, 'df': current_df, 'dfs': frames}, engine)
+
+
 @tool
-def image_explanation(file_path: str, user_query: str) -> str:
+def image_explanation(file_path: str, user_query: str, more_file_paths: Optional[List[str]] = None,
+                      more_queries: Optional[List[str]] = None) -> str:
     """
     Analyze and explain an image file based on a user query using Gemini 2.5 Flash.
     
+    Several images and questions are answered together in a single request: every
+    question is answered for every image. Use this when the user uploads several
+    images at once instead of calling the tool once per image.
+    
     Args:
         file_path: Absolute path to the image file.
         user_query: The question or instruction regarding the image.
+        more_file_paths: Absolute paths of further images to analyze in the same request.
+        more_queries: Further questions to answer about every image.
         
     Returns:
-        The explanation or answer generated by the model.
+        The explanation or answer generated by the model (one labeled answer per
+        image and question when several are given).
     """
-    import mimetypes
-    
     try:
-        # Check if file exists
-        if not os.path.exists(file_path):
+        file_paths = [file_path] + list(more_file_paths or [])
+        queries = [user_query] + list(more_queries or [])
+        missing = [p for p in file_paths if not os.path.exists(p)]
+        if missing:
             # Try to list files to be helpful
             try:
                 available = list_attached_files()
             except:
                 available = "Could not list files."
-            return f"ERROR: File not found at '{file_path}'. Available files: {available}"
+            return f"ERROR: File not found at '{missing[0]}'. Available files: {available}"
 
-        mime_type, _ = mimetypes.guess_type(file_path)
-        if not mime_type:
-             mime_type = 'image/jpeg'
-        
-        with open(file_path, 'rb') as f:
-            image_bytes = f.read()
-            
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[
-                types.Part.from_bytes(
-                    data=image_bytes,
-                    mime_type=mime_type,
-                ),
-                user_query
-            ]
+        results = explain_images(gemini_client, file_paths, queries)
+        if len(results) == 1:
+            return results[0]["answer"]
+        return "\n\n".join(
+            f"[{Path(r['file']).name}] {r['question']}\n{r['answer']}" for r in results
         )
-        return response.text
     except Exception as e:
         return f"Error analyzing image: {str(e)}"
 
 
-TOOLS = [get_weather, analyze_data, load_dataset, generate_analysis_code, calculator, run_python_code, convert_audio_to_text, list_attached_files, read_python_file, SpeechToText, gemini_vision, reverse_string, web_search, scrape_data, image_explanation]
+TOOLS = [get_weather, analyze_data, load_dataset, list_datasets, generate_analysis_code, calculator, run_python_code, convert_audio_to_text, get_transcript_excerpt, list_attached_files, read_python_file, SpeechToText, gemini_vision, reverse_string, web_search, scrape_data, scrape_many, get_table_rows, image_explanation]
 
@@ -0,0 +1,231 @@
+# transcript_store.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+# Transcripts outlive sessions, so they are kept apart from the per-session dataset cache
+STORE_DIR = Path(os.getenv("TRANSCRIPT_STORE_DIR", Path(__file__).parent / ".transcript_store"))
+DB_PATH = STORE_DIR / "transcripts.db"
+
+# Query parameters that never change which video a URL points to
+_TRACKING_PARAMS = re.compile(r"^(utm_.*|si|feature|fbclid|gclid|igshid|ab_channel|pp|t|start|is_from_webapp|sender_device)$")
+
+_YOUTUBE_HOSTS = ("youtube.com", "youtube-nocookie.com")
+_YOUTUBE_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    text TEXT NOT NULL,
+    duration REAL,
+    provider TEXT,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    key TEXT NOT NULL REFERENCES transcripts(key) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (key, idx)
+);
+CREATE TABLE IF NOT EXISTS video_analyses (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    model TEXT,
+    created REAL NOT NULL
+);
+"""
+
+_lock = threading.Lock()
+_initialized = False
+
+# Hashes of files already seen: (path, size, mtime) -> key, so re-asking about a file skips re-hashing
+_file_keys: Dict[Tuple[str, int, int], str] = {}
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialized
+    if not _initialized:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(DB_PATH, timeout=30)
+    con.execute("PRAGMA foreign_keys = ON")
+    if not _initialized:
+        with _lock:
+            con.execute("PRAGMA journal_mode = WAL")
+            con.executescript(_SCHEMA)
+            _initialized = True
+    return con
+
+
+def file_key(file_path: str) -> str:
+    """Key for a local media file: the SHA-256 of its contents."""
+    path = Path(file_path)
+    stat = path.stat()
+    identity = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if identity not in _file_keys:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        _file_keys[identity] = f"sha256:{digest.hexdigest()}"
+    return _file_keys[identity]
+
+
+def canonical_video_key(url: str) -> str:
+    """
+    Key for a video URL that is the same for every form of the same video.
+
+    YouTube (watch?v=, youtu.be, shorts, embed, live, mobile and music hosts),
+    TikTok and Facebook links reduce to "<platform>:<video id>". Other URLs are
+    normalized (lower-case host, no fragment, no tracking parameters).
+    """
+    parts = urlsplit(url.strip() if "://" in url else "https://" + url.strip())
+    host = (parts.hostname or "").lower()
+    host = host[4:] if host.startswith("www.") else host
+    host = host[2:] if host.startswith("m.") else host
+    segments = [s for s in parts.path.split("/") if s]
+    query = parse_qs(parts.query)
+
+    if host == "youtu.be" and segments:
+        video_id = segments[0]
+    elif host.endswith(_YOUTUBE_HOSTS):
+        if "v" in query:
+            video_id = query["v"][0]
+        elif len(segments) >= 2 and segments[0] in ("shorts", "embed", "live", "v"):
+            video_id = segments[1]
+        else:
+            video_id = None
+    else:
+        video_id = None
+    if video_id and _YOUTUBE_ID.match(video_id):
+        return f"youtube:{video_id}"
+
+    if host.endswith("tiktok.com") and "video" in segments:
+        position = segments.index("video")
+        if position + 1 < len(segments):
+            return f"tiktok:{segments[position + 1]}"
+
+    if host.endswith("facebook.com") or host == "fb.watch":
+        if "v" in query:
+            return f"facebook:{query['v'][0]}"
+        for marker in ("videos", "reel", "reels"):
+            if marker in segments and segments.index(marker) + 1 < len(segments):
+                return f"facebook:{segments[segments.index(marker) + 1]}"
+
+    kept = sorted((k, v) for k, values in query.items() if not _TRACKING_PARAMS.match(k) for v in values)
+    path = "/" + "/".join(segments)
+    return "url:" + urlunsplit(("https", host, path, urlencode(kept), ""))
+
+
+def get_transcript(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Return a stored transcript.
+
+    Returns:
+        Dict with key, source, text, duration, provider and segments
+        ([{"start", "end", "text"}, ...]), or None if nothing is stored under ``key``
+    """
+    con = _connect()
+    try:
+        row = con.execute(
+            "SELECT source, text, duration, provider FROM transcripts WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        segments = con.execute(
+            "SELECT start_time, end_time, text FROM segments WHERE key = ? ORDER BY idx", (key,)
+        ).fetchall()
+    finally:
+        con.close()
+    source, text, duration, provider = row
+    return {
+        "key": key,
+        "source": source,
+        "text": text,
+        "duration": duration,
+        "provider": provider,
+        "segments": [{"start": s, "end": e, "text": t} for s, e, t in segments],
+    }
+
+
+def save_transcript(key: str, source: str, text: str, segments: Optional[List[Dict[str, Any]]] = None,
+                    duration: Optional[float] = None, provider: Optional[str] = None) -> None:
+    """Store (or replace) the transcript for ``key`` with its timestamped segments."""
+    con = _connect()
+    try:
+        with con:
+            con.execute("DELETE FROM segments WHERE key = ?", (key,))
+            con.execute(
+                "INSERT OR REPLACE INTO transcripts (key, source, text, duration, provider, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source, text, duration, provider, time.time())
+            )
+            con.executemany(
+                "INSERT INTO segments (key, idx, start_time, end_time, text) VALUES (?, ?, ?, ?, ?)",
+                [(key, i, float(s["start"]), float(s["end"]), s["text"]) for i, s in enumerate(segments or [])]
+            )
+    finally:
+        con.close()
+    print(f"DEBUG: Stored transcript {key} ({len(segments or [])} segments)")
+
+
+def transcript_excerpt(key: str, start: float = 0.0, end: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+    """Segments overlapping [start, end] seconds, or None if no transcript is stored."""
+    con = _connect()
+    try:
+        if con.execute("SELECT 1 FROM transcripts WHERE key = ?", (key,)).fetchone() is None:
+            return None
+        rows = con.execute(
+            "SELECT start_time, end_time, text FROM segments WHERE key = ? AND end_time >= ? AND start_time <= ? "
+            "ORDER BY idx",
+            (key, start, end if end is not None else float("inf"))
+        ).fetchall()
+    finally:
+        con.close()
+    return [{"start": s, "end": e, "text": t} for s, e, t in rows]
+
+
+def get_video_analysis(key: str) -> Optional[Dict[str, Any]]:
+    """Return the stored scene-by-scene analysis of a video, or None."""
+    con = _connect()
+    try:
+        row = con.execute("SELECT analysis FROM video_analyses WHERE key = ?", (key,)).fetchone()
+    finally:
+        con.close()
+    return json.loads(row[0]) if row else None
+
+
+def save_video_analysis(key: str, source: str, analysis: Dict[str, Any], model: Optional[str] = None) -> None:
+    """Store (or replace) the analysis of a video (see video_analysis.describe_video)."""
+    con = _connect()
+    try:
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO video_analyses (key, source, analysis, model, created) VALUES (?, ?, ?, ?, ?)",
+                (key, source, json.dumps(analysis), model, time.time())
+            )
+    finally:
+        con.close()
+    print(f"DEBUG: Stored video analysis {key} ({len(analysis.get('scenes', []))} scenes)")
+
+
+def store_stats() -> Dict[str, Any]:
+    """Number of stored transcripts, segments and video analyses."""
+    con = _connect()
+    try:
+        transcripts = con.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+        segments = con.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        videos = con.execute("SELECT COUNT(*) FROM video_analyses").fetchone()[0]
+    finally:
+        con.close()
+    return {"transcripts": transcripts, "segments": segments, "video_analyses": videos, "path": str(DB_PATH)}
@@ -1,33 +1,209 @@
 from langchain_groq import ChatGroq
+import hashlib
+import json
 import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+from passage_ranker import compress, estimate_tokens
 load_dotenv()
 client = ChatGroq(
     model="qwen/qwen3-32b",
     api_key=os.getenv("GROQ_API_KEY"),)
 
-def summarize_text(text, query=None):
-    """
-    Summaries text using Qwen2.5-0.5B with a query-aware compression.
-    """
-    prompt = f"""
-You are a fast, concise summarizer.
-Your job: compress the webpage text while keeping only the information 
-relevant to this user query: "{query or 'N/A'}".
+# Texts longer than this are cut down (extractively, keeping the passages relevant
+# to the query) before they are sent
+MAX_INPUT_TOKENS = 1500
+
+# Several texts go out in one request up to these limits
+BATCH_MAX_TOKENS = 6000
+BATCH_MAX_ITEMS = 8
 
-Rules:
+# Requests sent at once when the texts need several of them
+MAX_PARALLEL_REQUESTS = 4
+
+# Summaries by (text hash, normalized query)
+SUMMARY_CACHE_SIZE = 512
+
+_summaries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "requests": 0, "batched_requests": 0, "truncated": 0}
+
+_THINK_RE = re.compile(r"<think>.*?</think>", re.S)
+
+_RULES = """Rules:
 - Remove menus, ads, headers, unrelated links.
-- Keep all **facts, statistics, dates, percentages, prices, quantities, and any numerical data**. 
+- Keep all **facts, statistics, dates, percentages, prices, quantities, and any numerical data**.
 - Keep meaningful content and key points.
 - Do NOT invent or add new information.
-- Output a short, clean summary that **never drops numbers**. 
-- You may paraphrase text, but all numerical information must remain accurate.
+- Output a short, clean summary that **never drops numbers**.
+- You may paraphrase text, but all numerical information must remain accurate."""
+
+
+def _cache_key(text: str, query: Optional[str]) -> Tuple[str, str]:
+    digest = hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+    return digest, re.sub(r"\s+", " ", query or "").strip().lower()
+
+
+def _cache_get(key):
+    with _lock:
+        if key in _summaries:
+            _summaries.move_to_end(key)
+            return _summaries[key]
+    return None
+
+
+def _cache_put(key, summary: str) -> None:
+    with _lock:
+        _summaries[key] = summary
+        _summaries.move_to_end(key)
+        while len(_summaries) > SUMMARY_CACHE_SIZE:
+            _summaries.popitem(last=False)
+
+
+def _content(response) -> str:
+    """Text of a model reply, without the model's <think> section."""
+    return _THINK_RE.sub("", str(response.content)).strip()
+
+
+def _prepare(text: str, query: Optional[str]) -> str:
+    if estimate_tokens(text) <= MAX_INPUT_TOKENS:
+        return text
+    with _lock:
+        _stats["truncated"] += 1
+    return compress(text, query=query, token_budget=MAX_INPUT_TOKENS)
+
+
+def _summarize_one(text: str, query: Optional[str]) -> str:
+    prompt = f"""
+You are a fast, concise summarizer.
+Your job: compress the webpage text while keeping only the information
+relevant to this user query: "{query or 'N/A'}".
+
+{_RULES}
 
 TEXT TO SUMMARIZE:
 {text}
 """
+    with _lock:
+        _stats["requests"] += 1
+    return _content(client.invoke(prompt))
+
+
+def _summarize_batch(texts: List[str], query: Optional[str]) -> List[Optional[str]]:
+    """Summaries of several texts from one request; None for items the reply left out."""
+    listed = "\n\n".join(f"[TEXT {i + 1}]\n{text}" for i, text in enumerate(texts))
+    prompt = f"""
+You are a fast, concise summarizer.
+Your job: compress each of the {len(texts)} webpage texts below separately, keeping only the
+information relevant to this user query: "{query or 'N/A'}".
+
+{_RULES}
+
+Reply with JSON only: {{"summaries": [{{"id": <text number>, "summary": "<summary>"}}, ...]}}
+with one entry per text.
+
+{listed}
+"""
+    with _lock:
+        _stats["requests"] += 1
+        _stats["batched_requests"] += 1
+    reply = _content(client.invoke(prompt))
+    summaries: List[Optional[str]] = [None] * len(texts)
+    try:
+        items = json.loads(reply[reply.index("{"):reply.rindex("}") + 1]).get("summaries", [])
+    except ValueError:
+        print("DEBUG: Batched summary reply was not valid JSON; summarizing texts one by one")
+        return summaries
+    for item in items:
+        try:
+            i = int(item["id"]) - 1
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= i < len(texts) and item.get("summary"):
+            summaries[i] = str(item["summary"]).strip()
+    return summaries
+
+
+def _batches(texts: List[str]) -> List[List[int]]:
+    """Group text positions into requests within BATCH_MAX_TOKENS and BATCH_MAX_ITEMS."""
+    batches, current, size = [], [], 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if current and (size + cost > BATCH_MAX_TOKENS or len(current) >= BATCH_MAX_ITEMS):
+            batches.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def summarize_texts(texts: List[str], query: Optional[str] = None) -> List[str]:
+    """
+    Query-aware summaries of several texts, in as few model requests as possible.
+
+    Summaries are cached by (text hash, query). The remaining texts are cut to
+    MAX_INPUT_TOKENS and packed into batched requests that return one summary per
+    text; several requests run concurrently, and texts a batched reply leaves out
+    are summarized on their own.
+
+    Args:
+        texts: Texts to summarize (e.g. the snippets of one scrape)
+        query: The user's question; the summaries keep what is relevant to it
+
+    Returns:
+        One summary per text, in order
+    """
+    texts = [str(t) for t in texts]
+    keys = [_cache_key(t, query) for t in texts]
+    results: Dict[Tuple[str, str], Optional[str]] = {k: _cache_get(k) for k in keys}
+    pending = {k: _prepare(t, query) for k, t in zip(keys, texts) if results[k] is None}
+    with _lock:
+        _stats["hits"] += len(texts) - len(pending)
+        _stats["misses"] += len(pending)
+
+    if pending:
+        pending_keys = list(pending)
+        prepared = [pending[k] for k in pending_keys]
+
+        def run(batch: List[int]) -> List[Optional[str]]:
+            if len(batch) == 1:
+                return [_summarize_one(prepared[batch[0]], query)]
+            return _summarize_batch([prepared[i] for i in batch], query)
+
+        batches = _batches(prepared)
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_REQUESTS, len(batches))) as pool:
+            for batch, summaries in zip(batches, pool.map(run, batches)):
+                for i, summary in zip(batch, summaries):
+                    results[pending_keys[i]] = summary
+
+            left_out = [k for k in pending_keys if results[k] is None]
+            if left_out:
+                singles = pool.map(lambda k: _summarize_one(pending[k], query), left_out)
+                for k, summary in zip(left_out, singles):
+                    results[k] = summary
+
+        for k in pending_keys:
+            _cache_put(k, results[k])
+
+    return [results[k] for k in keys]
+
+
+def summarize_text(text, query=None):
+    """
+    Summaries text using Qwen2.5-0.5B with a query-aware compression.
+
+    Returns the summary text (cached by text and query; see summarize_texts).
+    """
+    return summarize_texts([text], query=query)[0]
 
-    
 
-    response = client.invoke(prompt)
-    return response
\ No newline at end of file
+def summary_stats() -> Dict[str, int]:
+    """Cache effectiveness and request counts of the summarizer."""
+    with _lock:
+        return {**_stats, "cached_summaries": len(_summaries)}
@@ -0,0 +1,167 @@
+# video_analysis.py
+import json
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from google.genai import types
+
+from transcript_store import canonical_video_key, get_video_analysis, save_video_analysis
+
+VISION_MODEL = "models/gemini-2.5-flash"
+
+# Seconds added on each side of a time range the model asks to re-watch
+CLIP_PADDING_SECONDS = 5
+
+# Reply the model gives when the stored description cannot answer a question
+NEED_VIDEO = "NEED_VIDEO"
+
+_DESCRIBE_PROMPT = """Watch the whole video and reply with JSON of this shape:
+{{"title": str, "duration_seconds": number, "summary": str,
+  "scenes": [{{"start": "MM:SS", "end": "MM:SS", "description": str, "on_screen_text": str,
+              "people": [str], "objects": [str], "counts": {{str: int}}}}],
+  "answer": str}}
+
+"scenes" must cover the video from start to end in order, each at most about 30 seconds long.
+Describe what is visible and happening in enough detail that later questions can be answered
+without watching again. In "counts", record the largest number of each notable kind of thing
+(people, animals, vehicles, items) visible at the same time in that scene.
+"answer" answers this question about the video: {question}"""
+
+_FOLLOW_UP_PROMPT = """You answer questions about a video using only its scene-by-scene description below.
+If the description is not detailed enough to answer reliably, reply with exactly
+"{marker} MM:SS-MM:SS" naming the part of the video that has to be watched again,
+or "{marker} all" if the whole video is needed. Do not guess.
+
+VIDEO DESCRIPTION:
+{description}
+
+QUESTION: {question}"""
+
+
+def _seconds(value: Any) -> float:
+    """Parse "SS", "MM:SS" or "H:MM:SS" (or a number) into seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    total = 0.0
+    for part in str(value).strip().split(":"):
+        total = total * 60 + float(part or 0)
+    return total
+
+
+def _timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def _video_part(url: str, start: Optional[float] = None, end: Optional[float] = None) -> types.Part:
+    """The video as a request part, optionally clipped to [start, end] seconds."""
+    metadata = None
+    if start is not None or end is not None:
+        metadata = types.VideoMetadata(
+            start_offset=f"{int(start or 0)}s",
+            end_offset=f"{int(end)}s" if end is not None else None
+        )
+    return types.Part(file_data=types.FileData(file_uri=url), video_metadata=metadata)
+
+
+def encode_description(analysis: Dict[str, Any]) -> str:
+    """Compact, one-line-per-scene text form of a video analysis for prompts."""
+    lines = [f"Title: {analysis.get('title', '')}", f"Summary: {analysis.get('summary', '')}"]
+    for scene in analysis.get("scenes", []):
+        line = f"[{_timestamp(scene['start'])}-{_timestamp(scene['end'])}] {scene.get('description', '')}"
+        if scene.get("on_screen_text"):
+            line += f" | text: {scene['on_screen_text']}"
+        if scene.get("people"):
+            line += f" | people: {', '.join(scene['people'])}"
+        if scene.get("objects"):
+            line += f" | objects: {', '.join(scene['objects'])}"
+        if scene.get("counts"):
+            line += " | counts: " + ", ".join(f"{k}={v}" for k, v in scene["counts"].items())
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def describe_video(client, url: str, question: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Watch a whole video once: build its time-indexed scene description and answer ``question``.
+
+    Returns:
+        (analysis with scene times in seconds, or None if the model did not return valid JSON; answer)
+    """
+    response = client.models.generate_content(
+        model=VISION_MODEL,
+        contents=types.Content(parts=[_video_part(url), types.Part(text=_DESCRIBE_PROMPT.format(question=question))]),
+        config=types.GenerateContentConfig(response_mime_type="application/json")
+    )
+    try:
+        data = json.loads(response.text)
+        scenes = [
+            {**scene, "start": _seconds(scene["start"]), "end": _seconds(scene["end"])}
+            for scene in data.get("scenes", [])
+        ]
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"DEBUG: Video description was not valid JSON ({e}); not caching it")
+        return None, response.text
+    answer = data.pop("answer", "")
+    data["scenes"] = scenes
+    return data, answer
+
+
+def _ask_clip(client, url: str, question: str, start: Optional[float], end: Optional[float]) -> str:
+    response = client.models.generate_content(
+        model=VISION_MODEL,
+        contents=types.Content(parts=[_video_part(url, start, end), types.Part(text=question)])
+    )
+    return response.text
+
+
+def answer_question(client, url: str, question: str, start: Optional[float] = None,
+                    end: Optional[float] = None, reanalyze: bool = False) -> Dict[str, Any]:
+    """
+    Answer a question about a video, watching as little of it as possible.
+
+    - The first question about a video watches it once and stores a scene-by-scene description.
+    - Later questions are answered from that description (text only). If it is not
+      detailed enough, only the time range the model names is watched again.
+    - A given start/end always watches just that range; reanalyze=True watches the
+      whole video again and replaces the stored description.
+
+    Args:
+        client: google.genai client
+        url: Video URL (any URL form of the same video shares one description)
+        question: The user's question
+        start: Start of the time range to watch, in seconds
+        end: End of the time range to watch, in seconds
+        reanalyze: Ignore the stored description and watch the whole video
+
+    Returns:
+        Dict with answer and source: "video" (whole video), "clip" (time range) or "description"
+    """
+    key = canonical_video_key(url)
+    if start is not None or end is not None:
+        return {"answer": _ask_clip(client, url, question, start, end), "source": "clip", "key": key}
+
+    analysis = None if reanalyze else get_video_analysis(key)
+    if analysis is None:
+        analysis, answer = describe_video(client, url, question)
+        if analysis is not None:
+            save_video_analysis(key, url, analysis, model=VISION_MODEL)
+        return {"answer": answer, "source": "video", "key": key}
+
+    response = client.models.generate_content(
+        model=VISION_MODEL,
+        contents=_FOLLOW_UP_PROMPT.format(marker=NEED_VIDEO, description=encode_description(analysis), question=question)
+    )
+    reply = (response.text or "").strip()
+    if not reply.startswith(NEED_VIDEO):
+        return {"answer": reply, "source": "description", "key": key}
+
+    match = re.search(r"(\d+(?::\d+)*)\s*-\s*(\d+(?::\d+)*)", reply)
+    if match is None:
+        print(f"DEBUG: Description of {key} cannot answer the question; watching the whole video")
+        return {"answer": _ask_clip(client, url, question, None, None), "source": "video", "key": key}
+    clip_start = max(_seconds(match.group(1)) - CLIP_PADDING_SECONDS, 0)
+    clip_end = _seconds(match.group(2)) + CLIP_PADDING_SECONDS
+    print(f"DEBUG: Re-watching {_timestamp(clip_start)}-{_timestamp(clip_end)} of {key}")
+    return {"answer": _ask_clip(client, url, question, clip_start, clip_end), "source": "clip", "key": key}